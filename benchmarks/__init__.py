@@ -0,0 +1 @@
+"""Benchmarks for the PodcastPal sync pipeline, run with `python -m benchmarks.run`"""
@@ -0,0 +1,50 @@
+"""
+Compare two benchmark result files
+
+    python -m benchmarks.compare base.json head.json [--threshold 1.2]
+
+exits with status 1 when any benchmark got slower than `threshold` times
+its base timing.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_THRESHOLD = 1.2
+
+def load_timings(path: str) -> Dict[Tuple[str, int], float]:
+    """Best timings of a result file keyed by benchmark name and episode count"""
+    with open(path) as f:
+        report = json.load(f)
+    return {(result['name'], result['episodes']): result['best'] for result in report['results']}
+
+def compare(base: Dict[Tuple[str, int], float],
+            head: Dict[Tuple[str, int], float]) -> List[Tuple[str, int, float, float, float]]:
+    """Rows of (name, episodes, base, head, ratio) for benchmarks present in both"""
+    return [
+        (name, episodes, base[(name, episodes)], timing, timing / base[(name, episodes)])
+        for (name, episodes), timing in sorted(head.items())
+        if (name, episodes) in base and base[(name, episodes)] > 0
+    ]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    rows = compare(load_timings(args.base), load_timings(args.head))
+    regressions = 0
+    print(f"{'benchmark':<28}{'episodes':>10}{'base s':>12}{'head s':>12}{'ratio':>8}")
+    for name, episodes, base, head, ratio in rows:
+        flag = ''
+        if ratio > args.threshold:
+            regressions += 1
+            flag = '  <- slower'
+        print(f"{name:<28}{episodes:>10}{base:>12.4f}{head:>12.4f}{ratio:>8.2f}{flag}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
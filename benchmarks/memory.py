@@ -0,0 +1,78 @@
+"""
+Per-episode memory footprint of the models, as seen in large backfills
+
+    python -m benchmarks.memory --episodes 100000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Callable, Dict, List, Optional
+
+from podcast_pal.core.podcast import EPISODE_FIELDS, Episode
+from podcast_pal.fetchers.opml import parse_opml
+from .opml_generator import generate_opml
+
+DEFAULT_EPISODES = 50000
+EPISODES_PER_PODCAST = 100
+SUMMARY_TEMPLATE = 'Show notes for {title} &amp; links to everything mentioned. ' * 4
+
+# Same fields without slots, as the models were before they were slotted
+UnslottedEpisode = make_dataclass('UnslottedEpisode', [(f.name, f.type, f) for f in fields(Episode)])
+
+def allocated_bytes(build: Callable[[], object]) -> int:
+    """Bytes still allocated by `build`'s result once it returns"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+def measure_episode_footprint(episodes: int = DEFAULT_EPISODES) -> Dict[str, float]:
+    """
+    Measure bytes per episode for the models and their serialized form.
+
+    `model_bytes_per_episode` includes the summary and parsed dates;
+    the instance figures count only the object itself, sharing values.
+
+    Returns:
+        Dict[str, float]: Bytes per episode for built models, slotted and
+        unslotted instances, and the dicts written to MongoDB
+    """
+    podcasts = max(1, episodes // EPISODES_PER_PODCAST)
+    raw_episodes = [ep for podcast in parse_opml(generate_opml(podcasts, EPISODES_PER_PODCAST, played_ratio=1.0))
+                    for ep in podcast][:episodes]
+    models = [Episode.from_raw_data(ep, SUMMARY_TEMPLATE.format(title=ep.get('title'))) for ep in raw_episodes]
+    count = len(models)
+
+    def build_models() -> List[Episode]:
+        return [Episode.from_raw_data(ep, SUMMARY_TEMPLATE.format(title=ep.get('title'))) for ep in raw_episodes]
+
+    def copy_as(cls) -> Callable[[], list]:
+        return lambda: [cls(*(getattr(model, name) for name in EPISODE_FIELDS)) for model in models]
+
+    return {
+        'episodes': count,
+        'model_bytes_per_episode': allocated_bytes(build_models) / count,
+        'slotted_instance_bytes_per_episode': allocated_bytes(copy_as(Episode)) / count,
+        'unslotted_instance_bytes_per_episode': allocated_bytes(copy_as(UnslottedEpisode)) / count,
+        'serialized_bytes_per_episode': allocated_bytes(lambda: [model.to_dict() for model in models]) / count
+    }
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description='Measure per-episode memory footprint')
+    parser.add_argument('--episodes', type=int, default=DEFAULT_EPISODES)
+    args = parser.parse_args(argv)
+
+    footprint = measure_episode_footprint(args.episodes)
+    print(json.dumps(footprint, indent=2))
+    return footprint
+
+if __name__ == '__main__':
+    main()
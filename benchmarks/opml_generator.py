@@ -0,0 +1,85 @@
+"""Synthetic Overcast extended-OPML exports of configurable size"""
+import io
+import random
+from datetime import datetime, timedelta
+from typing import Optional, TextIO
+from xml.sax.saxutils import quoteattr
+
+from dateutil.tz import gettz
+
+DEFAULT_BASE_URL = 'https://overcast.fm'
+DEFAULT_SEED = 1234
+
+_HEADER = '''<?xml version="1.0" encoding="utf-8"?>
+<opml version="1.0">
+    <head><title>Overcast Podcast Subscriptions</title></head>
+    <body>
+        <outline text="feeds">
+'''
+_FOOTER = '''        </outline>
+    </body>
+</opml>
+'''
+
+def write_opml(out: TextIO, podcasts: int, episodes_per_podcast: int,
+               played_ratio: float = 0.5, recent_ratio: float = 0.05,
+               base_url: str = DEFAULT_BASE_URL, seed: int = DEFAULT_SEED,
+               now: Optional[datetime] = None) -> int:
+    """
+    Stream a synthetic extended-OPML export to `out`.
+
+    Args:
+        out: Text stream to write to
+        podcasts: Number of podcast outlines
+        episodes_per_podcast: Episode outlines per podcast
+        played_ratio: Share of episodes marked as played
+        recent_ratio: Share of played episodes with activity in the last day
+        base_url: Base of every overcastUrl, e.g. a stub server
+        seed: Seed making the export reproducible
+        now: Reference time for activity dates, defaults to the current time
+
+    Returns:
+        int: Number of episodes written
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(gettz('Europe/Warsaw'))
+    out.write(_HEADER)
+    written = 0
+    for podcast_index in range(podcasts):
+        title = f"Podcast {podcast_index} & Friends"
+        out.write(
+            f'            <outline type="rss" text={quoteattr(title)} title={quoteattr(title)} '
+            f'xmlUrl="https://feeds.example.com/{podcast_index}.xml" overcastId="{podcast_index}">\n'
+        )
+        for episode_index in range(episodes_per_podcast):
+            out.write(_episode_outline(rng, podcast_index, episode_index, played_ratio, recent_ratio, base_url, now))
+            written += 1
+        out.write('            </outline>\n')
+    out.write(_FOOTER)
+    return written
+
+def generate_opml(podcasts: int, episodes_per_podcast: int, **kwargs) -> str:
+    """Build a synthetic export in memory, see `write_opml` for the options"""
+    out = io.StringIO()
+    write_opml(out, podcasts, episodes_per_podcast, **kwargs)
+    return out.getvalue()
+
+def _episode_outline(rng: random.Random, podcast_index: int, episode_index: int,
+                     played_ratio: float, recent_ratio: float, base_url: str, now: datetime) -> str:
+    overcast_id = f"{podcast_index}-{episode_index}"
+    played = rng.random() < played_ratio
+    if played and rng.random() < recent_ratio:
+        updated = now - timedelta(minutes=rng.randint(1, 24 * 60))
+    else:
+        updated = now - timedelta(days=rng.randint(9, 900))
+    published = updated - timedelta(days=rng.randint(0, 30))
+    title = f"Episode {episode_index} of podcast {podcast_index}: \"Notes\" & more"
+    return (
+        f'                <outline type="podcast-episode" overcastId="{overcast_id}" '
+        f'pubDate="{published.isoformat()}" title={quoteattr(title)} '
+        f'url="https://media.example.com/{overcast_id}.mp3" '
+        f'overcastUrl="{base_url}/+{overcast_id}" '
+        f'userUpdatedDate="{updated.isoformat()}" '
+        f'progress="{rng.randint(0, 3600) if not played else 0}" '
+        f'played="{1 if played else 0}" duration="{rng.randint(600, 7200)}"/>\n'
+    )
@@ -0,0 +1,108 @@
+"""
+Time full sync runs against a recorded HTTP archive
+
+    python -m podcast_pal sync --record overcast.archive.gz    # once, online
+    python -m benchmarks.replay overcast.archive.gz --latency 0.05
+
+Each run goes through OPML fetch, parsing, page fetching and storage just
+like `sync`, but Overcast is answered from the archive and MongoDB writes go
+to mongomock or an in-memory stand-in. Episode recency is evaluated as of
+the recording time, so repeated runs on any machine do the same work
+without network access. The output can be compared like `benchmarks.run`
+results.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from podcast_pal.auth.session import SessionManager
+from podcast_pal.context import SyncContext
+from podcast_pal.fetchers.archive import HttpArchive, ReplayAdapter
+from podcast_pal.main import run_sync
+from .run import DEFAULT_REPEAT, git_revision, measure
+from .storage import get_benchmark_collection
+
+DEFAULT_LATENCY = 0.0
+DEFAULT_OUTPUT = 'bench_replay.json'
+# Replayed responses are spaced by the simulated latency, not by the rate limit
+UNTHROTTLED_RATE = 1e9
+REPLAY_CREDENTIALS = {'email': 'replay', 'password': 'replay'}
+
+class ReplayContext(SyncContext):
+    """SyncContext answering Overcast from `archive` and storing into `collection`"""
+
+    def __init__(self, archive: HttpArchive, latency: float, state_dir: str, collection):
+        adapter = ReplayAdapter(archive, latency)
+        session_manager = SessionManager(os.path.join(state_dir, 'session.json'), REPLAY_CREDENTIALS,
+                                         adapter=adapter)
+        super().__init__(session_manager, rate_per_host=UNTHROTTLED_RATE, state_dir=state_dir,
+                         adapter=adapter, as_of=archive.recorded_at)
+        self._benchmark_collection = collection
+
+    def _connect_collection(self):
+        return self._benchmark_collection
+
+    def close(self) -> None:
+        # The benchmark collection has no MongoClient to close
+        self._collection = None
+        super().close()
+
+def replay_sync(archive: HttpArchive, latency: float = DEFAULT_LATENCY, use_mongomock: bool = True) -> Dict[str, int]:
+    """Run one full sync against `archive` with fresh local state and an empty collection"""
+    archive.rewind()
+    with tempfile.TemporaryDirectory() as state_dir:
+        context = ReplayContext(archive, latency, state_dir, get_benchmark_collection(use_mongomock))
+        try:
+            updated = run_sync(context)
+        finally:
+            context.close()
+    return {'updated': updated, 'misses': context.adapter.misses}
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, object]:
+    parser = argparse.ArgumentParser(description='Benchmark full syncs replayed from an HTTP archive')
+    parser.add_argument('archive', help='Archive written by `python -m podcast_pal sync --record`')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY,
+                        help='Seconds each replayed response is delayed')
+    parser.add_argument('--no-mongomock', action='store_true',
+                        help='Use the in-memory collection even if mongomock is installed')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.StreamHandler(sys.stdout)])
+    logging.getLogger('podcast_pal').setLevel(logging.WARNING)
+
+    archive = HttpArchive.load(args.archive)
+    outcomes = []
+    timing = measure(lambda: outcomes.append(replay_sync(archive, args.latency, not args.no_mongomock)),
+                     args.repeat)
+    responses = len(archive)
+    result = {
+        'name': 'replay_sync', 'podcasts': outcomes[-1]['updated'], 'episodes': responses, 'items': responses,
+        **timing, 'per_item_us': timing['best'] / max(responses, 1) * 1e6,
+        'latency': args.latency, 'misses': outcomes[-1]['misses']
+    }
+    logging.info(f"replay_sync [{responses} responses]: best {timing['best']:.4f}s")
+
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'archive': {'path': args.archive, 'recorded_at': archive.recorded_at.isoformat()},
+        'results': [result]
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Wrote replay results to {args.output}")
+    return report
+
+if __name__ == '__main__':
+    main()
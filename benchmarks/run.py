@@ -0,0 +1,159 @@
+"""
+Run the PodcastPal benchmarks and write the results as JSON
+
+    python -m benchmarks.run --podcasts 50 500 5000 --episodes-per-podcast 200
+
+covers 10k to 1M episodes. Page fetching runs against a local stub server
+and MongoDB writes against mongomock or an in-memory stand-in, so no
+network or credentials are needed. Compare result files across commits
+with `python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from podcast_pal.core.podcast import Episode, Podcast
+from podcast_pal.fetchers.opml import iter_opml, parse_opml
+from podcast_pal.fetchers.transport import Transport
+from podcast_pal.processor import (
+    MAX_REQUESTS_PER_HOST,
+    MAX_WORKERS,
+    WARSAW_TZ,
+    RecentlyPlayedFilter,
+    process_podcasts,
+    should_process_episode
+)
+from podcast_pal.storage.mongodb import LAYOUT_EMBEDDED, _serialize_podcast, update_podcasts
+from .memory import measure_episode_footprint
+from .opml_generator import generate_opml
+from .storage import get_benchmark_collection
+from .stub_server import StubOvercastServer
+
+DEFAULT_PODCAST_COUNTS = [50, 500]
+DEFAULT_EPISODES_PER_PODCAST = 200
+DEFAULT_REPEAT = 3
+DEFAULT_LATENCY = 0.02
+DEFAULT_OUTPUT = 'bench_results.json'
+DEFAULT_MEMORY_EPISODES = 50000
+# Page fetching is bounded by latency rather than size, so it runs on a slice
+MAX_PROCESSED_PODCASTS = 100
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Time `fn` `repeat` times, returning the best and mean wall time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {'best': min(timings), 'mean': statistics.mean(timings)}
+
+def build_podcasts(raw_podcasts: list) -> List[Podcast]:
+    """Build models of every played episode without fetching pages"""
+    return [
+        Podcast.from_raw_data(
+            raw,
+            [Episode.from_raw_data(ep, f"Summary of {ep.get('title')} &amp; notes")
+             for ep in raw if ep.get('played') == '1'],
+            artwork_url='https://artwork.example.com/art.jpg'
+        )
+        for raw in raw_podcasts
+    ]
+
+def run_size(podcasts: int, episodes_per_podcast: int, repeat: int, latency: float,
+             use_mongomock: bool) -> List[Dict[str, object]]:
+    """Run every benchmark on one export size"""
+    opml = generate_opml(podcasts, episodes_per_podcast)
+    episodes = podcasts * episodes_per_podcast
+    raw_podcasts = parse_opml(opml)
+    all_episodes = [ep for podcast in raw_podcasts for ep in podcast]
+    results = []
+
+    def record(name: str, timing: Dict[str, float], items: int, **extra) -> None:
+        results.append({
+            'name': name, 'podcasts': podcasts, 'episodes': episodes, 'items': items,
+            **timing, 'per_item_us': timing['best'] / max(items, 1) * 1e6, **extra
+        })
+        logging.info(f"{name} [{podcasts}x{episodes_per_podcast}]: best {timing['best']:.4f}s")
+
+    record('parse_opml', measure(lambda: parse_opml(opml), repeat), episodes, bytes=len(opml))
+    record('iter_opml_filtered', measure(lambda: list(iter_opml(opml, RecentlyPlayedFilter())), repeat), episodes)
+    now = datetime.now(WARSAW_TZ)
+    record('should_process_episode',
+           measure(lambda: [should_process_episode(ep, now) for ep in all_episodes], repeat), episodes)
+    episode_filter = RecentlyPlayedFilter()
+    record('recently_played_filter', measure(lambda: [episode_filter(ep) for ep in all_episodes], repeat), episodes)
+
+    models = build_podcasts(raw_podcasts)
+    stored_episodes = sum(len(podcast.episodes) for podcast in models)
+    record('serialize_podcast', measure(lambda: [_serialize_podcast(p) for p in models], repeat), stored_episodes)
+    record('update_podcasts',
+           measure(lambda: update_podcasts(get_benchmark_collection(use_mongomock), models, layout=LAYOUT_EMBEDDED),
+                   repeat),
+           stored_episodes)
+
+    with StubOvercastServer(latency=latency) as server:
+        subset_podcasts = parse_opml(generate_opml(min(podcasts, MAX_PROCESSED_PODCASTS), episodes_per_podcast,
+                                                   base_url=server.base_url))
+        session = Transport(requests.Session(), MAX_REQUESTS_PER_HOST, pool_size=MAX_WORKERS, rate_per_host=1e9)
+        timing = measure(lambda: process_podcasts(subset_podcasts, session), repeat)
+        record('process_podcasts', timing, len(subset_podcasts),
+               page_requests=server.requests // repeat, latency=latency)
+    return results
+
+def git_revision() -> Optional[str]:
+    """Current commit of the working tree, if it is a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, object]:
+    parser = argparse.ArgumentParser(description='Benchmark the PodcastPal sync pipeline')
+    parser.add_argument('--podcasts', type=int, nargs='+', default=DEFAULT_PODCAST_COUNTS,
+                        help='Export sizes to run, in podcasts')
+    parser.add_argument('--episodes-per-podcast', type=int, default=DEFAULT_EPISODES_PER_PODCAST)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY,
+                        help='Seconds the stub server waits before each response')
+    parser.add_argument('--no-mongomock', action='store_true',
+                        help='Use the in-memory collection even if mongomock is installed')
+    parser.add_argument('--memory-episodes', type=int, default=DEFAULT_MEMORY_EPISODES,
+                        help='Episodes used to measure the per-episode footprint, 0 to skip')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.StreamHandler(sys.stdout)])
+    # Keep per-podcast log lines of the pipeline out of the timings
+    logging.getLogger('podcast_pal').setLevel(logging.WARNING)
+
+    results = []
+    for podcasts in args.podcasts:
+        results.extend(run_size(podcasts, args.episodes_per_podcast, args.repeat, args.latency,
+                                not args.no_mongomock))
+
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+        'memory': measure_episode_footprint(args.memory_episodes) if args.memory_episodes else None
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Wrote {len(results)} results to {args.output}")
+    return report
+
+if __name__ == '__main__':
+    main()
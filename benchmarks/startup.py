@@ -0,0 +1,74 @@
+"""
+Cold-start cost of the command line entry points
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+
+Each target runs in a fresh interpreter with `-X importtime`; the report
+holds the import time of the target's modules and the wall time of the
+whole process, both as the best of `repeat` runs. The `interpreter`
+target is the baseline of a bare `python -c pass`; `import_sync` is what
+every command cost before the CLI imported lazily.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_REPEAT = 5
+HEAVY_MODULES = ('requests', 'pymongo', 'bson', 'dateutil', 'dotenv')
+
+# name -> interpreter arguments
+TARGETS = {
+    'interpreter': ['-c', 'pass'],
+    'cli_help': ['-m', 'podcast_pal', '--help'],
+    'cache_age': ['-m', 'podcast_pal', 'cache-age'],
+    'import_cli': ['-c', 'import podcast_pal.cli'],
+    'import_main': ['-c', 'import podcast_pal.main'],
+    'import_sync': ['-c', 'import podcast_pal.main, podcast_pal.storage.mongodb']
+}
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module imported"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nesting shows as extra indentation after the one separating space
+        imports[name[1:]] = int(cumulative)
+    return imports
+
+def run_target(args: List[str], repeat: int) -> Dict[str, object]:
+    """Best wall and import time of `repeat` fresh interpreters, and the heavy modules loaded"""
+    walls, import_times = [], []
+    loaded = set()
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], capture_output=True, text=True, env=env)
+        walls.append(time.perf_counter() - started)
+        imports = parse_importtime(result.stderr)
+        import_times.append(sum(us for name, us in imports.items() if not name.startswith(' ')) / 1e6)
+        loaded = {name.strip() for name in imports} & set(HEAVY_MODULES)
+    return {'wall_seconds': min(walls), 'import_seconds': min(import_times), 'heavy_modules': sorted(loaded)}
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, object]:
+    parser = argparse.ArgumentParser(description='Measure cold-start time of the entry points')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output')
+    args = parser.parse_args(argv)
+
+    report = {name: run_target(target, args.repeat) for name, target in TARGETS.items()}
+    for name, result in report.items():
+        print(f"{name:<12} wall {result['wall_seconds'] * 1000:7.1f} ms  imports {result['import_seconds'] * 1000:7.1f} ms"
+              f"  heavy: {', '.join(result['heavy_modules']) or '-'}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Storage stand-ins for benchmarking MongoDB writes without a server"""
+import itertools
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import bson
+from pymongo import InsertOne, UpdateOne
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+class InMemoryCollection:
+    """
+    Minimal collection for the embedded layout's `find` and `bulk_write` calls.
+
+    Every written document is BSON-encoded, so the driver's serialization
+    cost is part of the measurement even though nothing leaves the process.
+    """
+
+    def __init__(self, name: str = 'benchmark'):
+        self.name = name
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.encoded_bytes = 0
+        self._ids = itertools.count(1)
+
+    def find(self, filter: Dict[str, Any], projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        return [doc for doc in self.documents.values()
+                if all(_matches(doc.get(field), condition) for field, condition in filter.items())]
+
+    def bulk_write(self, operations: list, ordered: bool = True) -> SimpleNamespace:
+        inserted = modified = 0
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                document = dict(operation._doc, _id=next(self._ids))
+                self.encoded_bytes += len(bson.encode(document))
+                self.documents[document["_id"]] = document
+                inserted += 1
+            elif isinstance(operation, UpdateOne):
+                self.encoded_bytes += len(bson.encode(operation._doc))
+                document = self.documents[operation._filter["_id"]]
+                document["episodes"].extend(operation._doc.get("$push", {}).get("episodes", {}).get("$each", []))
+                document.update(operation._doc.get("$set", {}))
+                modified += 1
+            else:
+                raise TypeError(f"Unsupported operation {type(operation).__name__}")
+        return SimpleNamespace(inserted_count=inserted, modified_count=modified, upserted_ids={})
+
+def _matches(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict):
+        return value in condition["$in"]
+    return value == condition
+
+def get_benchmark_collection(use_mongomock: bool = True):
+    """Return a mongomock collection when available, otherwise an in-memory stand-in"""
+    if use_mongomock and mongomock is not None:
+        return mongomock.MongoClient().benchmark.podcasts
+    return InMemoryCollection()
@@ -0,0 +1,97 @@
+"""Local stand-in for Overcast serving exports and episode pages with tunable latency"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+EXPORT_PATH = '/account/export_opml/extended'
+
+EPISODE_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta name="og:title" content="Episode {overcast_id}">
+<meta name="og:description" content="{description}">
+</head>
+<body>
+<img class="art fullart" src="https://artwork.example.com/{podcast_id}.jpg">
+{padding}
+</body>
+</html>
+'''
+
+class StubOvercastServer:
+    """
+    Threaded HTTP server answering like overcast.fm, for use as a context manager.
+
+    Episode pages live at `/+<podcast>-<episode>`; every response is delayed
+    by `latency` seconds to mimic a remote host.
+    """
+
+    def __init__(self, opml: str = '', latency: float = 0.0, page_padding: int = 20000,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.opml = opml
+        self.latency = latency
+        self.page_padding = page_padding
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubOvercastServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubOvercastServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def render(self, path: str) -> Optional[str]:
+        """Body served for `path`, or None for a 404"""
+        if path == EXPORT_PATH:
+            return self.opml
+        if path.startswith('/+'):
+            overcast_id = path[2:]
+            return EPISODE_PAGE.format(
+                overcast_id=overcast_id,
+                podcast_id=overcast_id.split('-')[0],
+                description=f"Show notes for episode {overcast_id} &amp; links",
+                padding='<p>' + 'x' * self.page_padding + '</p>'
+            )
+        return None
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = stub.render(self.path)
+                payload = (body or 'Not Found').encode('utf-8')
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
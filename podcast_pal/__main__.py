@@ -0,0 +1,6 @@
+"""Entry point for `python -m podcast_pal`"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Syncing several Overcast accounts from one process
+
+Accounts are listed in a JSON file:
+
+    {"accounts": [
+        {"name": "alice", "email": "alice@example.com", "password_env": "ALICE_PASSWORD",
+         "collection": "alice_history"},
+        {"name": "bob", "email": "bob@example.com", "password": "...",
+         "collection": "bob_history", "database": "other_library"}
+    ]}
+
+Each account gets its own Overcast session and local state directory (OPML
+cache, sync state, journal and page cache), while the HTTP connection pool,
+the per-host rate limit and the MongoClient are shared by all of them.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .auth.session import SessionManager
+from .context import SyncContext
+from .core.exceptions import ConfigurationError
+from .fetchers.transport import REQUESTS_PER_SECOND_PER_HOST, HostRateLimiter, Transport, make_pool_adapter
+from .main import record_transport_metrics, sync_context
+from .metrics import metrics
+from .processor import MAX_WORKERS, get_max_workers
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+    from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+ACCOUNTS_STATE_DIR = '/tmp/podcast_pal_accounts'
+MAX_CONCURRENT_ACCOUNTS = 8
+_ACCOUNT_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+@dataclass
+class Account:
+    """One Overcast account and the collection its history is stored in"""
+    name: str
+    email: str
+    password: str
+    collection: str
+    database: Optional[str] = None
+    state_dir: Optional[str] = None
+
+    @property
+    def credentials(self) -> Dict[str, str]:
+        return {'email': self.email, 'password': self.password}
+
+def load_accounts(path: str) -> List[Account]:
+    """
+    Read and validate the accounts config file at `path`.
+
+    A `password_env` entry names an environment variable holding the
+    password, so the file itself need not contain secrets.
+    """
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except (IOError, ValueError) as e:
+        raise ConfigurationError(f"Failed to read accounts config {path}: {str(e)}")
+
+    entries = config.get('accounts') if isinstance(config, dict) else None
+    if not entries:
+        raise ConfigurationError(f"No accounts listed in {path}")
+    accounts = [_parse_account(entry, path) for entry in entries]
+
+    names = [account.name for account in accounts]
+    if len(set(names)) != len(names):
+        raise ConfigurationError(f"Accounts in {path} must have distinct names")
+    targets = [(account.database, account.collection) for account in accounts]
+    if len(set(targets)) != len(targets):
+        raise ConfigurationError(f"Accounts in {path} must store their history in distinct collections")
+    return accounts
+
+def _parse_account(entry: dict, path: str) -> Account:
+    name = entry.get('name', '')
+    if not _ACCOUNT_NAME.match(name):
+        raise ConfigurationError(f"Invalid account name '{name}' in {path}")
+    password = entry.get('password')
+    if password is None and entry.get('password_env'):
+        password = os.getenv(entry['password_env'])
+    missing = [field for field, value in (('email', entry.get('email')), ('password', password),
+                                          ('collection', entry.get('collection'))) if not value]
+    if missing or password is None:
+        raise ConfigurationError(f"Account '{name}' in {path} is missing {', '.join(missing)}")
+    return Account(name=name, email=entry['email'], password=password, collection=entry['collection'],
+                   database=entry.get('database'), state_dir=entry.get('state_dir'))
+
+class SharedResources:
+    """Connection pool, rate limiter and MongoClient shared by all accounts of a run"""
+
+    def __init__(self, pool_size: int = MAX_WORKERS, rate_per_host: float = REQUESTS_PER_SECOND_PER_HOST):
+        self.adapter = make_pool_adapter(pool_size)
+        self.limiter = HostRateLimiter(rate_per_host)
+        self._client: Optional['MongoClient'] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> 'MongoClient':
+        """MongoClient, connected on first use"""
+        with self._lock:
+            if self._client is None:
+                # Imported here so runs that never reach MongoDB do not load pymongo
+                from .storage.mongodb import get_mongodb_client
+
+                self._client = get_mongodb_client()
+            return self._client
+
+    def close(self) -> None:
+        """Close the connection pool and the MongoClient if it was opened"""
+        self.adapter.close()
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+class AccountContext(SyncContext):
+    """SyncContext for one account, building its transport and collection on `shared` resources"""
+
+    def __init__(self, account: Account, shared: SharedResources,
+                 max_workers: Optional[int] = None, max_per_host: Optional[int] = None):
+        state_dir = account.state_dir or os.path.join(ACCOUNTS_STATE_DIR, account.name)
+        # The directory holds session cookies, so keep it private
+        os.makedirs(state_dir, mode=0o700, exist_ok=True)
+        # Logins go through the shared pool and count against the shared rate limit
+        session_manager = SessionManager(os.path.join(state_dir, 'session.json'), account.credentials,
+                                         adapter=shared.adapter, limiter=shared.limiter)
+        super().__init__(session_manager, max_workers, max_per_host, shared.limiter.rate_per_host, state_dir)
+        self.account = account
+        self.shared = shared
+
+    def close(self) -> None:
+        """Forget the account's session and collection, leaving the shared pools open"""
+        # Closing the session would also close the shared adapter
+        self._transport = None
+        self._collection = None
+
+    def _build_transport(self) -> Transport:
+        return Transport(
+            self.session_manager.get_session(),
+            max_per_host=self.max_per_host,
+            adapter=self.shared.adapter,
+            limiter=self.shared.limiter
+        )
+
+    def _connect_collection(self) -> 'Collection':
+        from .storage.mongodb import get_mongodb_collection
+
+        return get_mongodb_collection(client=self.shared.client, database=self.account.database,
+                                      collection_name=self.account.collection)
+
+def run_accounts(accounts: List[Account], incremental: bool = False,
+                 max_concurrent: int = MAX_CONCURRENT_ACCOUNTS,
+                 max_workers: Optional[int] = None,
+                 max_per_host: Optional[int] = None,
+                 shared: Optional[SharedResources] = None) -> Dict[str, Optional[int]]:
+    """
+    Sync `accounts` concurrently on shared pools.
+
+    Every account runs with the same number of fetch workers, and the shared
+    limiter grants request slots in arrival order, so each account waits its
+    turn behind at most `max_workers` requests of every other account: a
+    large account slows the others down in proportion but cannot starve
+    them. A failing account is logged and does not stop the rest.
+    `max_workers` and `max_per_host` default to SYNC_WORKERS and
+    SYNC_REQUESTS_PER_HOST.
+
+    Returns:
+        Dict[str, Optional[int]]: Podcasts updated per account name, None for failed accounts
+    """
+    max_workers = max_workers or get_max_workers()
+    owns_shared = shared is None
+    shared = shared or SharedResources(pool_size=max_workers)
+    contexts = [AccountContext(account, shared, max_workers=max_workers, max_per_host=max_per_host)
+                for account in accounts]
+    metrics.reset()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrent, len(contexts))),
+                                thread_name_prefix='account') as executor:
+            futures = {context.account.name: executor.submit(_sync_account, context, incremental)
+                       for context in contexts}
+            results = {name: future.result() for name, future in futures.items()}
+    finally:
+        for context in contexts:
+            record_transport_metrics(context)
+            context.close()
+        if owns_shared:
+            shared.close()
+        metrics.report()
+
+    failed = [name for name, result in results.items() if result is None]
+    logger.info(f"Synced {len(results) - len(failed)} of {len(results)} accounts"
+                + (f", failed: {', '.join(failed)}" if failed else ''))
+    return results
+
+def _sync_account(context: AccountContext, incremental: bool) -> Optional[int]:
+    name = context.account.name
+    logger.info(f"Syncing account '{name}'")
+    try:
+        updates_count = sync_context(context, incremental)
+    except Exception:
+        logger.exception(f"Sync of account '{name}' failed")
+        return None
+    metrics.increment('accounts_synced')
+    logger.info(f"Account '{name}' done, {updates_count} podcasts updated")
+    return updates_count
@@ -1,40 +1,172 @@
 """Authentication and session management"""
 import os
+import json
+import time
 import logging
+import threading
 import requests
-from typing import Optional
+from requests.adapters import BaseAdapter
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
 from ..core.exceptions import AuthenticationError
+from ..fetchers.transport import HostRateLimiter
+from ..metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+LOGIN_URL = 'https://overcast.fm/login'
+SESSION_PATH = '/tmp/overcast_session.json'
+
+class ReauthenticatingSession(requests.Session):
+    """
+    Session that logs in again when Overcast reports it has expired.
+
+    An expired session shows up as a 401/403 or a redirect to the login
+    page. Such a response triggers `reauthenticate` and the request is
+    retried once; if the retry fails too, its response is returned as it
+    is. Requests that were in flight while another thread logged in again
+    are only retried, so concurrent expiries cause a single login.
+    """
+
+    def __init__(self, reauthenticate: Callable[['ReauthenticatingSession'], None]):
+        super().__init__()
+        self._reauthenticate = reauthenticate
+        # Bumped on every re-login, so each request can tell whether its cookies are stale
+        self._generation = 0
+        self._reauth_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        generation = self._generation
+        response = super().request(method, url, *args, **kwargs)
+        if url == LOGIN_URL or not is_session_expired(response):
+            return response
+
+        response.close()
+        with self._reauth_lock:
+            if self._generation == generation:
+                logger.info('Saved session expired, re-authenticating')
+                self._reauthenticate(self)
+                self._generation += 1
+        return super().request(method, url, *args, **kwargs)
+
+def is_session_expired(response: requests.Response) -> bool:
+    """Check if a response shows the session is no longer authenticated"""
+    if response.status_code in (401, 403):
+        return True
+    return urlsplit(response.url).path == urlsplit(LOGIN_URL).path
+
 class SessionManager:
-    def __init__(self):
-        pass
-        
+    def __init__(self, session_path: Optional[str] = None, credentials: Optional[Dict[str, str]] = None,
+                 adapter: Optional[BaseAdapter] = None, limiter: Optional[HostRateLimiter] = None):
+        self.session_path = session_path or SESSION_PATH
+        self.credentials = credentials
+        # Mounted before logging in, so the login request goes through it too
+        self.adapter = adapter
+        # Spaces logins like the transport's requests when shared with it
+        self.limiter = limiter
+        self._session: Optional[requests.Session] = None
+
     def get_session(self) -> requests.Session:
-        """Get an authenticated session"""
-        return self._create_new_session()
-        
+        """Get an authenticated session, reusing saved cookies when still valid"""
+        if self._session is None:
+            with metrics.timer('auth'):
+                self._session = self._load_saved_session() or self._create_new_session()
+        return self._session
+
     def _create_new_session(self) -> requests.Session:
         """Create and authenticate a new session"""
         logger.info('Creating new session')
-        session = requests.Session()
-        
+        session = self._new_session()
+        self._authenticate(session)
+        return session
+
+    def _new_session(self) -> ReauthenticatingSession:
+        session = ReauthenticatingSession(self._authenticate)
+        if self.adapter is not None:
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+        return session
+
+    def _authenticate(self, session: requests.Session) -> None:
+        """Log `session` in and save its cookies for later runs"""
+        session.cookies.clear()
         credentials = self._get_credentials()
-        response = session.post('https://overcast.fm/login', data=credentials)
+        self._throttle()
+        response = session.post(LOGIN_URL, data=credentials)
 
         if response.status_code != 200:
             raise AuthenticationError('Authentication failed')
 
         logger.info('Authenticated successfully')
+        metrics.increment('logins')
+        self._save_cookies(session)
+
+    def _throttle(self) -> None:
+        if self.limiter is None:
+            return
+        wait = self.limiter.reserve(urlsplit(LOGIN_URL).netloc)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _load_saved_session(self) -> Optional[requests.Session]:
+        """Restore a session from saved cookies unless they have expired"""
+        if not os.path.exists(self.session_path):
+            logger.debug(f"No saved session found at {self.session_path}")
+            return None
+        try:
+            with open(self.session_path, 'r') as f:
+                saved = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable saved session at {self.session_path}: {e}")
+            return None
+
+        now = time.time()
+        if saved.get('expires_at') is not None and saved['expires_at'] <= now:
+            logger.info('Saved session has expired')
+            return None
+        cookies = [cookie for cookie in saved.get('cookies', [])
+                   if cookie.get('expires') is None or cookie['expires'] > now]
+        if not cookies:
+            return None
+
+        session = self._new_session()
+        for cookie in cookies:
+            session.cookies.set(cookie.pop('name'), cookie.pop('value'), **cookie)
+        logger.info(f"Reusing saved session from {self.session_path}")
         return session
-            
+
+    def _save_cookies(self, session: requests.Session) -> None:
+        """Write the session's cookies and their earliest expiry to disk"""
+        cookies = [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure
+            }
+            for cookie in session.cookies
+        ]
+        expiries = [cookie['expires'] for cookie in cookies if cookie['expires'] is not None]
+        saved = {'cookies': cookies, 'expires_at': min(expiries, default=None)}
+        try:
+            fd = os.open(self.session_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(saved, f)
+            logger.debug(f"Saved session cookies to {self.session_path}")
+        except IOError as e:
+            # A missing session file only costs a login on the next run
+            logger.warning(f"Failed to save session to {self.session_path}: {e}")
+
     def _get_credentials(self) -> dict:
-        """Get credentials from environment variables"""
+        """Get the configured credentials, falling back to environment variables"""
+        if self.credentials is not None:
+            return self.credentials
         email = os.getenv('EMAIL')
         password = os.getenv('PASSWORD')
-        
+
         if not email or not password:
             raise AuthenticationError("Missing EMAIL or PASSWORD environment variables")
-            
-        return {'email': email, 'password': password}
\ No newline at end of file
+
+        return {'email': email, 'password': password}
@@ -0,0 +1,226 @@
+"""
+Command line interface, run as `python -m podcast_pal <command>`
+
+Only argparse and logging are imported up front. Each command imports what
+it needs when it runs, so quick commands such as `cache-age` never load
+requests, pymongo or dateutil.
+"""
+import argparse
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+from .core.exceptions import PodcastPalError
+from .logging_config import configure_logging
+
+if TYPE_CHECKING:
+    from .context import SyncContext
+
+logger = logging.getLogger(__name__)
+
+# Pairs of sync options where one would silently take precedence over the other
+CONFLICTING_SYNC_OPTIONS = (
+    ('accounts', 'record'), ('accounts', 'replay'), ('accounts', 'profile'),
+    ('record', 'dry_run'), ('record', 'profile'),
+    ('replay', 'dry_run'), ('replay', 'profile'),
+    ('dry_run', 'profile')
+)
+
+def _incremental(args: argparse.Namespace) -> bool:
+    from .main import is_incremental_sync
+
+    return args.incremental if args.incremental is not None else is_incremental_sync()
+
+def cmd_sync(args: argparse.Namespace) -> int:
+    """Run one sync, or with --dry-run list what it would process"""
+    from .main import check_environment, main
+
+    if args.accounts:
+        return _sync_accounts(args)
+    if args.replay:
+        # Replayed runs never log in, so only the MongoDB settings are needed
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    else:
+        check_environment()
+    if args.record or args.replay:
+        return _sync_archive(args)
+    context = _context(args)
+    if args.dry_run:
+        return _print_plan(_incremental(args), context)
+    if args.profile is not None:
+        from .metrics import profile_call
+
+        profile_call(lambda: main(_incremental(args), context), output=args.profile or None)
+    else:
+        main(_incremental(args), context)
+    return 0
+
+def _context(args: argparse.Namespace) -> Optional['SyncContext']:
+    """Context with the concurrency given on the command line, or None for the configured defaults"""
+    if args.workers is None and args.max_per_host is None:
+        return None
+    from .context import SyncContext
+
+    return SyncContext(max_workers=args.workers, max_per_host=args.max_per_host)
+
+def _sync_accounts(args: argparse.Namespace) -> int:
+    from dotenv import load_dotenv
+    from .accounts import AccountContext, SharedResources, load_accounts, run_accounts
+
+    load_dotenv()
+    accounts = load_accounts(args.accounts)
+    if args.dry_run:
+        shared = SharedResources()
+        try:
+            for account in accounts:
+                print(f"[{account.name}]")
+                _print_plan(_incremental(args), AccountContext(account, shared))
+        finally:
+            shared.close()
+        return 0
+    results = run_accounts(accounts, _incremental(args), max_workers=args.workers, max_per_host=args.max_per_host)
+    return 1 if any(result is None for result in results.values()) else 0
+
+def _sync_archive(args: argparse.Namespace) -> int:
+    import os
+    import tempfile
+    from .auth.session import SessionManager
+    from .context import SyncContext
+    from .fetchers.archive import open_archive_adapter
+    from .main import main
+    from .processor import get_max_workers
+
+    max_workers = args.workers or get_max_workers()
+    adapter, archive = open_archive_adapter(args.record, args.replay, args.replay_latency, pool_size=max_workers)
+    # Only reached with --record or --replay, which always open an archive
+    assert archive is not None
+    # Placeholder credentials for replay: the archived login answers any request
+    credentials = {'email': 'replay', 'password': 'replay'} if args.replay else None
+    with tempfile.TemporaryDirectory() as state_dir:
+        # A fresh session and empty local caches send every request to the archive
+        session_manager = SessionManager(os.path.join(state_dir, 'session.json'), credentials, adapter=adapter)
+        context = SyncContext(session_manager, max_workers, args.max_per_host,
+                              state_dir=state_dir, adapter=adapter,
+                              as_of=archive.recorded_at if args.replay else None)
+        try:
+            main(_incremental(args), context)
+        finally:
+            context.close()
+            if args.record:
+                archive.save(args.record)
+    return 0
+
+def _print_plan(incremental: bool, context: Optional['SyncContext'] = None) -> int:
+    from .context import SyncContext
+    from .main import plan_sync
+
+    raw_podcasts = plan_sync(context or SyncContext(), incremental)
+    for raw_podcast in raw_podcasts:
+        print(f"{len(raw_podcast):5d}  {raw_podcast.attrib['title']}")
+    print(f"{sum(len(raw_podcast) for raw_podcast in raw_podcasts)} episodes in {len(raw_podcasts)} podcasts to process")
+    return 0
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    """Sync repeatedly in one long-running process"""
+    from .daemon import main
+
+    main(interval=args.interval, jitter=args.jitter)
+    return 0
+
+def cmd_cache_age(args: argparse.Namespace) -> int:
+    """Print the age of the cached OPML export; exit status 1 when it is missing or expired"""
+    from .storage.cache import CACHE_PATH, get_cache_age
+
+    age = get_cache_age()
+    if age is None:
+        print(f"No cached export at {CACHE_PATH}")
+        return 1
+    print(f"{age['hours']}h {age['minutes']}m{' (expired)' if age['is_expired'] else ''}")
+    return 1 if age['is_expired'] else 0
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    """Move embedded episodes to per-episode documents"""
+    from .storage.migrate import main
+
+    main()
+    return 0
+
+def cmd_ensure_indexes(args: argparse.Namespace) -> int:
+    """Create the MongoDB indexes for the configured layout"""
+    from dotenv import load_dotenv
+    from .storage.mongodb import get_mongodb_collection
+
+    load_dotenv()
+    get_mongodb_collection(create_indexes=True)
+    return 0
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='podcast_pal', description='Sync Overcast listening history to MongoDB')
+    parser.add_argument('--log-level', default='INFO', help='Logging level (default: INFO)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sync = commands.add_parser('sync', help=cmd_sync.__doc__)
+    mode = sync.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', action='store_true', default=None,
+                      help='Process only changes since the last run (default: INCREMENTAL_SYNC)')
+    mode.add_argument('--full', dest='incremental', action='store_false', help='Process the whole export')
+    sync.add_argument('--dry-run', action='store_true', help='List what would be processed without writing')
+    sync.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                      help='Run under cProfile, optionally saving raw stats to PATH')
+    sync.add_argument('--workers', type=_positive_int, metavar='N',
+                      help='Episode page fetch threads (default: SYNC_WORKERS or 8)')
+    sync.add_argument('--max-per-host', type=_positive_int, metavar='N',
+                      help='Concurrent requests per host (default: SYNC_REQUESTS_PER_HOST or 4)')
+    sync.add_argument('--accounts', metavar='PATH',
+                      help='Sync every account listed in this JSON file concurrently')
+    archive = sync.add_mutually_exclusive_group()
+    archive.add_argument('--record', metavar='PATH', help='Save all Overcast traffic of the run to an archive')
+    archive.add_argument('--replay', metavar='PATH', help='Answer all Overcast requests from an archive, offline')
+    sync.add_argument('--replay-latency', type=float, default=0.0, metavar='SECONDS',
+                      help='Simulated delay of each replayed response (default: 0)')
+    sync.set_defaults(handler=cmd_sync)
+
+    watch = commands.add_parser('watch', help=cmd_watch.__doc__)
+    watch.add_argument('--interval', type=float, help='Seconds between cycles (default: WATCH_INTERVAL_SECONDS)')
+    watch.add_argument('--jitter', type=float, help='Relative jitter of the interval (default: WATCH_JITTER)')
+    watch.set_defaults(handler=cmd_watch)
+
+    commands.add_parser('cache-age', help=cmd_cache_age.__doc__).set_defaults(handler=cmd_cache_age)
+    commands.add_parser('migrate', help=cmd_migrate.__doc__).set_defaults(handler=cmd_migrate)
+    commands.add_parser('ensure-indexes', help=cmd_ensure_indexes.__doc__).set_defaults(handler=cmd_ensure_indexes)
+    return parser
+
+def check_sync_options(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Exit with a usage error for sync options that cannot be combined"""
+    for first, second in CONFLICTING_SYNC_OPTIONS:
+        if _is_set(args, first) and _is_set(args, second):
+            parser.error(f"{_option(first)} cannot be combined with {_option(second)}")
+    if args.replay_latency and not args.replay:
+        parser.error('--replay-latency requires --replay')
+
+def _is_set(args: argparse.Namespace, name: str) -> bool:
+    # --profile without a path is set to ''
+    return getattr(args, name) not in (None, False)
+
+def _option(name: str) -> str:
+    return '--' + name.replace('_', '-')
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Parse the command line, configure logging and run the chosen command"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'sync':
+        check_sync_options(parser, args)
+    configure_logging(args.log_level)
+    try:
+        return args.handler(args)
+    except PodcastPalError as e:
+        logger.error(f"Application error: {str(e)}")
+        return 1
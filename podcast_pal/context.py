@@ -0,0 +1,138 @@
+"""Resources shared by the stages of a sync run"""
+import logging
+import os
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from requests.adapters import BaseAdapter
+
+from .auth.session import SessionManager
+from .fetchers.transport import Transport, TransportStats, REQUESTS_PER_SECOND_PER_HOST
+from .processor import get_artwork_ttl_days, get_max_requests_per_host, get_max_workers
+
+if TYPE_CHECKING:
+    from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+class SyncContext:
+    """
+    Lazily created resources for a sync run.
+
+    The authenticated transport and the MongoDB collection are only built on
+    first use, so runs that are served entirely from cache never log in to
+    Overcast or connect to MongoDB. A context can be reused across runs to
+    keep both warm.
+
+    Fetch concurrency defaults to SYNC_WORKERS threads and
+    SYNC_REQUESTS_PER_HOST requests per host, and stored artwork is reused
+    for ARTWORK_TTL_DAYS (see processor).
+
+    Local state (OPML cache, sync state, journal and page cache) lives at the
+    shared default paths, or in `state_dir` when one is given. An `adapter`
+    replaces the transport's own connection pool, and `as_of` evaluates
+    episode recency at a fixed time instead of now, e.g. to replay an
+    archived run (see fetchers.archive). With `revalidate_opml` every run
+    asks Overcast for the export instead of trusting a cached copy younger
+    than CACHE_MAX_AGE_HOURS; an unchanged export then costs a 304.
+    """
+
+    def __init__(self, session_manager: Optional[SessionManager] = None,
+                 max_workers: Optional[int] = None,
+                 max_per_host: Optional[int] = None,
+                 rate_per_host: float = REQUESTS_PER_SECOND_PER_HOST,
+                 state_dir: Optional[str] = None,
+                 adapter: Optional[BaseAdapter] = None,
+                 as_of: Optional[datetime] = None,
+                 revalidate_opml: bool = False):
+        self.session_manager = session_manager or SessionManager()
+        self.max_workers = max_workers if max_workers is not None else get_max_workers()
+        self.max_per_host = max_per_host if max_per_host is not None else get_max_requests_per_host()
+        self.rate_per_host = rate_per_host
+        self.artwork_ttl_days = get_artwork_ttl_days()
+        self.state_dir = state_dir
+        self.adapter = adapter
+        self.as_of = as_of
+        self.revalidate_opml = revalidate_opml
+        self._transport: Optional[Transport] = None
+        self._collection: Optional['Collection'] = None
+
+    @property
+    def transport(self) -> Transport:
+        """Authenticated session wrapped in a pool sized to the configured concurrency"""
+        if self._transport is None:
+            self._transport = self._build_transport()
+        return self._transport
+
+    @property
+    def collection(self) -> 'Collection':
+        """MongoDB collection, connected and indexed on first use"""
+        if self._collection is None:
+            self._collection = self._connect_collection()
+        return self._collection
+
+    @property
+    def opml_cache_path(self) -> Optional[str]:
+        """Where the OPML export and its snapshot and episode states are cached"""
+        return self._local_path('overcast.opml')
+
+    @property
+    def state_path(self) -> Optional[str]:
+        """Where high-water marks are saved between incremental runs"""
+        return self._local_path('state.json')
+
+    @property
+    def journal_path(self) -> Optional[str]:
+        """Where the progress journal of an interrupted run is kept"""
+        return self._local_path('journal.sqlite')
+
+    @property
+    def page_cache_path(self) -> Optional[str]:
+        """Where episode page responses are cached"""
+        return self._local_path('pages.sqlite')
+
+    @property
+    def transport_stats(self) -> TransportStats:
+        """Counters of the transport, all zero while it has not been built"""
+        return self._transport.stats if self._transport is not None else TransportStats()
+
+    def log_transport_stats(self) -> None:
+        """Log retry and throttling counters if any request was made"""
+        if self._transport is not None:
+            stats = self._transport.stats
+            logger.info(
+                f"HTTP: {stats.requests} requests, {stats.retries} retries, "
+                f"{stats.throttle_waits} throttle waits ({stats.throttle_wait_seconds:.1f}s)"
+            )
+
+    def reset_transport_stats(self) -> None:
+        """Start counting transport work from zero, e.g. at the start of a new cycle"""
+        if self._transport is not None:
+            self._transport.stats = TransportStats()
+
+    def close(self) -> None:
+        """Close the HTTP session and the MongoDB client if they were opened"""
+        if self._transport is not None:
+            self._transport.session.close()
+            self._transport = None
+        if self._collection is not None:
+            self._collection.database.client.close()
+            self._collection = None
+
+    def _local_path(self, name: str) -> Optional[str]:
+        # None lets each store fall back to its shared default path
+        return os.path.join(self.state_dir, name) if self.state_dir else None
+
+    def _build_transport(self) -> Transport:
+        return Transport(
+            self.session_manager.get_session(),
+            max_per_host=self.max_per_host,
+            pool_size=self.max_workers,
+            rate_per_host=self.rate_per_host,
+            adapter=self.adapter
+        )
+
+    def _connect_collection(self) -> 'Collection':
+        # Imported here so runs that never reach MongoDB do not load pymongo
+        from .storage.mongodb import get_mongodb_collection
+
+        return get_mongodb_collection()
@@ -14,4 +14,8 @@ class AuthenticationError(PodcastPalError):
 
 class StorageError(PodcastPalError):
     """Raised when storage operations fail"""
-    pass 
\ No newline at end of file
+    pass 
+
+class ConfigurationError(PodcastPalError):
+    """Raised when configuration is missing or invalid"""
+    pass
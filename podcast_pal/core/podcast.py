@@ -1,16 +1,16 @@
 """
 Core data models for podcasts and episodes
 """
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import List, Optional, TypeAlias
+from typing import Any, Dict, List, Optional, TypeAlias
 from xml.etree.ElementTree import Element
 import html
 
 # Type alias for raw XML podcast data
 RawPodcastData: TypeAlias = Element
 
-@dataclass
+@dataclass(slots=True)
 class Episode:
     title: str
     audio_url: str
@@ -24,7 +24,7 @@ class Episode:
 
     @classmethod
     def from_raw_data(cls, raw_data: Element, summary: str) -> 'Episode':
-        """Create Episode instance from raw XML data"""
+        """Create Episode instance from raw XML data, unescaping the page summary once"""
         attrs = raw_data.attrib
         return cls(
             title=attrs['title'],
@@ -35,18 +35,18 @@ class Episode:
             play_progress=attrs.get('progress'),
             last_played_at=datetime.fromisoformat(attrs['userUpdatedDate']) 
                 if attrs.get('userUpdatedDate') else None,
-            summary=summary,
+            summary=html.unescape(summary),
             duration=int(attrs.get('duration', 0)) if attrs.get('duration') else None
         )
 
-    def to_dict(self):
-        # Convert the Episode to a dictionary with proper encoding
-        data = asdict(self)
-        # Decode HTML entities in the summary
-        data['summary'] = html.unescape(data['summary'])
-        return data
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow, BSON-ready dict of the episode's fields, without copying values"""
+        return {name: getattr(self, name) for name in EPISODE_FIELDS}
 
-@dataclass
+# Field names in declaration order, resolved once instead of per to_dict call
+EPISODE_FIELDS = tuple(field.name for field in fields(Episode))
+
+@dataclass(slots=True)
 class Podcast:
     title: str
     artwork_url: str
@@ -54,16 +54,25 @@ class Podcast:
     created_at: datetime
     source: str = "overcast"
     category: Optional[str] = None  # Podcast category
+    artwork_updated_at: Optional[datetime] = None  # When artwork_url was last fetched
 
     @classmethod
     def from_raw_data(cls, raw_data: RawPodcastData, 
                       episodes: List[Episode], 
-                      artwork_url: str) -> 'Podcast':
+                      artwork_url: str,
+                      artwork_updated_at: Optional[datetime] = None) -> 'Podcast':
         """Create Podcast instance from raw XML data"""
         return cls(
             title=raw_data.attrib['title'],
             artwork_url=artwork_url,
             episodes=episodes,
             created_at=datetime.now(),
-            category=raw_data.attrib.get('category')
-        ) 
\ No newline at end of file
+            category=raw_data.attrib.get('category'),
+            artwork_updated_at=artwork_updated_at
+        )
+
+@dataclass(slots=True)
+class StoredArtwork:
+    """Artwork URL already persisted for a podcast"""
+    url: str
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,130 @@
+"""
+Long-running watch mode
+
+Run with `python -m podcast_pal.daemon`. Syncs repeat every
+WATCH_INTERVAL_SECONDS (with +/- WATCH_JITTER relative jitter) in one
+process, keeping the authenticated Overcast session, its HTTP connection
+pool and the MongoDB client alive between cycles. SIGTERM and SIGINT stop
+the loop after the current cycle.
+"""
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .auth.session import SessionManager
+from .context import SyncContext
+from .core.exceptions import PodcastPalError
+from .main import check_environment, is_incremental_sync, run_sync
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL_SECONDS = 3600
+WATCH_JITTER = 0.1
+
+@dataclass
+class CycleReport:
+    """Outcome and cost of one watch cycle"""
+    cycle: int
+    seconds: float
+    updated: int = 0
+    requests: int = 0
+    failed: bool = False
+
+class Watcher:
+    """
+    Run `run_sync` repeatedly on one warm `SyncContext` until stopped.
+
+    A failing cycle is logged and the next one runs as scheduled; the
+    interval is measured from the start of each cycle. Every cycle asks
+    Overcast for the export again, conditionally, so changes made between
+    cycles are picked up even while the cached export is still fresh.
+    """
+
+    def __init__(self, context: SyncContext,
+                 interval: float = WATCH_INTERVAL_SECONDS,
+                 jitter: float = WATCH_JITTER,
+                 incremental: bool = True,
+                 sync: Callable[[SyncContext, bool], int] = run_sync):
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        if not 0 <= jitter < 1:
+            raise ValueError('jitter must be in [0, 1)')
+        self.context = context
+        self.context.revalidate_opml = True
+        self.interval = interval
+        self.jitter = jitter
+        self.incremental = incremental
+        self._sync = sync
+        self._stop = threading.Event()
+
+    def stop(self, *_) -> None:
+        """Ask the loop to exit; usable directly as a signal handler"""
+        logger.info('Stopping after the current cycle')
+        self._stop.set()
+
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """Run cycles until stopped or `max_cycles` have completed, then release resources"""
+        cycle = 0
+        try:
+            while not self._stop.is_set():
+                cycle += 1
+                started = time.monotonic()
+                self.run_cycle(cycle)
+                if max_cycles is not None and cycle >= max_cycles:
+                    break
+                delay = max(0.0, self.next_delay() - (time.monotonic() - started))
+                logger.info(f"Next cycle in {delay:.0f}s")
+                self._stop.wait(delay)
+        finally:
+            self.context.close()
+            logger.info(f"Watch mode stopped after {cycle} cycles")
+
+    def run_cycle(self, cycle: int) -> CycleReport:
+        """Run and time a single sync, logging instead of raising on failure"""
+        self.context.reset_transport_stats()
+        started = time.perf_counter()
+        report = CycleReport(cycle=cycle, seconds=0.0)
+        try:
+            report.updated = self._sync(self.context, self.incremental)
+        except PodcastPalError as e:
+            logger.error(f"Cycle {cycle} failed: {str(e)}")
+            report.failed = True
+        except Exception:
+            logger.exception(f"Cycle {cycle} failed unexpectedly")
+            report.failed = True
+        report.seconds = time.perf_counter() - started
+        report.requests = self.context.transport_stats.requests
+
+        logger.info(
+            f"Cycle {cycle} {'failed' if report.failed else 'finished'} in {report.seconds:.2f}s: "
+            f"{report.updated} podcasts updated, {report.requests} HTTP requests"
+        )
+        return report
+
+    def next_delay(self) -> float:
+        """Interval until the next cycle start, with random jitter"""
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+def main(interval: Optional[float] = None, jitter: Optional[float] = None):
+    """Watch Overcast, by default with the interval and jitter configured in the environment"""
+    check_environment()
+    watcher = Watcher(
+        SyncContext(SessionManager()),
+        interval=interval or float(os.getenv('WATCH_INTERVAL_SECONDS', WATCH_INTERVAL_SECONDS)),
+        jitter=jitter if jitter is not None else float(os.getenv('WATCH_JITTER', WATCH_JITTER)),
+        incremental=is_incremental_sync() if os.getenv('INCREMENTAL_SYNC') else True
+    )
+    signal.signal(signal.SIGTERM, watcher.stop)
+    signal.signal(signal.SIGINT, watcher.stop)
+    watcher.run()
+
+if __name__ == '__main__':
+    from .logging_config import configure_logging
+
+    configure_logging()
+    main()
@@ -0,0 +1,103 @@
+"""Diffing consecutive OPML exports into episode change sets"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .core.podcast import RawPodcastData
+from .processor import parse_activity_date
+
+logger = logging.getLogger(__name__)
+
+class EpisodeState(NamedTuple):
+    """Listening state of one episode in an export"""
+    podcast_title: str
+    played: bool
+    progress: Optional[str]
+    user_updated_date: Optional[str]
+
+@dataclass
+class ChangeSet:
+    """Episodes that changed between two exports, keyed by overcastId"""
+    added: Dict[str, EpisodeState] = field(default_factory=dict)
+    newly_played: Dict[str, EpisodeState] = field(default_factory=dict)
+    progress_changed: Dict[str, EpisodeState] = field(default_factory=dict)
+
+    @property
+    def changed_ids(self) -> Set[str]:
+        """IDs of every added, newly played or progressed episode"""
+        return set(self.added) | set(self.newly_played) | set(self.progress_changed)
+
+    def progress_updates(self) -> Dict[str, Tuple[Optional[str], Optional[datetime]]]:
+        """New progress and activity time of episodes whose progress changed"""
+        return {
+            overcast_id: (
+                state.progress,
+                parse_activity_date(state.user_updated_date) if state.user_updated_date else None
+            )
+            for overcast_id, state in self.progress_changed.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.newly_played) + len(self.progress_changed)
+
+class EpisodeStateRecorder:
+    """
+    Record the state of every episode as `iter_opml` streams past it.
+
+    Pass an instance as the `on_episode` hook of `iter_opml`; it sees all
+    episodes, including the ones the episode filter drops.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, EpisodeState] = {}
+
+    def __call__(self, podcast: RawPodcastData, episode: RawPodcastData) -> None:
+        overcast_id = episode.get('overcastId')
+        if overcast_id:
+            self.states[overcast_id] = EpisodeState(
+                podcast.get('title', ''),
+                episode.get('played', '0') == '1',
+                episode.get('progress'),
+                episode.get('userUpdatedDate')
+            )
+
+    def to_tuples(self) -> Dict[str, tuple]:
+        """Plain tuples suitable for `storage.cache.save_episode_states`"""
+        return {overcast_id: tuple(state) for overcast_id, state in self.states.items()}
+
+    def restore(self, states: Dict[str, tuple]) -> None:
+        """Record states saved with `to_tuples` instead of streaming the export"""
+        self.states.update((overcast_id, EpisodeState(*state)) for overcast_id, state in states.items())
+
+def diff_episode_states(previous: Dict[str, tuple], current: Dict[str, EpisodeState]) -> ChangeSet:
+    """Compare two exports' episode states and collect what changed in `current`"""
+    change_set = ChangeSet()
+    for overcast_id, state in current.items():
+        before = previous.get(overcast_id)
+        if before is None:
+            change_set.added[overcast_id] = state
+            continue
+        before = EpisodeState(*before)
+        if state.played and not before.played:
+            change_set.newly_played[overcast_id] = state
+        elif state.progress != before.progress:
+            change_set.progress_changed[overcast_id] = state
+
+    logger.info(
+        f"Export changes: {len(change_set.added)} added, {len(change_set.newly_played)} newly played, "
+        f"{len(change_set.progress_changed)} progress changes"
+    )
+    return change_set
+
+def apply_change_set(raw_podcasts: List[RawPodcastData], change_set: ChangeSet) -> List[RawPodcastData]:
+    """Keep only changed episodes, and only podcasts that still have any"""
+    changed_ids = change_set.changed_ids
+    changed_podcasts = []
+    for raw_podcast in raw_podcasts:
+        for episode in list(raw_podcast):
+            if episode.get('overcastId') not in changed_ids:
+                raw_podcast.remove(episode)
+        if len(raw_podcast):
+            changed_podcasts.append(raw_podcast)
+    return changed_podcasts
@@ -0,0 +1,203 @@
+"""Record and replay of Overcast HTTP traffic for offline, deterministic runs"""
+import gzip
+import http.client
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from ..core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+# Only headers the fetchers look at are kept; cookies and credentials never are
+ARCHIVED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location', 'Retry-After')
+
+@dataclass(frozen=True)
+class ArchivedResponse:
+    """One recorded response, keyed by the method and URL that produced it"""
+    method: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+
+class HttpArchive:
+    """
+    Responses recorded in order per method and URL.
+
+    Replaying a URL requested several times serves its responses in the
+    recorded order and then keeps repeating the last one. Request bodies are
+    not part of the key and are never stored, so the login POST is archived
+    without the credentials it carried.
+    """
+
+    def __init__(self, recorded_at: Optional[datetime] = None):
+        self.recorded_at = recorded_at or datetime.now(timezone.utc)
+        self._entries: Dict[Tuple[str, str], List[ArchivedResponse]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, response: ArchivedResponse) -> None:
+        """Append `response` to the archive"""
+        with self._lock:
+            self._entries.setdefault((response.method, response.url), []).append(response)
+
+    def next_response(self, method: str, url: str) -> Optional[ArchivedResponse]:
+        """Return the next recorded response for `method` and `url`, or None if there is none"""
+        key = (method, url)
+        with self._lock:
+            responses = self._entries.get(key)
+            if not responses:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+    def save(self, path: str) -> None:
+        """Write the archive to `path` as gzip-compressed JSON lines"""
+        with self._lock:
+            responses = [response for entries in self._entries.values() for response in entries]
+        try:
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({'version': ARCHIVE_VERSION, 'recorded_at': self.recorded_at.isoformat()}) + '\n')
+                for response in responses:
+                    f.write(json.dumps({
+                        'method': response.method,
+                        'url': response.url,
+                        'status': response.status_code,
+                        'headers': response.headers,
+                        # surrogateescape keeps non-UTF-8 bytes intact through JSON
+                        'body': response.body.decode('utf-8', 'surrogateescape')
+                    }) + '\n')
+        except IOError as e:
+            error_msg = f"Failed to write HTTP archive to {path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
+        logger.info(f"Saved {len(responses)} responses to HTTP archive {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'HttpArchive':
+        """Read an archive written by `save`"""
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != ARCHIVE_VERSION:
+                    raise StorageError(f"Unsupported HTTP archive version in {path}")
+                archive = cls(datetime.fromisoformat(header['recorded_at']))
+                for line in f:
+                    entry = json.loads(line)
+                    archive.record(ArchivedResponse(
+                        entry['method'], entry['url'], entry['status'], entry['headers'],
+                        entry['body'].encode('utf-8', 'surrogateescape')
+                    ))
+        except (IOError, ValueError, KeyError) as e:
+            error_msg = f"Failed to read HTTP archive {path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
+        logger.info(f"Loaded {len(archive)} responses from HTTP archive {path}")
+        return archive
+
+    def rewind(self) -> None:
+        """Serve every URL from its first recorded response again"""
+        with self._lock:
+            self._served.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(responses) for responses in self._entries.values())
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Pooled adapter that copies every response it receives into `archive`.
+
+    Bodies are read in full so they can be archived, which means streamed
+    page reads cannot stop early while recording.
+    """
+
+    def __init__(self, archive: HttpArchive, pool_size: int):
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+        self.archive = archive
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None,
+             verify: Union[bool, str] = True, cert=None, proxies=None) -> requests.Response:
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        headers = {name: response.headers[name] for name in ARCHIVED_HEADERS if name in response.headers}
+        self.archive.record(ArchivedResponse(*_request_key(request), response.status_code, headers, response.content))
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Adapter answering from `archive` without touching the network.
+
+    Each response is delayed by `latency` seconds to mimic a remote host.
+    Requests missing from the archive get a 404, which the fetchers treat
+    like any other failed page.
+    """
+
+    def __init__(self, archive: HttpArchive, latency: float = 0.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        super().__init__()
+        self.archive = archive
+        self.latency = latency
+        self.misses = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None,
+             verify: Union[bool, str] = True, cert=None, proxies=None) -> requests.Response:
+        if self.latency > 0:
+            self._sleep(self.latency)
+        method, url = _request_key(request)
+        archived = self.archive.next_response(method, url)
+        if archived is None:
+            with self._lock:
+                self.misses += 1
+            logger.warning(f"No archived response for {method} {url}")
+            archived = ArchivedResponse(method, url, 404, {}, b'')
+        return _build_response(request, archived)
+
+    def close(self) -> None:
+        pass
+
+def _request_key(request: requests.PreparedRequest) -> Tuple[str, str]:
+    return request.method or 'GET', request.url or ''
+
+def _build_response(request: requests.PreparedRequest, archived: ArchivedResponse) -> requests.Response:
+    response = requests.Response()
+    response.status_code = archived.status_code
+    response.headers = CaseInsensitiveDict(archived.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = archived.url
+    response.request = request
+    response.reason = http.client.responses.get(archived.status_code, '')
+    # The body is already complete, so streamed reads are served from memory
+    response._content = archived.body
+    response._content_consumed = True
+    return response
+
+def open_archive_adapter(record: Optional[str] = None, replay: Optional[str] = None,
+                         latency: float = 0.0, pool_size: int = 1) -> Tuple[Optional[BaseAdapter], Optional[HttpArchive]]:
+    """
+    Build the adapter for a recording or replaying run.
+
+    Returns:
+        Tuple[Optional[BaseAdapter], Optional[HttpArchive]]: The adapter and its archive,
+        or (None, None) when neither `record` nor `replay` is set
+    """
+    if record and replay:
+        raise ValueError('Cannot record and replay in the same run')
+    if replay:
+        archive = HttpArchive.load(replay)
+        return ReplayAdapter(archive, latency), archive
+    if record:
+        archive = HttpArchive()
+        return RecordingAdapter(archive, pool_size), archive
+    return None, None
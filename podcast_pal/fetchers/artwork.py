@@ -1,31 +1,22 @@
 """Artwork URL fetching functionality"""
-import re
 import logging
 from typing import Optional
 import requests
-from ..core.exceptions import FetchError
+from .page import PageMetadataCache, get_page_metadata
 
 logger = logging.getLogger(__name__)
 
-def get_artwork_url(overcast_url: str, session: requests.Session) -> str:
+ARTWORK_FIELDS = frozenset({'artwork_url'})
+
+def get_artwork_url(overcast_url: str, session: requests.Session,
+                    page_cache: Optional[PageMetadataCache] = None) -> str:
     """Fetch the episode artwork URL from Overcast page"""
-    content = _fetch_page_content(overcast_url, session)
-    if not content:
+    metadata = get_page_metadata(overcast_url, session, page_cache, fields=ARTWORK_FIELDS)
+    if metadata is None:
         return ''
-        
-    artwork_pattern = 'img class="art fullart" src="(.*)"'
-    matches = re.findall(artwork_pattern, content)
-    
-    if matches:
-        return matches[0]
-        
+
+    if metadata.artwork_url:
+        return metadata.artwork_url
+
     logger.warning(f"Could not find artwork URL for {overcast_url}")
     return ''
-
-def _fetch_page_content(url: str, session: requests.Session) -> Optional[str]:
-    """Helper function to fetch page content"""
-    try:
-        return session.get(url).text
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch page content from {url}: {str(e)}")
-        return None 
\ No newline at end of file
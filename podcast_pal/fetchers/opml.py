@@ -2,32 +2,60 @@
 import logging
 import requests
 from xml.etree import ElementTree
-from typing import List, Optional
+from xml.etree.ElementTree import Element
+from typing import Callable, Iterator, List, Optional, Tuple, cast
 from ..core.exceptions import FetchError
 from ..core.podcast import RawPodcastData
-from ..storage.cache import cache_opml, force_read_cache, is_cache_expired
+from ..storage.cache import (
+    cache_opml,
+    force_read_cache,
+    get_conditional_headers,
+    is_cache_expired,
+    touch_cache
+)
 
 logger = logging.getLogger(__name__)
 
 OVERCAST_OPML_URL = 'https://overcast.fm/account/export_opml/extended'
+PARSE_CHUNK_SIZE = 64 * 1024
 
-def fetch_opml(session) -> requests.Response:
-    """Fetch the latest detailed OPML export from Overcast"""
+def fetch_opml(session, cache_path: Optional[str] = None) -> requests.Response:
+    """
+    Fetch the latest detailed OPML export from Overcast.
+
+    When the cache at `cache_path` (the shared default when None) holds an
+    ETag or Last-Modified value the request is conditional, and a 304 answer
+    is served from the cached export.
+    """
     logger.info('Fetching latest OPML export from Overcast')
     try:
-        response = session.get(OVERCAST_OPML_URL)
+        headers = get_conditional_headers(cache_path)
+        response = session.get(OVERCAST_OPML_URL, headers=headers) if headers else session.get(OVERCAST_OPML_URL)
+
+        if response.status_code == 304:
+            cached_data = force_read_cache(cache_path)
+            if cached_data is not None:
+                logger.info('OPML export not modified, using cache')
+                touch_cache(cache_path)
+                return _create_mock_response(cached_data)
+            response = session.get(OVERCAST_OPML_URL)
         
         if response.status_code != 200:
-            cached_data = _handle_failed_response(response)
+            cached_data = _handle_failed_response(response, cache_path)
             return _create_mock_response(cached_data)
         
         # Cache the response immediately after successful download
-        cache_opml(response.text)
+        cache_opml(
+            response.text,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            cache_path=cache_path
+        )
         return response
         
     except requests.RequestException as e:
         logger.warning(f'Request failed: {str(e)}, attempting to use cache')
-        cached_data = force_read_cache()
+        cached_data = force_read_cache(cache_path)
         if cached_data:
             return _create_mock_response(cached_data)
         raise FetchError(f"Failed to fetch OPML: {str(e)}")
@@ -40,11 +68,63 @@ def parse_opml(content: str) -> List[RawPodcastData]:
     except ElementTree.ParseError as e:
         raise FetchError(f"Failed to parse OPML: {str(e)}")
 
-def _handle_failed_response(response: requests.Response) -> Optional[str]:
+def iter_opml(content: str,
+              episode_filter: Optional[Callable[[Element], bool]] = None,
+              on_episode: Optional[Callable[[Element, Element], None]] = None) -> Iterator[RawPodcastData]:
+    """
+    Stream podcasts from OPML content without building the whole tree.
+
+    Episodes rejected by `episode_filter` are dropped and cleared as soon as
+    they are parsed, and each podcast is detached from the tree before it is
+    yielded, so memory stays bounded by the episodes that are kept.
+
+    Args:
+        content: OPML document
+        episode_filter: Predicate deciding which episode elements to keep
+        on_episode: Hook called with (podcast, episode) for every episode, before filtering
+
+    Yields:
+        RawPodcastData: Podcast outlines with only the kept episodes attached
+    """
+    parser: 'ElementTree.XMLPullParser[Element]' = ElementTree.XMLPullParser(events=('start', 'end'))
+    stack: List[Element] = []
+    try:
+        for offset in range(0, len(content), PARSE_CHUNK_SIZE):
+            parser.feed(content[offset:offset + PARSE_CHUNK_SIZE])
+            yield from _drain_podcasts(parser, stack, episode_filter, on_episode)
+        parser.close()
+        yield from _drain_podcasts(parser, stack, episode_filter, on_episode)
+    except ElementTree.ParseError as e:
+        raise FetchError(f"Failed to parse OPML: {str(e)}")
+
+def _drain_podcasts(parser: 'ElementTree.XMLPullParser[Element]', stack: List[Element],
+                    episode_filter: Optional[Callable[[Element], bool]],
+                    on_episode: Optional[Callable[[Element, Element], None]]) -> Iterator[RawPodcastData]:
+    """Consume pending parser events, yielding every completed podcast outline"""
+    # Only start and end events are requested, so every item is an element
+    for event, elem in cast(Iterator[Tuple[str, Element]], parser.read_events()):
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if elem.get('type') == 'rss':
+            if parent is not None:
+                parent.remove(elem)
+            yield elem
+        elif parent is not None and parent.get('type') == 'rss':
+            if on_episode is not None:
+                on_episode(parent, elem)
+            if episode_filter is not None and not episode_filter(elem):
+                parent.remove(elem)
+                elem.clear()
+
+def _handle_failed_response(response: requests.Response, cache_path: Optional[str] = None) -> Optional[str]:
     """Handle failed API response and attempt to use cache"""
-    cached_data = force_read_cache()
+    cached_data = force_read_cache(cache_path)
     if cached_data:
-        if is_cache_expired():
+        if is_cache_expired(cache_path):
             logger.warning('Using expired cache due to API error')
         else:
             logger.info('Using valid cache due to API error')
@@ -0,0 +1,272 @@
+"""Episode page fetching and metadata extraction"""
+import codecs
+import re
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, FrozenSet, Optional
+import requests
+from ..auth.session import is_session_expired
+from ..metrics import metrics
+from ..storage.http_cache import ResponseCache
+from ..storage.journal import RunJournal
+
+logger = logging.getLogger(__name__)
+
+# Every pattern starts with a literal prefix and captures up to the closing quote
+ARTWORK_PREFIX = 'img class="art fullart" src="'
+DESCRIPTION_PREFIX = 'meta name="og:description" content="'
+TITLE_PREFIX = 'meta name="og:title" content="'
+ARTWORK_PATTERN = re.compile(re.escape(ARTWORK_PREFIX) + '([^"]*)"')
+DESCRIPTION_PATTERN = re.compile(re.escape(DESCRIPTION_PREFIX) + '([^"]*)"')
+TITLE_PATTERN = re.compile(re.escape(TITLE_PREFIX) + '([^"]*)"')
+
+FIELD_PATTERNS = {
+    'artwork_url': (ARTWORK_PREFIX, ARTWORK_PATTERN),
+    'description': (DESCRIPTION_PREFIX, DESCRIPTION_PATTERN),
+    'title': (TITLE_PREFIX, TITLE_PATTERN)
+}
+ALL_FIELDS = frozenset(FIELD_PATTERNS)
+STREAM_CHUNK_SIZE = 8 * 1024
+
+@dataclass(frozen=True)
+class PageMetadata:
+    """Metadata extracted from a single Overcast episode page"""
+    artwork_url: str = ''
+    description: str = ''
+    title: str = ''
+
+class PageMetadataCache:
+    """
+    Per-run memo of episode page metadata keyed by overcastUrl.
+
+    Each URL is fetched at most once, even when several threads ask for it
+    at the same time. Failed fetches are memoized as None. When a persistent
+    `response_cache` is given, page bodies are served from and stored to it,
+    and with a `journal` successfully fetched metadata survives a failed run.
+    """
+
+    def __init__(self, response_cache: Optional[ResponseCache] = None,
+                 journal: Optional[RunJournal] = None):
+        self.response_cache = response_cache
+        self.journal = journal
+        self._entries: Dict[str, Optional[PageMetadata]] = {}
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, url: str,
+                     fetch: Callable[[], Optional[PageMetadata]]) -> Optional[PageMetadata]:
+        """Return memoized metadata for `url`, calling `fetch` on the first request"""
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            with self._lock:
+                if url in self._entries:
+                    self.hits += 1
+                    return self._entries[url]
+                self.misses += 1
+            metadata = self._fetch(url, fetch)
+            with self._lock:
+                self._entries[url] = metadata
+            return metadata
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fetch(self, url: str, fetch: Callable[[], Optional[PageMetadata]]) -> Optional[PageMetadata]:
+        if self.journal is None:
+            return fetch()
+        fields = self.journal.get_page(url)
+        if fields is not None:
+            metrics.increment('journal_page_hits')
+            return PageMetadata(**fields)
+        metadata = fetch()
+        if metadata is not None:
+            self.journal.record_page(url, asdict(metadata))
+        return metadata
+
+def get_page_metadata(overcast_url: str, session: requests.Session,
+                      page_cache: Optional[PageMetadataCache] = None,
+                      fields: FrozenSet[str] = ALL_FIELDS) -> Optional[PageMetadata]:
+    """
+    Fetch an episode page and extract metadata fields in one streamed pass.
+
+    The page is downloaded only until every field in `fields` has been
+    found. With a `page_cache` all fields are extracted, since the entry is
+    shared between fetchers.
+
+    Args:
+        overcast_url: URL of the episode page
+        session: Authenticated session object
+        page_cache: Optional per-run memo shared between fetchers
+        fields: Names of the PageMetadata fields the caller needs
+
+    Returns:
+        Optional[PageMetadata]: Extracted metadata, or None if the page could not be fetched
+    """
+    if page_cache is None:
+        return _fetch_page_metadata(overcast_url, session, fields=fields)
+    return page_cache.get_or_fetch(
+        overcast_url,
+        lambda: _fetch_page_metadata(overcast_url, session, page_cache.response_cache)
+    )
+
+def extract_page_metadata(content: str) -> PageMetadata:
+    """Extract artwork, og:description and og:title from page content"""
+    return PageMetadata(**{name: _first_match(pattern, content) for name, (_, pattern) in FIELD_PATTERNS.items()})
+
+class PageScanner:
+    """
+    Incrementally search page text for metadata fields.
+
+    Text is fed chunk by chunk and kept in `content`; each field is searched
+    only from the last place a match could still start, so every character
+    is scanned about once per field.
+    """
+
+    def __init__(self, fields: FrozenSet[str] = ALL_FIELDS):
+        self.found: Dict[str, str] = {}
+        self._pending = {name: FIELD_PATTERNS[name] for name in fields}
+        self._resume = {name: 0 for name in fields}
+        self.content = ''
+
+    @property
+    def complete(self) -> bool:
+        """Whether every requested field has been found"""
+        return not self._pending
+
+    def feed(self, text: str) -> bool:
+        """Add the next chunk of text, returning whether every field has been found"""
+        self.content += text
+        content = self.content
+        for name, (prefix, pattern) in list(self._pending.items()):
+            match = pattern.search(content, self._resume[name])
+            if match:
+                self.found[name] = match.group(1)
+                del self._pending[name]
+                continue
+            # Only the last occurrence of the prefix can still grow into a match
+            last = content.rfind(prefix, self._resume[name])
+            self._resume[name] = last if last != -1 else max(0, len(content) - len(prefix) + 1)
+        return self.complete
+
+    def metadata(self) -> PageMetadata:
+        """Fields found so far, with missing ones left empty"""
+        return PageMetadata(**self.found)
+
+def read_page(response: requests.Response, fields: FrozenSet[str] = ALL_FIELDS) -> PageScanner:
+    """
+    Stream a response body into a PageScanner, closing it once all fields are found.
+
+    Args:
+        response: Response requested with stream=True
+        fields: Names of the PageMetadata fields to look for
+
+    Returns:
+        PageScanner: Scanner holding the text read and the fields found
+    """
+    scanner = PageScanner(fields)
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    bytes_read = 0
+    try:
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            bytes_read += len(chunk)
+            if scanner.feed(decoder.decode(chunk)):
+                metrics.increment('pages_closed_early')
+                break
+        else:
+            scanner.feed(decoder.decode(b'', final=True))
+    finally:
+        response.close()
+        metrics.increment('page_bytes_read', bytes_read)
+    return scanner
+
+def _fetch_page_metadata(url: str, session: requests.Session,
+                         response_cache: Optional[ResponseCache] = None,
+                         fields: FrozenSet[str] = ALL_FIELDS) -> Optional[PageMetadata]:
+    if response_cache is not None:
+        content = _fetch_cached_page_content(url, session, response_cache)
+        return extract_page_metadata(content) if content else None
+    scanner = _fetch_page(url, session, fields)
+    return scanner.metadata() if scanner is not None else None
+
+def _first_match(pattern: re.Pattern, content: str) -> str:
+    match = pattern.search(content)
+    return match.group(1) if match else ''
+
+def _fetch_page(url: str, session: requests.Session,
+                fields: FrozenSet[str] = ALL_FIELDS) -> Optional[PageScanner]:
+    """Stream a page until `fields` are found, returning None on failure"""
+    try:
+        response = session.get(url, stream=True)
+        if not _is_page_response(url, response):
+            response.close()
+            return None
+        return read_page(response, fields)
+    except requests.RequestException as e:
+        logger.error(f"Failed to fetch page content from {url}: {str(e)}")
+        return None
+
+def _is_page_response(url: str, response: requests.Response) -> bool:
+    """Check that `response` is the episode page, not an error or the Overcast login page"""
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch page content from {url}: HTTP {response.status_code}")
+        return False
+    if is_session_expired(response):
+        # Never cache or journal the login page in place of the episode
+        logger.error(f"Failed to fetch page content from {url}: session expired, got {response.url}")
+        return False
+    return True
+
+def _fetch_cached_page_content(url: str, session: requests.Session,
+                               response_cache: ResponseCache) -> Optional[str]:
+    """
+    Fetch page content through the persistent cache, revalidating stale entries.
+
+    Only the streamed head of the page, up to the last metadata field, is
+    stored; it is all a later extraction needs.
+    """
+    cached = response_cache.get(url)
+    if cached and cached.is_fresh(response_cache.fresh_hours):
+        logger.debug(f"Serving {url} from HTTP cache")
+        metrics.increment('http_cache_hits')
+        return cached.body
+
+    headers = cached.conditional_headers() if cached else {}
+    try:
+        response = session.get(url, stream=True, headers=headers) if headers else session.get(url, stream=True)
+    except requests.RequestException as e:
+        if cached:
+            logger.warning(f"Failed to revalidate {url}: {str(e)}, using cached copy")
+            return cached.body
+        logger.error(f"Failed to fetch page content from {url}: {str(e)}")
+        return None
+
+    if cached and response.status_code == 304:
+        logger.debug(f"Revalidated {url} in HTTP cache")
+        metrics.increment('http_cache_hits')
+        metrics.increment('http_cache_revalidations')
+        response.close()
+        response_cache.touch(url)
+        return cached.body
+
+    metrics.increment('http_cache_misses')
+    if not _is_page_response(url, response):
+        response.close()
+        return cached.body if cached else None
+
+    try:
+        content = read_page(response).content
+    except requests.RequestException as e:
+        logger.error(f"Failed to read page content from {url}: {str(e)}")
+        return cached.body if cached else None
+    response_cache.put(
+        url,
+        content,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified')
+    )
+    return content
@@ -1,13 +1,15 @@
 """Summary fetching functionality"""
-import re
 import logging
 import requests
 from typing import Optional
-from ..core.exceptions import FetchError
+from .page import PageMetadataCache, get_page_metadata
 
 logger = logging.getLogger(__name__)
 
-def get_episode_summary(overcast_url: str, default_title: str, session: requests.Session) -> str:
+DESCRIPTION_FIELDS = frozenset({'description'})
+
+def get_episode_summary(overcast_url: str, default_title: str, session: requests.Session,
+                        page_cache: Optional[PageMetadataCache] = None) -> str:
     """
     Fetch the episode summary from Overcast page.
     
@@ -15,26 +17,13 @@ def get_episode_summary(overcast_url: str, default_title: str, session: requests
         overcast_url: URL of the episode page
         default_title: Fallback text if summary not found
         session: Authenticated session object
+        page_cache: Optional per-run memo shared with the artwork fetcher
         
     Returns:
         str: Episode summary or default title if not found
     """
-    content = _fetch_page_content(overcast_url, session)
-    if not content:
+    metadata = get_page_metadata(overcast_url, session, page_cache, fields=DESCRIPTION_FIELDS)
+    if metadata is None:
         return default_title
-        
-    summary_pattern = 'meta name="og:description" content="(.*)"'
-    matches = re.findall(summary_pattern, content)
-    
-    if matches and matches[0]:
-        return matches[0]
-        
-    return default_title
 
-def _fetch_page_content(url: str, session: requests.Session) -> Optional[str]:
-    """Helper function to fetch page content"""
-    try:
-        return session.get(url).text
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch page content from {url}: {str(e)}")
-        return None 
\ No newline at end of file
+    return metadata.description or default_title
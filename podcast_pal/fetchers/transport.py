@@ -0,0 +1,245 @@
+"""HTTP transport helpers shared by the fetchers"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+MAX_RETRY_AFTER_SECONDS = 300.0
+REQUESTS_PER_SECOND_PER_HOST = 5.0
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class HostLimitedSession:
+    """Wrap a session so that at most `max_per_host` requests run per host at once"""
+
+    def __init__(self, session, max_per_host: int):
+        if max_per_host < 1:
+            raise ValueError('max_per_host must be at least 1')
+        self.session = session
+        self.max_per_host = max_per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs):
+        """Issue a GET request once a slot for the target host is free"""
+        with self._host_slot(url):
+            return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        """Issue a POST request once a slot for the target host is free"""
+        with self._host_slot(url):
+            return self.session.post(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        semaphore = self._get_semaphore(urlsplit(url).netloc)
+        with semaphore:
+            yield
+
+    def _get_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                logger.debug(f"Limiting {host} to {self.max_per_host} concurrent requests")
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token, returning how long the caller must wait before using it"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+class HostRateLimiter:
+    """
+    Token bucket per host, shareable between transports.
+
+    Delays are handed out in the order requests arrive, so transports
+    sharing a limiter split the rate by how many requests each has waiting
+    rather than by who asks most often.
+    """
+
+    def __init__(self, rate_per_host: float = REQUESTS_PER_SECOND_PER_HOST,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate_per_host <= 0:
+            raise ValueError('rate_per_host must be positive')
+        self.rate_per_host = rate_per_host
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str) -> float:
+        """Take a token for `host`, returning how long the caller must wait before using it"""
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_host, clock=self._clock)
+            bucket = self._buckets[host]
+        return bucket.reserve()
+
+@dataclass
+class TransportStats:
+    """Counters describing the work done by a Transport"""
+    requests: int = 0
+    retries: int = 0
+    throttle_waits: int = 0
+    throttle_wait_seconds: float = 0.0
+    bytes_received: int = 0
+
+class Transport(HostLimitedSession):
+    """
+    Pooled, rate limited and retrying transport used by all fetchers.
+
+    On top of the per-host concurrency cap, it mounts a connection pool of
+    `pool_size` connections on the wrapped session and spaces requests with
+    a token bucket per host. Connection errors and 429/5xx responses are
+    retried with exponential backoff, honoring Retry-After when present.
+
+    Passing an `adapter` and a `limiter` shares the connection pool and the
+    rate limit with other transports, e.g. one per Overcast account; the
+    adapter may also record or replay traffic (see fetchers.archive).
+    """
+
+    def __init__(self, session, max_per_host: int,
+                 pool_size: Optional[int] = None,
+                 rate_per_host: float = REQUESTS_PER_SECOND_PER_HOST,
+                 max_retries: int = MAX_RETRIES,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 sleep: Callable[[float], None] = time.sleep,
+                 adapter: Optional[BaseAdapter] = None,
+                 limiter: Optional[HostRateLimiter] = None):
+        super().__init__(session, max_per_host)
+        self.limiter = limiter or HostRateLimiter(rate_per_host)
+        self.rate_per_host = self.limiter.rate_per_host
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.stats = TransportStats()
+        self._sleep = sleep
+        self._stats_lock = threading.Lock()
+        if adapter is not None:
+            mount_adapter(session, adapter)
+        else:
+            mount_pool(session, pool_size or max_per_host)
+
+    def get(self, url: str, **kwargs):
+        """Issue a GET request with rate limiting and retries"""
+        return self._send('get', url, kwargs)
+
+    def post(self, url: str, **kwargs):
+        """Issue a POST request with rate limiting and retries"""
+        return self._send('post', url, kwargs)
+
+    def _send(self, method: str, url: str, kwargs: dict):
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            self._throttle(url)
+            self._count(requests=1)
+            try:
+                with self._host_slot(url):
+                    response = getattr(self.session, method)(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{method.upper()} {url} failed: {str(e)}, retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    if not kwargs.get('stream'):
+                        self._count(bytes_received=len(response.content))
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                response.close()
+                logger.warning(f"{method.upper()} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            attempt += 1
+            self._count(retries=1)
+            self._sleep(delay)
+
+    def _throttle(self, url: str) -> None:
+        wait = self.limiter.reserve(urlsplit(url).netloc)
+        if wait > 0:
+            self._count(throttle_waits=1, throttle_wait_seconds=wait)
+            self._sleep(wait)
+
+    def _count(self, **increments) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+def make_pool_adapter(pool_size: int) -> HTTPAdapter:
+    """Build an adapter with a blocking connection pool of `pool_size` connections per host"""
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+
+def mount_adapter(session, adapter: BaseAdapter) -> BaseAdapter:
+    """Route all of `session`'s HTTP(S) requests through `adapter`"""
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+def mount_pool(session, pool_size: int) -> HTTPAdapter:
+    """Mount a blocking connection pool of `pool_size` connections per host on `session`"""
+    adapter = make_pool_adapter(pool_size)
+    mount_adapter(session, adapter)
+    return adapter
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given zero-based retry attempt"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+def limit_per_host(session, max_per_host: int):
+    """Return `session` wrapped with a per-host limit, reusing an existing wrapper"""
+    if isinstance(session, HostLimitedSession):
+        return session
+    return HostLimitedSession(session, max_per_host)
@@ -0,0 +1,9 @@
+"""Logging setup shared by the command line entry points"""
+import logging
+import sys
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def configure_logging(level: str = 'INFO') -> None:
+    """Send log records of the given level and above to stdout"""
+    logging.basicConfig(level=level.upper(), format=LOG_FORMAT, handlers=[logging.StreamHandler(sys.stdout)])
@@ -6,61 +6,229 @@ Helps you track and analyze your Overcast listening history
 import logging
 import os
 import sys
-from typing import List
-from dotenv import load_dotenv
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-from podcast_pal.core.podcast import Podcast
+from podcast_pal.core.podcast import Podcast, RawPodcastData, StoredArtwork
 from podcast_pal.core.exceptions import PodcastPalError
 from podcast_pal.auth.session import SessionManager
-from podcast_pal.fetchers.opml import fetch_opml, parse_opml
-from podcast_pal.processor import process_podcasts
-from podcast_pal.storage.cache import load_cached_opml
-from podcast_pal.storage.mongodb import get_mongodb_collection, update_podcast
-
-# Configure more detailed logging
-logging.basicConfig(
-    level=logging.INFO,  # Changed from INFO to DEBUG to see more detailed logs
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+from podcast_pal.context import SyncContext
+from podcast_pal.diff import ChangeSet, EpisodeStateRecorder, apply_change_set, diff_episode_states
+from podcast_pal.fetchers.opml import fetch_opml, iter_opml
+from podcast_pal.metrics import metrics
+from podcast_pal.pipeline import SyncPipeline
+from podcast_pal.processor import RecentlyPlayedFilter, select_active_podcasts
+from podcast_pal.storage.cache import (
+    is_opml_processed,
+    load_cached_opml,
+    load_episode_states,
+    load_opml_snapshot,
+    load_opml_snapshot_with_states,
+    mark_opml_processed,
+    opml_content_hash,
+    save_episode_states,
+    save_opml_snapshot
 )
+from podcast_pal.storage.http_cache import ResponseCache
+from podcast_pal.storage.journal import RunJournal
+from podcast_pal.storage.state import HighWaterMarks
+
 logger = logging.getLogger(__name__)
 
-def fetch_and_parse_podcasts(session_manager) -> List[Podcast]:
-    """Fetch and parse podcast data from Overcast, using cache if available"""
-    session = session_manager.get_session()
-    cached_opml = load_cached_opml()
-    
+def load_opml(context: SyncContext) -> str:
+    """Load the OPML export, using cache if available unless the context revalidates it"""
+    cached_opml = None if context.revalidate_opml else load_cached_opml(context.opml_cache_path)
     if cached_opml:
-        raw_podcasts = parse_opml(cached_opml)
-    else:
-        response = fetch_opml(session)
-        raw_podcasts = parse_opml(response.text)
-    
-    return process_podcasts(raw_podcasts, session)
+        metrics.increment('opml_cache_hits')
+        return cached_opml
+    metrics.increment('opml_cache_misses')
+    transport = context.transport
+    with metrics.timer('opml_fetch'):
+        return fetch_opml(transport, context.opml_cache_path).text
+
+def parse_podcasts(opml: str, episode_filter: RecentlyPlayedFilter,
+                   recorder: Optional[EpisodeStateRecorder] = None,
+                   cache_path: Optional[str] = None) -> List[RawPodcastData]:
+    """
+    Parse the export, reusing its pre-parsed snapshot when one is current.
+
+    A `recorder` sees every episode, including the ones the filter drops, so
+    it is restored from the snapshot only when the snapshot was saved with
+    episode states; otherwise the export is parsed again and the snapshot
+    rewritten with them.
+    """
+    with metrics.timer('parse'):
+        content_hash = opml_content_hash(opml)
+        raw_podcasts = _load_snapshot(content_hash, episode_filter, recorder, cache_path)
+        if raw_podcasts is not None:
+            metrics.increment('opml_snapshot_hits')
+        else:
+            raw_podcasts = list(iter_opml(opml, episode_filter=episode_filter, on_episode=recorder))
+            save_opml_snapshot(raw_podcasts, content_hash, episode_filter.cutoff, cache_path,
+                               recorder.to_tuples() if recorder is not None else None)
+        metrics.increment('podcasts_parsed', len(raw_podcasts))
+    return raw_podcasts
+
+def _load_snapshot(content_hash: str, episode_filter: RecentlyPlayedFilter,
+                   recorder: Optional[EpisodeStateRecorder],
+                   cache_path: Optional[str]) -> Optional[List[RawPodcastData]]:
+    if recorder is None:
+        return load_opml_snapshot(content_hash, episode_filter.cutoff, cache_path)
+    snapshot = load_opml_snapshot_with_states(content_hash, episode_filter.cutoff, cache_path)
+    if snapshot is None:
+        return None
+    raw_podcasts, episode_states = snapshot
+    recorder.restore(episode_states)
+    return raw_podcasts
 
-def main():
-    """Main entry point for the application"""
+def select_changed_podcasts(raw_podcasts: List[RawPodcastData], recorder: EpisodeStateRecorder,
+                            cache_path: Optional[str] = None
+                            ) -> Tuple[List[RawPodcastData], Optional[ChangeSet]]:
+    """Narrow the podcasts to episodes changed since the previous export, when it is known"""
+    previous_states = load_episode_states(cache_path)
+    if previous_states is None:
+        return raw_podcasts, None
+    change_set = diff_episode_states(previous_states, recorder.states)
+    return apply_change_set(raw_podcasts, change_set), change_set
+
+def store_raw_podcasts(raw_podcasts: Iterable[RawPodcastData], context: SyncContext,
+                       store: Callable[[List[Podcast]], int],
+                       stored_artwork: Optional[Dict[str, StoredArtwork]] = None,
+                       journal: Optional[RunJournal] = None) -> int:
+    """Stream raw podcasts through page fetching into `store`, returning the number updated"""
+    transport = context.transport
+    response_cache = ResponseCache(context.page_cache_path)
     try:
-        # Initialize session
-        session_manager = SessionManager()
-        
-        # Process podcasts
-        processed_podcasts = fetch_and_parse_podcasts(session_manager)
-        collection = get_mongodb_collection()
-
-        # Save podcasts
-        updates_count = sum(
-            update_podcast(collection, podcast) 
-            for podcast in processed_podcasts
+        pipeline = SyncPipeline(transport, store,
+                                max_workers=context.max_workers,
+                                max_per_host=context.max_per_host,
+                                response_cache=response_cache,
+                                stored_artwork=stored_artwork,
+                                journal=journal,
+                                artwork_ttl_days=context.artwork_ttl_days)
+        return pipeline.run(raw_podcasts, now=context.as_of).updated
+    finally:
+        response_cache.close()
+
+def run_sync(context: SyncContext, incremental: bool = False) -> int:
+    """
+    Run one sync of the Overcast export into MongoDB
+
+    In incremental mode a run stops right away when the OPML export is
+    byte-identical to the last fully processed one. Otherwise the export is
+    diffed against the previous one by overcastId: only added, newly played
+    and progressed episodes are processed, progress changes are written in
+    place, and podcasts without listening activity newer than the last
+    successful run are skipped before any page fetch or MongoDB access.
+
+    Stage timings and counters are reported through `metrics` at the end of
+    every run, including failed ones.
+
+    Returns:
+        int: Number of podcasts inserted or updated with new episodes
+    """
+    metrics.reset()
+    try:
+        return sync_context(context, incremental)
+    finally:
+        record_transport_metrics(context)
+        metrics.report()
+
+def sync_context(context: SyncContext, incremental: bool) -> int:
+    """One sync of `context` as described in `run_sync`, without resetting or reporting metrics"""
+    # pymongo is only loaded by runs that get as far as writing
+    from podcast_pal.storage.mongodb import get_stored_artwork, update_episode_progress, update_podcasts
+
+    cache_path = context.opml_cache_path
+    opml = load_opml(context)
+    if incremental and is_opml_processed(opml, cache_path):
+        logger.info("OPML export unchanged since the last run")
+        return 0
+    recorder = EpisodeStateRecorder() if incremental else None
+    raw_podcasts = parse_podcasts(opml, RecentlyPlayedFilter(context.as_of), recorder, cache_path)
+
+    marks = HighWaterMarks(context.state_path) if incremental else None
+    change_set = None
+    if marks is not None and recorder is not None:
+        with metrics.timer('filter'):
+            raw_podcasts, change_set = select_changed_podcasts(raw_podcasts, recorder, cache_path)
+            raw_podcasts = select_active_podcasts(raw_podcasts, marks)
+        if not raw_podcasts and not (change_set and change_set.progress_changed):
+            logger.info("No new listening activity since the last run")
+            save_episode_states(recorder.to_tuples(), cache_path)
+            mark_opml_processed(opml, cache_path)
+            return 0
+
+    collection = context.collection
+    journal = RunJournal(run_id(opml, incremental), context.journal_path)
+    try:
+        # Process and save podcasts in batches as their pages arrive
+        updates_count = store_raw_podcasts(
+            raw_podcasts, context, lambda batch: update_podcasts(collection, batch),
+            get_stored_artwork(collection), journal
         )
+        context.log_transport_stats()
+        if change_set is not None:
+            update_episode_progress(collection, change_set.progress_updates())
+        _commit_run(updates_count, opml, marks, recorder, cache_path)
+        journal.compact()
+    finally:
+        journal.close()
+    return updates_count
 
-        if updates_count == 0:
-            logger.info("No podcasts were updated in this run")
-        else:
-            logger.info(f"Updated {updates_count} podcasts in this run")
-            
+def _commit_run(updates_count: int, opml: str, marks: Optional[HighWaterMarks],
+                recorder: Optional[EpisodeStateRecorder], cache_path: Optional[str] = None) -> None:
+    """Log the outcome and save incremental state once everything has been stored"""
+    if updates_count == 0:
+        logger.info("No podcasts were updated in this run")
+    else:
+        logger.info(f"Updated {updates_count} podcasts in this run")
+
+    if marks is not None and recorder is not None:
+        marks.save()
+        save_episode_states(recorder.to_tuples(), cache_path)
+        mark_opml_processed(opml, cache_path)
+
+def run_id(opml: str, incremental: bool) -> str:
+    """Identify a run by its OPML export and mode, so only a matching rerun resumes it"""
+    return f"{opml_content_hash(opml)}:{'incremental' if incremental else 'full'}"
+
+def plan_sync(context: SyncContext, incremental: bool = False) -> List[RawPodcastData]:
+    """
+    Podcasts a sync would process, with only the episodes it would process.
+
+    Nothing is fetched beyond the OPML export and no sync state is saved.
+    """
+    cache_path = context.opml_cache_path
+    opml = load_opml(context)
+    if incremental and is_opml_processed(opml, cache_path):
+        return []
+    recorder = EpisodeStateRecorder() if incremental else None
+    raw_podcasts = parse_podcasts(opml, RecentlyPlayedFilter(context.as_of), recorder, cache_path)
+    if recorder is not None:
+        raw_podcasts, _ = select_changed_podcasts(raw_podcasts, recorder, cache_path)
+        raw_podcasts = select_active_podcasts(raw_podcasts, HighWaterMarks(context.state_path))
+    return [raw_podcast for raw_podcast in raw_podcasts if len(raw_podcast)]
+
+def record_transport_metrics(context: SyncContext) -> None:
+    """Copy the transport's request, retry and byte counts into `metrics`"""
+    stats = context.transport_stats
+    metrics.increment('http_requests', stats.requests)
+    metrics.increment('http_retries', stats.retries)
+    metrics.increment('http_bytes_received', stats.bytes_received)
+    metrics.increment('http_throttle_wait_seconds', stats.throttle_wait_seconds)
+
+def is_incremental_sync() -> bool:
+    """Check if INCREMENTAL_SYNC enables incremental runs"""
+    return os.getenv('INCREMENTAL_SYNC', '').lower() in ('1', 'true', 'yes')
+
+def main(incremental: Optional[bool] = None, context: Optional[SyncContext] = None):
+    """Main entry point for the application, see `run_sync` for INCREMENTAL_SYNC"""
+    if incremental is None:
+        incremental = is_incremental_sync()
+
+    try:
+        # Initialize session
+        run_sync(context or SyncContext(SessionManager()), incremental)
     except PodcastPalError as e:
         logger.error(f"Application error: {str(e)}")
         sys.exit(1)
@@ -70,6 +238,8 @@ def main():
 
 def check_environment():
     """Check if all required environment variables are set"""
+    from dotenv import load_dotenv
+
     load_dotenv()
     required_vars = [
         'EMAIL', 'PASSWORD', 'PODCAST_DB', 
@@ -83,5 +253,7 @@ def check_environment():
         sys.exit(1)
 
 if __name__ == '__main__':
-    check_environment()
-    main()
\ No newline at end of file
+    # Kept for existing cron jobs; same as `python -m podcast_pal sync`
+    from podcast_pal.cli import main as cli_main
+
+    sys.exit(cli_main(['sync', *sys.argv[1:]]))
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""Per-run stage timings and counters"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = 'podcast_pal'
+PROFILE_TOP_FUNCTIONS = 30
+
+class Metrics:
+    """
+    Thread-safe wall times per stage and named counters for one run.
+
+    Stage timers accumulate, so a stage entered several times (or from
+    several threads) reports its total time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded so far, e.g. at the start of a run"""
+        with self._lock:
+            self.stages: Dict[str, float] = {}
+            self.counters: Dict[str, float] = {}
+            self._started = time.perf_counter()
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Add the wall time spent in the block to `stage`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add `value` to counter `name`"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def ratio(self, hits: str, misses: str) -> Optional[float]:
+        """Share of `hits` among hits and misses, or None when neither was counted"""
+        with self._lock:
+            total = self.counters.get(hits, 0) + self.counters.get(misses, 0)
+            return self.counters.get(hits, 0) / total if total else None
+
+    def summary(self) -> dict:
+        """Stage timings, counters and cache hit ratios as a JSON-ready dict"""
+        ratios = {
+            'opml_cache': self.ratio('opml_cache_hits', 'opml_cache_misses'),
+            'page_memo': self.ratio('page_memo_hits', 'page_memo_misses'),
+            'http_cache': self.ratio('http_cache_hits', 'http_cache_misses')
+        }
+        with self._lock:
+            return {
+                'total_seconds': round(time.perf_counter() - self._started, 6),
+                'stages': {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+                'counters': dict(self.counters),
+                'hit_ratios': {name: round(value, 4) for name, value in ratios.items() if value is not None}
+            }
+
+    def to_prometheus(self, prefix: str = METRICS_PREFIX) -> str:
+        """Render the summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = [
+            f"# TYPE {prefix}_run_seconds gauge",
+            f"{prefix}_run_seconds {summary['total_seconds']}",
+            f"# TYPE {prefix}_stage_seconds gauge"
+        ]
+        lines += [f'{prefix}_stage_seconds{{stage="{stage}"}} {seconds}'
+                  for stage, seconds in sorted(summary['stages'].items())]
+        for name, value in sorted(summary['counters'].items()):
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        lines.append(f"# TYPE {prefix}_cache_hit_ratio gauge")
+        lines += [f'{prefix}_cache_hit_ratio{{cache="{cache}"}} {ratio}'
+                  for cache, ratio in sorted(summary['hit_ratios'].items())]
+        return '\n'.join(lines) + '\n'
+
+    def report(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> dict:
+        """
+        Log the summary as JSON and write it to the configured files.
+
+        Args:
+            json_path: JSON summary file, defaults to METRICS_PATH
+            prometheus_path: Prometheus textfile, defaults to METRICS_PROMETHEUS_PATH
+
+        Returns:
+            dict: The summary that was reported
+        """
+        summary = self.summary()
+        logger.info(f"Run metrics: {json.dumps(summary, sort_keys=True)}")
+        json_path = json_path or os.getenv('METRICS_PATH')
+        prometheus_path = prometheus_path or os.getenv('METRICS_PROMETHEUS_PATH')
+        if json_path:
+            _write_atomic(json_path, json.dumps(summary, indent=2, sort_keys=True))
+        if prometheus_path:
+            # Written atomically so the node_exporter textfile collector never reads a partial file
+            _write_atomic(prometheus_path, self.to_prometheus())
+        return summary
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        logger.debug(f"Wrote metrics to {path}")
+    except IOError as e:
+        logger.warning(f"Failed to write metrics to {path}: {e}")
+
+def profile_call(fn: Callable[[], Any], output: Optional[str] = None,
+                 top: int = PROFILE_TOP_FUNCTIONS) -> Any:
+    """
+    Run `fn` under cProfile and log its most expensive functions.
+
+    Args:
+        fn: Callable to profile
+        output: Optional path for the raw stats, readable with pstats or snakeviz
+        top: Number of functions to log, by cumulative time
+
+    Returns:
+        Any: Whatever `fn` returns
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        if output:
+            profiler.dump_stats(output)
+            logger.info(f"Wrote profile to {output}")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+        logger.info(f"Profile by cumulative time:\n{stream.getvalue()}")
+
+# Shared by all modules of a run; main resets it at the start of each run
+metrics = Metrics()
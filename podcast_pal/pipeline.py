@@ -0,0 +1,225 @@
+"""Streaming sync pipeline from parsed podcasts to MongoDB"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .core.podcast import Podcast, RawPodcastData, StoredArtwork
+from .fetchers.page import PageMetadataCache
+from .fetchers.transport import limit_per_host
+from .metrics import metrics
+from .processor import ARTWORK_TTL_DAYS, MAX_REQUESTS_PER_HOST, MAX_WORKERS, WARSAW_TZ, process_podcast
+from .storage.http_cache import ResponseCache
+from .storage.journal import RunJournal
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = 32
+WRITE_BATCH_SIZE = 50
+WRITE_FLUSH_SECONDS = 5.0
+# How often blocked stages wake up to check whether the pipeline was stopped
+POLL_SECONDS = 0.1
+
+_DONE = object()
+
+@dataclass
+class PipelineResult:
+    """What a pipeline run processed and wrote"""
+    processed: int = 0
+    updated: int = 0
+    batches: int = 0
+    first_write_seconds: Optional[float] = None
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed"""
+
+class SyncPipeline:
+    """
+    Process and store podcasts as they stream in, instead of all at once.
+
+    A feeder thread puts raw podcasts on a bounded fetch queue,
+    `max_workers` threads turn them into Podcasts (fetching episode pages)
+    and put them on a bounded store queue, and the
+    calling thread writes them with `store` in batches of `batch_size`, or
+    sooner once the oldest pending podcast has waited `flush_seconds`.
+    From fetching onward memory is bounded by the queue depths and batch
+    size, and the first batch is written while later pages are still being
+    fetched. The `page_fetch` stage times the workers; writes are timed by
+    `store`.
+
+    The first failure in any stage stops the others and is re-raised by
+    `run`; batches written before it stay written. With a `journal`, each
+    stored batch is recorded in it and podcasts it already holds are
+    skipped, so a rerun after a failure picks up where this one stopped.
+    """
+
+    def __init__(self, session, store: Callable[[List[Podcast]], int],
+                 max_workers: int = MAX_WORKERS,
+                 max_per_host: int = MAX_REQUESTS_PER_HOST,
+                 queue_depth: int = QUEUE_DEPTH,
+                 batch_size: int = WRITE_BATCH_SIZE,
+                 flush_seconds: float = WRITE_FLUSH_SECONDS,
+                 response_cache: Optional[ResponseCache] = None,
+                 stored_artwork: Optional[Dict[str, StoredArtwork]] = None,
+                 journal: Optional[RunJournal] = None,
+                 artwork_ttl_days: int = ARTWORK_TTL_DAYS):
+        if max_workers < 1 or queue_depth < 1 or batch_size < 1:
+            raise ValueError('max_workers, queue_depth and batch_size must be at least 1')
+        self.session = limit_per_host(session, max_per_host)
+        self.store = store
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.stored_artwork = stored_artwork or {}
+        self.journal = journal
+        self.artwork_ttl_days = artwork_ttl_days
+        self.page_cache = PageMetadataCache(response_cache, journal)
+        self._fetch_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self._store_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, raw_podcasts: Iterable[RawPodcastData], now: Optional[datetime] = None) -> PipelineResult:
+        """Push `raw_podcasts` through the pipeline and return once everything is stored"""
+        now = now or datetime.now(WARSAW_TZ)
+        threads = [threading.Thread(target=self._feed, args=(raw_podcasts,), name='pipeline-feed', daemon=True)]
+        threads += [
+            threading.Thread(target=self._work, args=(now,), name=f'pipeline-fetch-{index}', daemon=True)
+            for index in range(self.max_workers)
+        ]
+        for thread in threads:
+            thread.start()
+        result: Optional[PipelineResult] = None
+        try:
+            result = self._write()
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for thread in threads:
+                thread.join()
+            metrics.increment('page_memo_hits', self.page_cache.hits)
+            metrics.increment('page_memo_misses', self.page_cache.misses)
+
+        if self._errors:
+            raise self._errors[0]
+        # The writer only stops without a result when another stage failed
+        assert result is not None
+        logger.info(f"Pipeline stored {result.processed} podcasts in {result.batches} batches")
+        return result
+
+    def _feed(self, raw_podcasts: Iterable[RawPodcastData]) -> None:
+        try:
+            for raw_podcast in raw_podcasts:
+                if self.journal is not None and self.journal.is_completed(raw_podcast.attrib['title']):
+                    metrics.increment('journal_podcasts_skipped')
+                    continue
+                self._put(self._fetch_queue, raw_podcast)
+        except _Stopped:
+            return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # One end marker per worker, so each of them exits
+            for _ in range(self.max_workers):
+                self._put_quietly(self._fetch_queue, _DONE)
+
+    def _work(self, now: datetime) -> None:
+        try:
+            while True:
+                raw_podcast = self._get(self._fetch_queue)
+                if raw_podcast is _DONE:
+                    break
+                # Summed over the workers, so this is fetch time across threads, not wall time
+                with metrics.timer('page_fetch'):
+                    podcast = process_podcast(
+                        raw_podcast, now, self.session, page_cache=self.page_cache,
+                        stored_artwork=self.stored_artwork.get(raw_podcast.attrib['title']),
+                        artwork_ttl_days=self.artwork_ttl_days
+                    )
+                self._put(self._store_queue, podcast)
+        except _Stopped:
+            return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put_quietly(self._store_queue, _DONE)
+
+    def _write(self) -> PipelineResult:
+        result = PipelineResult()
+        started = time.monotonic()
+        batch: List[Podcast] = []
+        batch_started = 0.0
+        workers_done = 0
+        while workers_done < self.max_workers:
+            timeout = None
+            if batch:
+                timeout = max(0.0, batch_started + self.flush_seconds - time.monotonic())
+            try:
+                item = self._get(self._store_queue, timeout)
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                workers_done += 1
+            elif item is not None:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or item is None):
+                self._flush(batch, result, started)
+                batch = []
+        if batch:
+            self._flush(batch, result, started)
+        return result
+
+    def _flush(self, batch: List[Podcast], result: PipelineResult, started: float) -> None:
+        result.updated += self.store(batch)
+        if self.journal is not None:
+            self.journal.complete_podcasts(podcast.title for podcast in batch)
+        result.processed += len(batch)
+        result.batches += 1
+        metrics.increment('write_batches')
+        if result.first_write_seconds is None:
+            result.first_write_seconds = time.monotonic() - started
+            metrics.increment('first_write_seconds', result.first_write_seconds)
+            logger.info(f"First batch of {len(batch)} podcasts stored after {result.first_write_seconds:.1f}s")
+
+    def _fail(self, error: BaseException) -> None:
+        if not self._errors:
+            logger.error(f"Pipeline stopped: {str(error)}")
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, target: queue.Queue, item) -> None:
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                target.put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _put_quietly(self, target: queue.Queue, item) -> None:
+        try:
+            self._put(target, item)
+        except _Stopped:
+            pass
+
+    def _get(self, source: queue.Queue, timeout: Optional[float] = None):
+        """Get the next item, raising queue.Empty after `timeout` and _Stopped once stopped"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            wait = POLL_SECONDS if deadline is None else min(POLL_SECONDS, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty()
+            try:
+                return source.get(timeout=wait)
+            except queue.Empty:
+                continue
@@ -1,69 +1,232 @@
 """Core podcast processing functionality"""
 import logging
-from datetime import datetime
-from typing import List
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
 from dateutil.tz import gettz
 from dateutil.parser import parse as parse_dt
 
-from .core.podcast import Podcast, Episode, RawPodcastData
+from .core.exceptions import ConfigurationError
+from .core.podcast import Podcast, Episode, RawPodcastData, StoredArtwork
 from .fetchers.artwork import get_artwork_url
+from .fetchers.page import PageMetadataCache
 from .fetchers.summary import get_episode_summary
+from .fetchers.transport import limit_per_host
+from .metrics import metrics
+from .storage.http_cache import ResponseCache
+from .storage.journal import RunJournal
+from .storage.state import HighWaterMarks
 
 logger = logging.getLogger(__name__)
 
+WARSAW_TZ = gettz('Europe/Warsaw')
 DAYS_TO_KEEP = 7
+MAX_WORKERS = 8
+MAX_REQUESTS_PER_HOST = 4
+ARTWORK_TTL_DAYS = 30
 
-def process_podcasts(raw_podcasts: List[RawPodcastData], session) -> List[Podcast]:
-    """Process all podcasts to find recently played episodes"""
-    warsaw_tz = gettz('Europe/Warsaw')
-    now = datetime.now(warsaw_tz)
-    return [process_podcast(podcast, now, session) for podcast in raw_podcasts]
+def get_max_workers() -> int:
+    """Page fetch threads per sync, from SYNC_WORKERS (default MAX_WORKERS)"""
+    return _get_positive_int('SYNC_WORKERS', MAX_WORKERS)
 
-def process_podcast(raw_podcast: RawPodcastData, now: datetime, session, 
-                   days_to_keep: int = DAYS_TO_KEEP) -> Podcast:
-    """Process a single podcast and its episodes"""
-    episodes = list(raw_podcast)
-    artwork_url = get_podcast_artwork(episodes, session) if episodes else ''
-    
-    processed_episodes = [
-        process_episode(episode, session)
-        for episode in episodes
-        if should_process_episode(episode, now, days_to_keep)
+def get_artwork_ttl_days() -> int:
+    """Days stored artwork is reused before it is fetched again, from ARTWORK_TTL_DAYS"""
+    return _get_positive_int('ARTWORK_TTL_DAYS', ARTWORK_TTL_DAYS)
+
+def get_max_requests_per_host() -> int:
+    """Concurrent requests per host, from SYNC_REQUESTS_PER_HOST (default MAX_REQUESTS_PER_HOST)"""
+    return _get_positive_int('SYNC_REQUESTS_PER_HOST', MAX_REQUESTS_PER_HOST)
+
+def _get_positive_int(env_var: str, default: int) -> int:
+    value = os.getenv(env_var)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ConfigurationError(f"{env_var} must be a positive integer, got '{value}'")
+    return number
+
+def process_podcasts(raw_podcasts: Iterable[RawPodcastData], session,
+                     max_workers: int = MAX_WORKERS,
+                     max_per_host: int = MAX_REQUESTS_PER_HOST,
+                     response_cache: Optional[ResponseCache] = None,
+                     stored_artwork: Optional[Dict[str, StoredArtwork]] = None,
+                     journal: Optional[RunJournal] = None,
+                     artwork_ttl_days: int = ARTWORK_TTL_DAYS) -> List[Podcast]:
+    """
+    Process all podcasts to find recently played episodes.
+
+    Podcasts are processed on a thread pool of `max_workers` threads, with at
+    most `max_per_host` requests in flight per host. Passing max_workers=1
+    processes podcasts sequentially in the calling thread. Episode pages are
+    memoized for the whole run so each one is downloaded at most once, and
+    backed by `response_cache` across runs when one is given. Artwork already
+    in `stored_artwork` (keyed by podcast title) is reused until it is older
+    than `artwork_ttl_days`. Page metadata already in `journal` from an
+    interrupted run is reused, and newly fetched metadata is added to it.
+
+    Returns:
+        List[Podcast]: Processed podcasts in the same order as `raw_podcasts`
+    """
+    now = datetime.now(WARSAW_TZ)
+    page_cache = PageMetadataCache(response_cache, journal)
+    stored_artwork = stored_artwork or {}
+
+    def process(podcast: RawPodcastData) -> Podcast:
+        return process_podcast(podcast, now, session, page_cache=page_cache,
+                               stored_artwork=stored_artwork.get(podcast.attrib['title']),
+                               artwork_ttl_days=artwork_ttl_days)
+
+    try:
+        if max_workers <= 1:
+            return [process(podcast) for podcast in raw_podcasts]
+
+        session = limit_per_host(session, max_per_host)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='podcast') as executor:
+            # Executor.map yields results in submission order, preserving OPML order
+            return list(executor.map(process, raw_podcasts))
+    finally:
+        metrics.increment('page_memo_hits', page_cache.hits)
+        metrics.increment('page_memo_misses', page_cache.misses)
+
+def select_active_podcasts(raw_podcasts: Iterable[RawPodcastData],
+                           marks: HighWaterMarks) -> List[RawPodcastData]:
+    """
+    Keep only podcasts with listening activity newer than their high-water mark.
+
+    The latest activity of every kept podcast is staged in `marks`; it is
+    persisted once the caller calls `marks.save()` after storing results.
+    """
+    active = []
+    skipped = 0
+    for raw_podcast in raw_podcasts:
+        title = raw_podcast.attrib['title']
+        activity = latest_activity(raw_podcast)
+        if marks.has_new_activity(title, activity):
+            marks.record(title, activity)
+            active.append(raw_podcast)
+        else:
+            skipped += 1
+    logger.info(f"Skipping {skipped} podcasts without new activity, {len(active)} to process")
+    return active
+
+def latest_activity(raw_podcast: RawPodcastData) -> Optional[datetime]:
+    """Return the newest userUpdatedDate among the podcast's episodes"""
+    dates = [
+        parse_activity_date(episode.attrib['userUpdatedDate'])
+        for episode in raw_podcast
+        if episode.attrib.get('userUpdatedDate')
     ]
-    
-    return Podcast.from_raw_data(raw_podcast, processed_episodes, artwork_url)
+    return max(dates, default=None)
 
-def get_podcast_artwork(episodes: List[RawPodcastData], session) -> str:
-    """Get artwork URL for podcast from first episode"""
+def process_podcast(raw_podcast: RawPodcastData, now: datetime, session, 
+                   days_to_keep: int = DAYS_TO_KEEP,
+                   page_cache: Optional[PageMetadataCache] = None,
+                   stored_artwork: Optional[StoredArtwork] = None,
+                   artwork_ttl_days: int = ARTWORK_TTL_DAYS) -> Podcast:
+    """
+    Process a single podcast and its episodes.
+
+    Artwork is only resolved when the podcast has episodes to persist, and is
+    taken from `stored_artwork` while it is younger than `artwork_ttl_days`.
+    """
+    if page_cache is None:
+        page_cache = PageMetadataCache()
+    episodes = RecentlyPlayedFilter(now, days_to_keep).filter(raw_podcast)
+    processed_episodes = [process_episode(episode, session, page_cache) for episode in episodes]
+
+    artwork_url, artwork_updated_at = '', None
+    if episodes:
+        artwork_url, artwork_updated_at = resolve_podcast_artwork(
+            episodes, now, session, page_cache, stored_artwork, artwork_ttl_days
+        )
+
+    return Podcast.from_raw_data(raw_podcast, processed_episodes, artwork_url, artwork_updated_at)
+
+def resolve_podcast_artwork(episodes: List[RawPodcastData], now: datetime, session,
+                            page_cache: Optional[PageMetadataCache] = None,
+                            stored_artwork: Optional[StoredArtwork] = None,
+                            ttl_days: int = ARTWORK_TTL_DAYS) -> Tuple[str, Optional[datetime]]:
+    """
+    Return the artwork URL and its fetch time, reusing stored artwork younger than `ttl_days`.
+
+    Artwork stored before fetch times were recorded has none; it is kept and
+    stamped with `now`, so it ages out like freshly fetched artwork.
+    """
+    if stored_artwork and stored_artwork.url:
+        if stored_artwork.updated_at is None:
+            return stored_artwork.url, now
+        updated_at = stored_artwork.updated_at
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        if now - updated_at < timedelta(days=ttl_days):
+            return stored_artwork.url, stored_artwork.updated_at
+    return get_podcast_artwork(episodes, session, page_cache), now
+
+def get_podcast_artwork(episodes: List[RawPodcastData], session,
+                        page_cache: Optional[PageMetadataCache] = None) -> str:
+    """Get artwork URL for podcast from the first of the given episodes"""
     overcast_url = episodes[0].attrib['overcastUrl']
-    return get_artwork_url(overcast_url, session)
+    return get_artwork_url(overcast_url, session, page_cache=page_cache)
 
-def process_episode(raw_episode: RawPodcastData, session) -> Episode:
+def process_episode(raw_episode: RawPodcastData, session,
+                    page_cache: Optional[PageMetadataCache] = None) -> Episode:
     """Process a single episode and extract its details"""
     summary = get_episode_summary(
         raw_episode.attrib['overcastUrl'],
         raw_episode.attrib['title'],
-        session
+        session,
+        page_cache=page_cache
     )
     return Episode.from_raw_data(raw_episode, summary)
 
+class RecentlyPlayedFilter:
+    """
+    Episode predicate for played episodes within the last `days_to_keep` days.
+
+    The timezone and cutoff instant are resolved once, so each check is a
+    single ISO-8601 parse and comparison. Instances can be passed directly
+    as the `episode_filter` of `iter_opml`.
+    """
+
+    def __init__(self, now: Optional[datetime] = None, days_to_keep: int = DAYS_TO_KEEP):
+        if now is None:
+            now = datetime.now(WARSAW_TZ)
+        elif now.tzinfo is None:
+            now = now.replace(tzinfo=WARSAW_TZ)
+        # (now - played).days <= days_to_keep  <=>  played > now - (days_to_keep + 1) days
+        self.cutoff = now - timedelta(days=days_to_keep + 1)
+
+    def __call__(self, episode: RawPodcastData) -> bool:
+        attrs = episode.attrib
+        if attrs.get('played', '0') != '1':
+            return False
+        return parse_activity_date(attrs['userUpdatedDate']) > self.cutoff
+
+    def filter(self, episodes: Iterable[RawPodcastData]) -> List[RawPodcastData]:
+        """Return the episodes that should be processed, in one pass"""
+        cutoff = self.cutoff
+        return [
+            episode for episode in episodes
+            if episode.attrib.get('played', '0') == '1'
+            and parse_activity_date(episode.attrib['userUpdatedDate']) > cutoff
+        ]
+
+def parse_activity_date(value: str) -> datetime:
+    """Parse an OPML date, trying ISO-8601 first and assuming Warsaw time when naive"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = parse_dt(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=WARSAW_TZ)
+    return parsed
+
 def should_process_episode(episode: RawPodcastData, now: datetime, 
                          days_to_keep: int = DAYS_TO_KEEP) -> bool:
     """Check if an episode should be processed based on play status and recency"""
-    if episode.attrib.get('played', '0') != '1':
-        return False
-        
-    warsaw_tz = gettz('Europe/Warsaw')
-    # Ensure now is timezone-aware
-    if now.tzinfo is None:
-        now = now.replace(tzinfo=warsaw_tz)
-        
-    user_activity_date = parse_dt(episode.attrib['userUpdatedDate'])
-    # Ensure user_activity_date is timezone-aware
-    if user_activity_date.tzinfo is None:
-        user_activity_date = user_activity_date.replace(tzinfo=warsaw_tz)
-    else:
-        user_activity_date = user_activity_date.astimezone(warsaw_tz)
-        
-    days_since_played = (now - user_activity_date).days
-    return days_since_played <= days_to_keep 
\ No newline at end of file
+    return RecentlyPlayedFilter(now, days_to_keep)(episode)
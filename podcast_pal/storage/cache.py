@@ -1,40 +1,54 @@
 """Cache management for podcast data"""
+import io
 import os
+import json
+import pickle
+import struct
+import hashlib
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import Element, SubElement
 from ..core.exceptions import StorageError
+from ..core.podcast import RawPodcastData
 
 logger = logging.getLogger(__name__)
 
 CACHE_PATH = '/tmp/overcast.opml'
 CACHE_MAX_AGE_HOURS = 8
+SNAPSHOT_MAGIC = b'PPSNAP'
+EPISODE_STATES_MAGIC = b'PPSTAT'
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct('>6sH')
 
-def is_cache_expired() -> bool:
+def is_cache_expired(cache_path: Optional[str] = None) -> bool:
     """Check if cache file is older than max age"""
-    if not os.path.exists(CACHE_PATH):
-        logger.debug(f"Cache file not found at {CACHE_PATH}")
+    cache_path = cache_path or CACHE_PATH
+    if not os.path.exists(cache_path):
+        logger.debug(f"Cache file not found at {cache_path}")
         return True
-    file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(CACHE_PATH))
+    file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(cache_path))
     is_expired = file_age > timedelta(hours=CACHE_MAX_AGE_HOURS)
     if is_expired:
-        logger.debug(f"Cache at {CACHE_PATH} is expired (age: {file_age.total_seconds()/3600:.1f} hours)")
+        logger.debug(f"Cache at {cache_path} is expired (age: {file_age.total_seconds()/3600:.1f} hours)")
     return is_expired
 
-def force_read_cache() -> Optional[str]:
+def force_read_cache(cache_path: Optional[str] = None) -> Optional[str]:
     """Force read the cache file regardless of expiration"""
-    if not os.path.exists(CACHE_PATH):
-        logger.debug(f"Cannot force read cache: file not found at {CACHE_PATH}")
+    cache_path = cache_path or CACHE_PATH
+    if not os.path.exists(cache_path):
+        logger.debug(f"Cannot force read cache: file not found at {cache_path}")
         return None
-    return _read_cache_file()
+    return _read_cache_file(cache_path)
 
-def get_cache_age() -> Optional[dict]:
+def get_cache_age(cache_path: Optional[str] = None) -> Optional[dict]:
     """Get the age of cache file in hours and minutes"""
-    if not os.path.exists(CACHE_PATH):
-        logger.debug(f"Cannot get cache age: file not found at {CACHE_PATH}")
+    cache_path = cache_path or CACHE_PATH
+    if not os.path.exists(cache_path):
+        logger.debug(f"Cannot get cache age: file not found at {cache_path}")
         return None
         
-    file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(CACHE_PATH))
+    file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(cache_path))
     hours = file_age.total_seconds() / 3600
     
     age_info = {
@@ -43,38 +57,251 @@ def get_cache_age() -> Optional[dict]:
         'is_expired': file_age > timedelta(hours=CACHE_MAX_AGE_HOURS)
     }
     
-    logger.debug(f"Cache age at {CACHE_PATH}: {age_info['hours']}h {age_info['minutes']}m")
+    logger.debug(f"Cache age at {cache_path}: {age_info['hours']}h {age_info['minutes']}m")
     return age_info
 
-def load_cached_opml() -> Optional[str]:
+def load_cached_opml(cache_path: Optional[str] = None) -> Optional[str]:
     """Load cached OPML file if it exists and is not expired"""
-    if not os.path.exists(CACHE_PATH):
-        logger.debug(f"Cannot load cache: file not found at {CACHE_PATH}")
+    cache_path = cache_path or CACHE_PATH
+    if not os.path.exists(cache_path):
+        logger.debug(f"Cannot load cache: file not found at {cache_path}")
         return None
-    if is_cache_expired():
-        logger.debug(f"Cannot load cache: file at {CACHE_PATH} is expired")
+    if is_cache_expired(cache_path):
+        logger.debug(f"Cannot load cache: file at {cache_path} is expired")
         return None
-    logger.info(f"Loading valid cache from {CACHE_PATH}")
-    return _read_cache_file()
+    logger.info(f"Loading valid cache from {cache_path}")
+    return _read_cache_file(cache_path)
 
-def cache_opml(content: str) -> None:
-    """Cache OPML content to file"""
+def cache_opml(content: str, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, cache_path: Optional[str] = None) -> None:
+    """Cache OPML content to file, recording its hash and HTTP validators"""
+    cache_path = cache_path or CACHE_PATH
     try:
-        with open(CACHE_PATH, 'w') as f:
+        with open(cache_path, 'w') as f:
             f.write(content)
-        logger.info(f"Successfully cached OPML file to {CACHE_PATH}")
+        logger.info(f"Successfully cached OPML file to {cache_path}")
     except IOError as e:
-        error_msg = f"Failed to cache OPML to {CACHE_PATH}: {str(e)}"
+        error_msg = f"Failed to cache OPML to {cache_path}: {str(e)}"
         logger.error(error_msg)
         raise StorageError(error_msg)
 
-def _read_cache_file() -> Optional[str]:
+    meta = _read_cache_meta(cache_path)
+    content_hash = opml_content_hash(content)
+    if meta.get('sha256') != content_hash:
+        _remove_snapshot(cache_path)
+    meta.update({
+        'sha256': content_hash,
+        'etag': etag,
+        'last_modified': last_modified
+    })
+    _write_cache_meta(meta, cache_path)
+
+def touch_cache(cache_path: Optional[str] = None) -> None:
+    """Restart the cache age after Overcast confirmed the cached export is current"""
+    cache_path = cache_path or CACHE_PATH
+    if os.path.exists(cache_path):
+        os.utime(cache_path)
+        logger.debug(f"Refreshed cache age of {cache_path}")
+
+def get_conditional_headers(cache_path: Optional[str] = None) -> Dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers for the cached export"""
+    cache_path = cache_path or CACHE_PATH
+    if not os.path.exists(cache_path):
+        return {}
+    meta = _read_cache_meta(cache_path)
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+def opml_content_hash(content: str) -> str:
+    """Return the SHA-256 hex digest of OPML content"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def is_opml_processed(content: str, cache_path: Optional[str] = None) -> bool:
+    """Check if this exact export was already fully processed by a previous run"""
+    return _read_cache_meta(cache_path).get('processed_sha256') == opml_content_hash(content)
+
+def mark_opml_processed(content: str, cache_path: Optional[str] = None) -> None:
+    """Record that this export has been fully processed and stored"""
+    meta = _read_cache_meta(cache_path)
+    meta['processed_sha256'] = opml_content_hash(content)
+    _write_cache_meta(meta, cache_path)
+
+def save_opml_snapshot(raw_podcasts: List[RawPodcastData], content_hash: str,
+                       cutoff: datetime, cache_path: Optional[str] = None,
+                       episode_states: Optional[Dict[str, tuple]] = None) -> None:
+    """
+    Store pre-parsed podcasts next to the raw export.
+
+    Only the podcast and episode attributes are kept, in a versioned binary
+    file tied to the export's hash and the episode filter cutoff it was
+    built with. `episode_states` of every episode, including filtered ones,
+    can be stored alongside so incremental runs can reuse the snapshot.
+    """
+    payload = {
+        'sha256': content_hash,
+        'cutoff': cutoff.timestamp(),
+        'podcasts': [
+            (dict(podcast.attrib), [dict(episode.attrib) for episode in podcast])
+            for podcast in raw_podcasts
+        ],
+        'episode_states': episode_states
+    }
+    # The snapshot only saves parse time, so a failed write is not fatal
+    snapshot_path = _snapshot_path(cache_path)
+    if _write_binary(snapshot_path, SNAPSHOT_MAGIC, payload):
+        logger.debug(f"Saved OPML snapshot of {len(raw_podcasts)} podcasts to {snapshot_path}")
+
+def load_opml_snapshot(content_hash: str, cutoff: datetime,
+                       cache_path: Optional[str] = None) -> Optional[List[RawPodcastData]]:
+    """
+    Load pre-parsed podcasts for the export with `content_hash`.
+
+    Returns None when the snapshot is missing, from another format version
+    or export, expired together with the raw cache, or was built with a
+    later cutoff than `cutoff` and may lack episodes.
+    """
+    payload = _load_snapshot_payload(content_hash, cutoff, cache_path)
+    if payload is None:
+        return None
+    return _build_snapshot_podcasts(payload)
+
+def load_opml_snapshot_with_states(content_hash: str, cutoff: datetime, cache_path: Optional[str] = None
+                                   ) -> Optional[Tuple[List[RawPodcastData], Dict[str, tuple]]]:
+    """
+    Load pre-parsed podcasts and the episode states saved with them.
+
+    Returns None in the same cases as `load_opml_snapshot`, and when the
+    snapshot was saved without episode states.
+    """
+    payload = _load_snapshot_payload(content_hash, cutoff, cache_path)
+    if payload is None or payload.get('episode_states') is None:
+        return None
+    return _build_snapshot_podcasts(payload), payload['episode_states']
+
+def _load_snapshot_payload(content_hash: str, cutoff: datetime, cache_path: Optional[str] = None) -> Optional[dict]:
+    snapshot_path = _snapshot_path(cache_path)
+    if not os.path.exists(snapshot_path) or is_cache_expired(cache_path):
+        return None
+    payload = _read_binary(snapshot_path, SNAPSHOT_MAGIC)
+    if payload is None:
+        return None
+
+    if payload['sha256'] != content_hash or payload['cutoff'] > cutoff.timestamp():
+        logger.debug(f"OPML snapshot at {snapshot_path} does not match the current export")
+        return None
+
+    logger.info(f"Loaded pre-parsed OPML snapshot from {snapshot_path}")
+    return payload
+
+def _build_snapshot_podcasts(payload: dict) -> List[RawPodcastData]:
+    return [_build_podcast_element(attrib, episodes) for attrib, episodes in payload['podcasts']]
+
+def save_episode_states(states: Dict[str, tuple], cache_path: Optional[str] = None) -> None:
+    """
+    Store the per-episode state of the last fully processed export.
+
+    Unlike the raw cache and snapshot, episode states do not expire: they
+    are the baseline the next export is diffed against.
+    """
+    states_path = _episode_states_path(cache_path)
+    if _write_binary(states_path, EPISODE_STATES_MAGIC, {'states': states}):
+        logger.info(f"Saved state of {len(states)} episodes to {states_path}")
+
+def load_episode_states(cache_path: Optional[str] = None) -> Optional[Dict[str, tuple]]:
+    """Load the per-episode state saved by the last fully processed run"""
+    states_path = _episode_states_path(cache_path)
+    if not os.path.exists(states_path):
+        logger.debug(f"No episode states found at {states_path}")
+        return None
+    payload = _read_binary(states_path, EPISODE_STATES_MAGIC)
+    return payload['states'] if payload is not None else None
+
+def _write_binary(path: str, magic: bytes, payload: dict) -> bool:
+    """Write `payload` behind a magic/version header, returning whether it succeeded"""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_SNAPSHOT_HEADER.pack(magic, SNAPSHOT_VERSION))
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return True
+    except IOError as e:
+        logger.warning(f"Failed to write {path}: {e}")
+        return False
+
+def _read_binary(path: str, magic: bytes) -> Optional[dict]:
+    """Read a payload written by `_write_binary`, or None if it is unreadable or outdated"""
+    try:
+        with open(path, 'rb') as f:
+            file_magic, version = _SNAPSHOT_HEADER.unpack(f.read(_SNAPSHOT_HEADER.size))
+            if file_magic != magic or version != SNAPSHOT_VERSION:
+                logger.debug(f"Ignoring {path} with unsupported format")
+                return None
+            return _SnapshotUnpickler(io.BytesIO(f.read())).load()
+    except (IOError, struct.error, pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Ignoring unreadable {path}: {e}")
+        return None
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler limited to builtin containers and strings"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Unexpected type {module}.{name} in cache file")
+
+def _build_podcast_element(attrib: Dict[str, str], episodes: List[Dict[str, str]]) -> RawPodcastData:
+    podcast = Element('outline', attrib)
+    for episode_attrib in episodes:
+        SubElement(podcast, 'outline', episode_attrib)
+    return podcast
+
+def _snapshot_path(cache_path: Optional[str] = None) -> str:
+    return f"{cache_path or CACHE_PATH}.snapshot"
+
+def _episode_states_path(cache_path: Optional[str] = None) -> str:
+    return f"{cache_path or CACHE_PATH}.states"
+
+def _remove_snapshot(cache_path: Optional[str] = None) -> None:
+    snapshot_path = _snapshot_path(cache_path)
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+        logger.debug(f"Removed stale OPML snapshot at {snapshot_path}")
+
+def _cache_meta_path(cache_path: Optional[str] = None) -> str:
+    return f"{cache_path or CACHE_PATH}.meta.json"
+
+def _read_cache_meta(cache_path: Optional[str] = None) -> dict:
+    """Read cache metadata, treating a missing or corrupt file as empty"""
+    meta_path = _cache_meta_path(cache_path)
+    if not os.path.exists(meta_path):
+        return {}
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache metadata at {meta_path}: {e}")
+        return {}
+
+def _write_cache_meta(meta: dict, cache_path: Optional[str] = None) -> None:
+    meta_path = _cache_meta_path(cache_path)
+    try:
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+    except IOError as e:
+        error_msg = f"Failed to write cache metadata to {meta_path}: {str(e)}"
+        logger.error(error_msg)
+        raise StorageError(error_msg)
+
+def _read_cache_file(cache_path: str) -> Optional[str]:
     """Read and return contents of cache file"""
     try:
-        with open(CACHE_PATH, 'r') as f:
+        with open(cache_path, 'r') as f:
             content = f.read()
-            logger.debug(f"Successfully read cache file from {CACHE_PATH}")
+            logger.debug(f"Successfully read cache file from {cache_path}")
             return content
     except IOError as e:
-        logger.error(f"Error reading cached OPML from {CACHE_PATH}: {e}")
+        logger.error(f"Error reading cached OPML from {cache_path}: {e}")
         return None 
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""Persistent HTTP response cache for episode pages"""
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from ..core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_PATH = '/tmp/overcast_pages.sqlite'
+HTTP_CACHE_MAX_ENTRIES = 5000
+HTTP_CACHE_FRESH_HOURS = 24 * 7
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+'''
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A cached response body with its validators"""
+    url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def is_fresh(self, max_age_hours: float = HTTP_CACHE_FRESH_HOURS) -> bool:
+        """Check if the entry can be served without revalidation"""
+        return time.time() - self.stored_at < max_age_hours * 3600
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    SQLite-backed response cache bounded to `max_entries` with LRU eviction.
+
+    Entries younger than `fresh_hours` are served directly; older entries are
+    revalidated with conditional requests by the page fetcher.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+                 fresh_hours: float = HTTP_CACHE_FRESH_HOURS):
+        self.path = path or HTTP_CACHE_PATH
+        self.max_entries = max_entries
+        self.fresh_hours = fresh_hours
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            error_msg = f"Failed to open HTTP cache at {self.path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
+        logger.debug(f"Opened HTTP cache at {self.path}")
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the cached response for `url` and mark it as recently used"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, body, etag, last_modified, stored_at FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+        return CachedResponse(*row)
+
+    def put(self, url: str, body: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Store a response, evicting least recently used entries beyond the limit"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as revalidated, restarting its freshness window"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?',
+                (now, now, url)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def _evict(self) -> None:
+        count = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            logger.debug(f"Evicting {excess} least recently used entries from HTTP cache")
+            self._conn.execute(
+                'DELETE FROM responses WHERE url IN '
+                '(SELECT url FROM responses ORDER BY accessed_at ASC LIMIT ?)',
+                (excess,)
+            )
@@ -0,0 +1,120 @@
+"""Crash-safe progress journal that lets an interrupted sync resume"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+from ..core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = '/tmp/podcast_pal_journal.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS run (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    run_id TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS podcasts (
+    title TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL
+);
+'''
+
+class RunJournal:
+    """
+    SQLite journal of the work a sync has already committed.
+
+    Podcasts are recorded once their batch is stored in MongoDB and episode
+    page metadata once it has been fetched, each in its own transaction, so
+    a run that dies partway leaves an accurate record behind. Stored podcasts
+    only count for the same `run_id` (the OPML export and sync mode), while
+    page metadata is kept across runs until `compact` is called after a run
+    fully commits.
+    """
+
+    def __init__(self, run_id: str, path: Optional[str] = None):
+        self.run_id = run_id
+        self.path = path or JOURNAL_PATH
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._completed = self._start_run()
+            self._conn.commit()
+        except sqlite3.Error as e:
+            error_msg = f"Failed to open run journal at {self.path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
+        if self._completed:
+            logger.info(f"Resuming run with {len(self._completed)} podcasts already stored")
+
+    def is_completed(self, title: str) -> bool:
+        """Check if the podcast titled `title` was already stored by this run"""
+        return title in self._completed
+
+    def complete_podcasts(self, titles: Iterable[str]) -> None:
+        """Record podcasts whose updates have been written"""
+        titles = list(titles)
+        now = time.time()
+        with self._lock:
+            self._execute_many('INSERT OR REPLACE INTO podcasts VALUES (?, ?)',
+                               [(title, now) for title in titles])
+            self._completed.update(titles)
+
+    def get_page(self, url: str) -> Optional[Dict[str, str]]:
+        """Return journaled page metadata fields for `url`"""
+        with self._lock:
+            row = self._conn.execute('SELECT metadata FROM pages WHERE url = ?', (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_page(self, url: str, fields: Dict[str, str]) -> None:
+        """Record the metadata fields fetched from an episode page"""
+        with self._lock:
+            self._execute_many('INSERT OR REPLACE INTO pages VALUES (?, ?)', [(url, json.dumps(fields))])
+
+    def compact(self) -> None:
+        """Forget all journaled work once a run has fully committed"""
+        with self._lock:
+            try:
+                self._conn.execute('DELETE FROM podcasts')
+                self._conn.execute('DELETE FROM pages')
+                self._conn.execute('DELETE FROM run')
+                self._conn.commit()
+                self._conn.execute('VACUUM')
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to compact run journal at {self.path}: {str(e)}")
+                return
+            self._completed.clear()
+        logger.debug(f"Compacted run journal at {self.path}")
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _start_run(self) -> Set[str]:
+        row = self._conn.execute('SELECT run_id FROM run WHERE id = 1').fetchone()
+        if row is not None and row[0] == self.run_id:
+            return {title for title, in self._conn.execute('SELECT title FROM podcasts')}
+        if row is not None:
+            # Another export or mode: stored podcasts may be missing episodes
+            logger.info('Run journal belongs to a different run, discarding stored podcasts')
+        self._conn.execute('DELETE FROM podcasts')
+        self._conn.execute('INSERT OR REPLACE INTO run VALUES (1, ?, ?)', (self.run_id, time.time()))
+        return set()
+
+    def _execute_many(self, sql: str, rows) -> None:
+        try:
+            self._conn.executemany(sql, rows)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            error_msg = f"Failed to write run journal at {self.path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
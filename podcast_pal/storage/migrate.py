@@ -0,0 +1,95 @@
+"""
+Online migration from embedded episode arrays to per-episode documents
+
+Run with `python -m podcast_pal.storage.migrate`, then set
+MONGODB_LAYOUT=episodes. The migration can run while syncs keep writing in
+the embedded layout: episodes are copied with idempotent upserts and only
+the copied ones are pulled from their podcast, so anything pushed in the
+meantime is picked up by a later batch.
+"""
+import logging
+import sys
+from typing import Any, Dict
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from ..core.exceptions import PodcastPalError, StorageError
+from ..logging_config import configure_logging
+from .mongodb import ensure_episode_indexes, get_episodes_collection, get_mongodb_collection
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 100
+
+def migrate_to_episode_documents(collection: Collection, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Move embedded episodes into the per-episode collection in batches.
+
+    Args:
+        collection: Podcast collection in the embedded layout
+        batch_size: Number of podcasts, and of episodes per podcast, handled per batch
+
+    Returns:
+        int: Number of episodes moved out of podcast documents
+    """
+    episodes_collection = get_episodes_collection(collection)
+    ensure_episode_indexes(episodes_collection)
+
+    migrated = 0
+    try:
+        while True:
+            batch = list(collection.find(
+                {"episodes.0": {"$exists": True}},
+                {"podcast_title": 1, "source": 1, "episodes": {"$slice": batch_size}}
+            ).limit(batch_size))
+            if not batch:
+                break
+            for podcast_doc in batch:
+                migrated += _migrate_podcast_episodes(collection, episodes_collection, podcast_doc)
+            logger.info(f"Migrated {migrated} episodes so far")
+
+        collection.update_many({"episodes": {"$size": 0}}, {"$unset": {"episodes": ""}})
+    except PodcastPalError:
+        raise
+    except Exception as e:
+        logger.error(f"Migration failed after {migrated} episodes: {str(e)}")
+        raise StorageError(f"Migration failed after {migrated} episodes: {str(e)}")
+
+    logger.info(f"Migration complete, moved {migrated} episodes to '{episodes_collection.name}'")
+    return migrated
+
+def _migrate_podcast_episodes(collection: Collection, episodes_collection: Collection,
+                              podcast_doc: Dict[str, Any]) -> int:
+    """Copy one slice of a podcast's episodes, then pull the copied ones from it"""
+    episodes = podcast_doc["episodes"]
+    operations = [
+        UpdateOne(
+            {"overcast_id": episode["overcast_id"]},
+            {"$setOnInsert": {
+                **episode,
+                "podcast_title": podcast_doc["podcast_title"],
+                "source": podcast_doc["source"]
+            }},
+            upsert=True
+        )
+        for episode in episodes
+    ]
+    episodes_collection.bulk_write(operations, ordered=False)
+    collection.update_one(
+        {"_id": podcast_doc["_id"]},
+        {"$pull": {"episodes": {"overcast_id": {"$in": [episode["overcast_id"] for episode in episodes]}}}}
+    )
+    return len(episodes)
+
+def main():
+    """Migrate the configured collection to the per-episode layout"""
+    load_dotenv()
+    configure_logging()
+    try:
+        migrate_to_episode_documents(get_mongodb_collection())
+    except PodcastPalError as e:
+        logger.error(f"Application error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
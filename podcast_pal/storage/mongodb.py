@@ -1,51 +1,87 @@
 """MongoDB storage operations"""
 import os
 import logging
-from typing import Dict, Any
-from pymongo import MongoClient
+from dataclasses import replace
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+from pymongo import ASCENDING, MongoClient, IndexModel, InsertOne, UpdateOne, monitoring
 from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
 from ..core.exceptions import StorageError
-from ..core.podcast import Podcast
+from ..metrics import metrics
+from ..core.podcast import Episode, Podcast, StoredArtwork
 from bson import CodecOptions
-import html
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Serves lookups by {podcast_title, source} and by source alone (stored artwork)
+PODCAST_KEY_INDEX = IndexModel(
+    [("source", ASCENDING), ("podcast_title", ASCENDING)],
+    unique=True,
+    name="source_podcast_title"
+)
+EPISODE_ID_INDEX = IndexModel([("episodes.overcast_id", ASCENDING)], name="episodes_overcast_id")
+EPISODE_IDS_PROJECTION = {"episodes.overcast_id": 1}
+
+# Storage layouts: episodes embedded in their podcast document, or one document per episode
+LAYOUT_EMBEDDED = "embedded"
+LAYOUT_EPISODES = "episodes"
+EPISODES_COLLECTION_SUFFIX = "_episodes"
+EPISODE_KEY_INDEX = IndexModel([("overcast_id", ASCENDING)], unique=True, name="overcast_id")
+EPISODE_PODCAST_INDEX = IndexModel(
+    [("source", ASCENDING), ("podcast_title", ASCENDING)],
+    name="source_podcast_title"
+)
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Count every command sent to the server, i.e. each MongoDB round trip"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.increment('mongodb_round_trips')
+        metrics.increment('mongodb_server_seconds', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        metrics.increment('mongodb_round_trips')
+        metrics.increment('mongodb_failures')
+
 def _serialize_podcast(podcast: Podcast) -> Dict[str, Any]:
     """Serialize podcast object for MongoDB storage"""
     return {
         "podcast_title": podcast.title,
         "artwork_url": podcast.artwork_url,
+        "artwork_updated_at": podcast.artwork_updated_at,
         "source": podcast.source,
         "created_at": podcast.created_at,
         "category": podcast.category,
         "episodes": [_serialize_episode(episode) for episode in podcast.episodes]
     }
 
-def _serialize_episode(episode) -> Dict[str, Any]:
-    """Serialize episode object for MongoDB storage"""
-    return {
-        "title": episode.title,
-        "audio_url": episode.audio_url,
-        "overcast_url": episode.overcast_url,
-        "overcast_id": episode.overcast_id,
-        "published_date": episode.published_date,
-        "play_progress": episode.play_progress,
-        "last_played_at": episode.last_played_at,
-        "summary": html.unescape(episode.summary),
-        "duration": episode.duration
-    }
+def _serialize_episode_document(episode, podcast: Podcast) -> Dict[str, Any]:
+    """Serialize an episode as a standalone document referencing its podcast"""
+    document = _serialize_episode(episode)
+    document["podcast_title"] = podcast.title
+    document["source"] = podcast.source
+    return document
 
-def update_podcast(collection: Collection, podcast: Podcast) -> bool:
+def _serialize_episode(episode: Episode) -> Dict[str, Any]:
+    """Serialize episode object for MongoDB storage; the summary is already unescaped"""
+    return episode.to_dict()
+
+def update_podcast(collection: Collection, podcast: Podcast, layout: Optional[str] = None) -> bool:
     """Update a single podcast in MongoDB collection"""
+    if _resolve_layout(layout) == LAYOUT_EPISODES:
+        return update_podcasts(collection, [podcast], layout=LAYOUT_EPISODES) > 0
+
     query = {
         "podcast_title": podcast.title,
         "source": podcast.source
     }
     
     try:
-        existing = collection.find_one(query)
+        existing = collection.find_one(query, EPISODE_IDS_PROJECTION)
         if existing:
             return _update_existing_podcast(collection, existing, podcast)
         return _insert_new_podcast(collection, podcast)
@@ -53,13 +89,194 @@ def update_podcast(collection: Collection, podcast: Podcast) -> bool:
         logger.error(f"Failed to update podcast: {str(e)}")
         raise StorageError(f"Failed to update podcast: {str(e)}")
 
+def update_podcasts(collection: Collection, podcasts: Iterable[Podcast],
+                    layout: Optional[str] = None) -> int:
+    """
+    Update many podcasts with a single read and a single bulk write.
+
+    Existing episode IDs of all affected podcasts are fetched in one query,
+    then every insert and `$push` update is sent as one unordered
+    `bulk_write`. Podcasts sharing a title and source are merged first.
+    In the per-episode layout, episodes are upserted by `overcast_id`
+    instead and no read is needed.
+
+    Returns:
+        int: Number of podcasts inserted or updated with new episodes
+    """
+    podcasts = _merge_duplicate_podcasts(podcasts)
+    if not podcasts:
+        return 0
+    if _resolve_layout(layout) == LAYOUT_EPISODES:
+        return _update_podcasts_by_episode(collection, podcasts)
+
+    try:
+        with metrics.timer('write'):
+            existing_docs = _find_existing_podcasts(collection, podcasts)
+        operations: List[Union[InsertOne, UpdateOne]] = []
+        updated = 0
+        with metrics.timer('serialize'):
+            for podcast in podcasts:
+                existing = existing_docs.get((podcast.title, podcast.source))
+                if existing is None:
+                    logger.info(f"Inserting new podcast '{podcast.title}' with {len(podcast.episodes)} episodes")
+                    operations.append(InsertOne(_serialize_podcast(podcast)))
+                    updated += 1
+                    continue
+
+                new_episodes = _get_new_episodes(existing, podcast)
+                if new_episodes:
+                    logger.info(f"Updating podcast '{podcast.title}' with {len(new_episodes)} new episodes")
+                    operations.append(UpdateOne({"_id": existing["_id"]},
+                                                _build_episodes_update(podcast, new_episodes)))
+                    updated += 1
+                elif _is_artwork_refreshed(existing, podcast):
+                    # Keeps the new fetch time, or the podcast would refetch its artwork every run
+                    operations.append(UpdateOne({"_id": existing["_id"]}, {"$set": _artwork_fields(podcast)}))
+
+        if operations:
+            with metrics.timer('write'):
+                collection.bulk_write(operations, ordered=False)
+        return updated
+    except Exception as e:
+        logger.error(f"Failed to update podcasts: {str(e)}")
+        raise StorageError(f"Failed to update podcasts: {str(e)}")
+
+def _update_podcasts_by_episode(collection: Collection, podcasts: List[Podcast]) -> int:
+    """Write podcasts in the per-episode layout with one bulk request per collection"""
+    try:
+        episode_operations = []
+        episode_owners = []
+        with metrics.timer('serialize'):
+            for index, podcast in enumerate(podcasts):
+                for episode in podcast.episodes:
+                    episode_operations.append(UpdateOne(
+                        {"overcast_id": episode.overcast_id},
+                        {"$setOnInsert": _serialize_episode_document(episode, podcast)},
+                        upsert=True
+                    ))
+                    episode_owners.append(index)
+
+        updated = set()
+        if episode_operations:
+            with metrics.timer('write'):
+                result = get_episodes_collection(collection).bulk_write(episode_operations, ordered=False)
+            updated = {episode_owners[op_index] for op_index in result.upserted_ids or {}}
+
+        with metrics.timer('serialize'):
+            podcast_operations = [
+                UpdateOne(
+                    {"podcast_title": podcast.title, "source": podcast.source},
+                    _build_podcast_upsert(podcast, index in updated),
+                    upsert=True
+                )
+                for index, podcast in enumerate(podcasts)
+            ]
+        with metrics.timer('write'):
+            result = collection.bulk_write(podcast_operations, ordered=False)
+        updated.update(result.upserted_ids or {})
+
+        for index in sorted(updated):
+            logger.info(f"Stored new episodes for podcast '{podcasts[index].title}'")
+        return len(updated)
+    except Exception as e:
+        logger.error(f"Failed to update podcasts: {str(e)}")
+        raise StorageError(f"Failed to update podcasts: {str(e)}")
+
+def update_episode_progress(collection: Collection,
+                            updates: Dict[str, Tuple[Optional[str], Optional[datetime]]],
+                            layout: Optional[str] = None) -> int:
+    """
+    Set new play progress on already stored episodes in one bulk write.
+
+    Args:
+        collection: Podcast collection
+        updates: New (play_progress, last_played_at) by overcast_id
+        layout: Storage layout, defaults to MONGODB_LAYOUT
+
+    Returns:
+        int: Number of stored episodes that were modified
+    """
+    if not updates:
+        return 0
+    per_episode = _resolve_layout(layout) == LAYOUT_EPISODES
+    target = get_episodes_collection(collection) if per_episode else collection
+    prefix = "" if per_episode else "episodes.$."
+    id_field = "overcast_id" if per_episode else "episodes.overcast_id"
+
+    operations = []
+    for overcast_id, (play_progress, last_played_at) in updates.items():
+        fields: Dict[str, Any] = {f"{prefix}play_progress": play_progress}
+        if last_played_at is not None:
+            fields[f"{prefix}last_played_at"] = last_played_at
+        operations.append(UpdateOne({id_field: overcast_id}, {"$set": fields}))
+
+    try:
+        with metrics.timer('write'):
+            result = target.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to update episode progress: {str(e)}")
+        raise StorageError(f"Failed to update episode progress: {str(e)}")
+    logger.info(f"Updated play progress of {result.modified_count} episodes")
+    return result.modified_count
+
+def _build_podcast_upsert(podcast: Podcast, has_new_episodes: bool) -> Dict[str, Any]:
+    """Build the podcast document upsert for the per-episode layout"""
+    fields_to_set = _podcast_fields_to_set(podcast) if has_new_episodes else _artwork_fields(podcast)
+    document = _serialize_podcast(podcast)
+    for key in ("episodes", "podcast_title", "source", *fields_to_set):
+        document.pop(key)
+    update = {"$setOnInsert": document}
+    if fields_to_set:
+        update["$set"] = fields_to_set
+    return update
+
+def _merge_duplicate_podcasts(podcasts: Iterable[Podcast]) -> List[Podcast]:
+    """Merge podcasts sharing a title and source so each gets a single write"""
+    merged: Dict[Tuple[str, str], Podcast] = {}
+    for podcast in podcasts:
+        key = (podcast.title, podcast.source)
+        if key not in merged:
+            merged[key] = podcast
+            continue
+        seen_ids = {ep.overcast_id for ep in merged[key].episodes}
+        extra = [ep for ep in podcast.episodes if ep.overcast_id not in seen_ids]
+        merged[key] = replace(podcast, episodes=merged[key].episodes + extra)
+    return list(merged.values())
+
+def _find_existing_podcasts(collection: Collection,
+                            podcasts: List[Podcast]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Fetch stored episode IDs of all given podcasts in one query"""
+    cursor = collection.find(
+        {
+            "podcast_title": {"$in": [podcast.title for podcast in podcasts]},
+            "source": {"$in": list({podcast.source for podcast in podcasts})}
+        },
+        {"podcast_title": 1, "source": 1, "artwork_updated_at": 1, **EPISODE_IDS_PROJECTION}
+    )
+    return {(doc["podcast_title"], doc["source"]): doc for doc in cursor}
+
+def _get_new_episodes(existing: Dict[str, Any], podcast: Podcast) -> list:
+    """Return the podcast's episodes not yet stored in `existing`"""
+    existing_ids = {ep["overcast_id"] for ep in existing.get("episodes", [])}
+    return [ep for ep in podcast.episodes
+            if ep.overcast_id not in existing_ids]
+
+def _build_episodes_update(podcast: Podcast, new_episodes: list) -> Dict[str, Any]:
+    """Build the update document pushing `new_episodes` onto a stored podcast"""
+    return {
+        "$push": {
+            "episodes": {
+                "$each": [_serialize_episode(ep) for ep in new_episodes]
+            }
+        },
+        "$set": _podcast_fields_to_set(podcast)
+    }
+
 def _update_existing_podcast(collection: Collection, 
                            existing: Dict[str, Any], 
                            podcast: Podcast) -> bool:
     """Update an existing podcast with new episodes"""
-    existing_ids = {ep["overcast_id"] for ep in existing["episodes"]}
-    new_episodes = [ep for ep in podcast.episodes 
-                   if ep.overcast_id not in existing_ids]
+    new_episodes = _get_new_episodes(existing, podcast)
     
     if not new_episodes:
         logger.debug(f"No new episodes for podcast '{podcast.title}'")
@@ -69,28 +286,100 @@ def _update_existing_podcast(collection: Collection,
     logger.debug(f"New episodes to add for podcast '{podcast.title}': {[ep.overcast_id for ep in new_episodes]}")
     collection.update_one(
         {"_id": existing["_id"]},
-        {
-            "$push": {
-                "episodes": {
-                    "$each": [_serialize_episode(ep) for ep in new_episodes]
-                }
-            },
-            "$set": {"created_at": podcast.created_at}
-        }
+        _build_episodes_update(podcast, new_episodes)
     )
     logger.debug(f"Successfully updated podcast '{podcast.title}' with new episodes.")
     return True
 
+def _podcast_fields_to_set(podcast: Podcast) -> Dict[str, Any]:
+    """Top-level fields refreshed whenever an existing podcast gets new episodes"""
+    return {"created_at": podcast.created_at, **_artwork_fields(podcast)}
+
+def _artwork_fields(podcast: Podcast) -> Dict[str, Any]:
+    """Artwork URL and fetch time, set on every write so a refetch is not repeated"""
+    if not podcast.artwork_url:
+        return {}
+    return {"artwork_url": podcast.artwork_url, "artwork_updated_at": podcast.artwork_updated_at}
+
+def _is_artwork_refreshed(existing: Dict[str, Any], podcast: Podcast) -> bool:
+    """Check if `podcast` carries artwork fetched or stamped after `existing` was stored"""
+    return bool(podcast.artwork_url) and podcast.artwork_updated_at != existing.get("artwork_updated_at")
+
+def get_stored_artwork(collection: Collection, source: str = "overcast") -> Dict[str, StoredArtwork]:
+    """Load the stored artwork URL of every podcast from `source`, keyed by title"""
+    try:
+        cursor = collection.find(
+            {"source": source},
+            {"_id": 0, "podcast_title": 1, "artwork_url": 1, "artwork_updated_at": 1}
+        )
+        return {
+            doc["podcast_title"]: StoredArtwork(doc.get("artwork_url") or '', doc.get("artwork_updated_at"))
+            for doc in cursor
+        }
+    except Exception as e:
+        logger.error(f"Failed to load stored artwork: {str(e)}")
+        raise StorageError(f"Failed to load stored artwork: {str(e)}")
+
 def _insert_new_podcast(collection: Collection, podcast: Podcast) -> bool:
     """Insert a new podcast into the collection"""
     logger.info(f"Inserting new podcast '{podcast.title}' with {len(podcast.episodes)} episodes")
     collection.insert_one(_serialize_podcast(podcast))
     return True
 
-def get_mongodb_collection() -> Collection:
-    """Initialize and return MongoDB collection"""
-    config = _get_mongodb_config()
-    client = MongoClient(config['uri'])
+def get_episodes_collection(collection: Collection) -> Collection:
+    """Return the per-episode collection paired with a podcast collection"""
+    return collection.database.get_collection(
+        f"{collection.name}{EPISODES_COLLECTION_SUFFIX}",
+        codec_options=collection.codec_options
+    )
+
+def ensure_indexes(collection: Collection, layout: Optional[str] = None) -> None:
+    """Create the indexes used by podcast lookups if they do not exist yet"""
+    _create_indexes(collection, [PODCAST_KEY_INDEX, EPISODE_ID_INDEX])
+    if _resolve_layout(layout) == LAYOUT_EPISODES:
+        ensure_episode_indexes(get_episodes_collection(collection))
+
+def ensure_episode_indexes(episodes_collection: Collection) -> None:
+    """Create the unique overcast_id and podcast reference indexes of the episode collection"""
+    _create_indexes(episodes_collection, [EPISODE_KEY_INDEX, EPISODE_PODCAST_INDEX])
+
+def _create_indexes(collection: Collection, indexes: List[IndexModel]) -> None:
+    try:
+        names = collection.create_indexes(indexes)
+        logger.debug(f"Ensured indexes {names} on '{collection.name}'")
+    except OperationFailure as e:
+        # Typically duplicate documents created before the unique index existed
+        logger.warning(f"Could not ensure indexes on '{collection.name}': {str(e)}")
+
+def get_storage_layout() -> str:
+    """Get the configured storage layout (MONGODB_LAYOUT), defaulting to embedded"""
+    layout = os.getenv('MONGODB_LAYOUT', LAYOUT_EMBEDDED)
+    if layout not in (LAYOUT_EMBEDDED, LAYOUT_EPISODES):
+        raise StorageError(f"Unknown MONGODB_LAYOUT '{layout}', expected '{LAYOUT_EMBEDDED}' or '{LAYOUT_EPISODES}'")
+    return layout
+
+def _resolve_layout(layout: Optional[str]) -> str:
+    return layout or get_storage_layout()
+
+def get_mongodb_client() -> MongoClient:
+    """Connect to the MongoDB deployment configured in PODCAST_DB"""
+    uri = os.getenv('PODCAST_DB')
+    if not uri:
+        raise StorageError("Missing required environment variable: PODCAST_DB")
+    return MongoClient(uri, event_listeners=[CommandMetricsListener()])
+
+def get_mongodb_collection(create_indexes: bool = True, client: Optional[MongoClient] = None,
+                           database: Optional[str] = None, collection_name: Optional[str] = None) -> Collection:
+    """
+    Initialize and return MongoDB collection, ensuring its indexes by default.
+
+    `client`, `database` and `collection_name` override PODCAST_DB,
+    MONGODB_DATABASE and MONGODB_COLLECTION, so several collections can
+    share one client and its connection pool.
+    """
+    config = _get_mongodb_config(require_uri=client is None, db=database, collection=collection_name)
+    if client is None:
+        client = MongoClient(config['uri'], event_listeners=[CommandMetricsListener()])
     db = client[config['db']]
     codec_options = CodecOptions(
         document_class=dict,
@@ -98,12 +387,14 @@ def get_mongodb_collection() -> Collection:
         unicode_decode_error_handler='replace'
     )
     collection = db.get_collection(config['collection'], codec_options=codec_options)
+    if create_indexes:
+        ensure_indexes(collection)
     
     logger.info(f"Connected to MongoDB collection '{config['db']}.{config['collection']}'")
     return collection
 
-def _get_mongodb_config() -> Dict[str, str]:
-    """Get and validate MongoDB configuration from environment"""
+def _get_mongodb_config(require_uri: bool = True, **overrides) -> Dict[str, str]:
+    """Get and validate MongoDB configuration from environment, unless overridden"""
     required_vars = {
         'uri': 'PODCAST_DB',
         'db': 'MONGODB_DATABASE',
@@ -111,8 +402,10 @@ def _get_mongodb_config() -> Dict[str, str]:
     }
     
     config = {}
+    if not require_uri:
+        del required_vars['uri']
     for key, env_var in required_vars.items():
-        value = os.getenv(env_var)
+        value = overrides.get(key) or os.getenv(env_var)
         if not value:
             raise StorageError(f"Missing required environment variable: {env_var}")
         config[key] = value
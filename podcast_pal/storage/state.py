@@ -0,0 +1,74 @@
+"""Persistent sync state between runs"""
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+from ..core.exceptions import StorageError
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = '/tmp/podcast_pal_state.json'
+
+class HighWaterMarks:
+    """
+    Latest listening activity seen per podcast title.
+
+    Marks recorded during a run are staged and only written by `save`, which
+    callers invoke once the run's results have been stored.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or STATE_PATH
+        self._marks: Dict[str, Optional[datetime]] = self._load()
+        self._pending: Dict[str, Optional[datetime]] = {}
+
+    def has_new_activity(self, title: str, activity: Optional[datetime]) -> bool:
+        """Check if `activity` is newer than the stored mark for `title`"""
+        if title not in self._marks:
+            return True
+        mark = self._marks[title]
+        if activity is None:
+            return False
+        return mark is None or activity > mark
+
+    def record(self, title: str, activity: Optional[datetime]) -> None:
+        """Stage a new mark for `title`"""
+        self._pending[title] = activity
+
+    def save(self) -> None:
+        """Merge staged marks and write them to disk atomically"""
+        self._marks.update(self._pending)
+        self._pending = {}
+        data = {
+            title: mark.isoformat() if mark else None
+            for title, mark in self._marks.items()
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved high-water marks for {len(data)} podcasts to {self.path}")
+        except IOError as e:
+            error_msg = f"Failed to save sync state to {self.path}: {str(e)}"
+            logger.error(error_msg)
+            raise StorageError(error_msg)
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+    def _load(self) -> Dict[str, Optional[datetime]]:
+        if not os.path.exists(self.path):
+            logger.debug(f"No sync state found at {self.path}")
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {
+                title: datetime.fromisoformat(mark) if mark else None
+                for title, mark in data.items()
+            }
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sync state at {self.path}: {e}")
+            return {}
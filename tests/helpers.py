@@ -0,0 +1,15 @@
+"""Helpers shared by the test packages"""
+from unittest.mock import Mock
+
+def make_page_response(content: str, status_code: int = 200, headers: dict = None,
+                       chunk_size: int = None, url: str = 'https://overcast.fm/+episode') -> Mock:
+    """Create a mock streamed response serving `content` in chunks of `chunk_size` bytes"""
+    body = content.encode('utf-8')
+    size = chunk_size or max(len(body), 1)
+    response = Mock()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers = headers or {}
+    response.iter_content.side_effect = lambda chunk: iter([body[i:i + size] for i in range(0, len(body), size)])
+    return response
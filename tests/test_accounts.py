@@ -0,0 +1,113 @@
+"""Tests for multi-account syncing"""
+import json
+import os
+import threading
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from podcast_pal.accounts import (
+    Account,
+    AccountContext,
+    SharedResources,
+    load_accounts,
+    run_accounts
+)
+from podcast_pal.core.exceptions import ConfigurationError
+from podcast_pal.metrics import metrics
+
+@pytest.fixture
+def write_config(tmp_path):
+    """Write an accounts config file and return its path"""
+    def write(accounts):
+        path = tmp_path / 'accounts.json'
+        path.write_text(json.dumps({'accounts': accounts}))
+        return str(path)
+    return write
+
+@pytest.fixture
+def accounts(tmp_path):
+    """Two accounts with state directories under tmp_path"""
+    return [
+        Account('alice', 'alice@example.com', 'pw', 'alice_history', state_dir=str(tmp_path / 'alice')),
+        Account('bob', 'bob@example.com', 'pw', 'bob_history', state_dir=str(tmp_path / 'bob'))
+    ]
+
+def test_load_accounts(write_config):
+    """Test reading accounts, with passwords taken from the environment"""
+    path = write_config([
+        {'name': 'alice', 'email': 'alice@example.com', 'password_env': 'ALICE_PASSWORD',
+         'collection': 'alice_history'},
+        {'name': 'bob', 'email': 'bob@example.com', 'password': 'pw', 'collection': 'bob_history',
+         'database': 'other'}
+    ])
+    with patch.dict('os.environ', {'ALICE_PASSWORD': 'secret'}):
+        alice, bob = load_accounts(path)
+
+    assert alice.credentials == {'email': 'alice@example.com', 'password': 'secret'}
+    assert alice.database is None
+    assert bob.database == 'other'
+
+@pytest.mark.parametrize('accounts, message', [
+    ([], 'No accounts'),
+    ([{'name': '../alice', 'email': 'a', 'password': 'p', 'collection': 'c'}], 'Invalid account name'),
+    ([{'name': 'alice', 'email': 'a', 'password_env': 'UNSET_PASSWORD', 'collection': 'c'}], 'missing password'),
+    ([{'name': 'alice', 'email': 'a', 'password': 'p', 'collection': 'c'},
+      {'name': 'alice', 'email': 'b', 'password': 'p', 'collection': 'd'}], 'distinct names'),
+    ([{'name': 'alice', 'email': 'a', 'password': 'p', 'collection': 'c'},
+      {'name': 'bob', 'email': 'b', 'password': 'p', 'collection': 'c'}], 'distinct collections'),
+])
+def test_load_accounts_rejects_invalid_config(write_config, accounts, message):
+    with pytest.raises(ConfigurationError, match=message):
+        load_accounts(write_config(accounts))
+
+def test_load_accounts_unreadable_file(tmp_path):
+    with pytest.raises(ConfigurationError):
+        load_accounts(str(tmp_path / 'missing.json'))
+
+def test_account_context_uses_own_state_and_shared_pools(accounts):
+    """Each account keeps local state apart while sharing the pool and limiter"""
+    shared = SharedResources()
+    alice, bob = (AccountContext(account, shared) for account in accounts)
+
+    assert alice.opml_cache_path == os.path.join(accounts[0].state_dir, 'overcast.opml')
+    assert alice.journal_path != bob.journal_path
+    assert alice.session_manager.session_path == os.path.join(accounts[0].state_dir, 'session.json')
+    assert alice.session_manager.credentials == accounts[0].credentials
+    assert os.stat(accounts[0].state_dir).st_mode & 0o777 == 0o700
+    assert alice.session_manager.limiter is bob.session_manager.limiter is shared.limiter
+    assert alice.session_manager._new_session().get_adapter('https://overcast.fm') is shared.adapter
+
+    with patch.object(alice.session_manager, 'get_session', return_value=requests.Session()), \
+            patch.object(bob.session_manager, 'get_session', return_value=requests.Session()):
+        assert alice.transport.limiter is bob.transport.limiter is shared.limiter
+        assert alice.transport.session.get_adapter('https://overcast.fm') is shared.adapter
+        assert bob.transport.session.get_adapter('https://overcast.fm') is shared.adapter
+    shared.close()
+
+def test_account_context_collection_uses_shared_client(accounts):
+    shared = SharedResources()
+    shared._client = Mock()
+    context = AccountContext(accounts[0], shared)
+
+    with patch('podcast_pal.storage.mongodb.get_mongodb_collection') as get_collection:
+        assert context.collection is get_collection.return_value
+    get_collection.assert_called_once_with(client=shared._client, database=None, collection_name='alice_history')
+
+def test_run_accounts_runs_concurrently_and_isolates_failures(accounts):
+    """Accounts sync at the same time and one failure does not stop the others"""
+    both_started = threading.Barrier(2, timeout=5)
+
+    def sync(context, incremental):
+        both_started.wait()
+        if context.account.name == 'bob':
+            raise RuntimeError('MongoDB unavailable')
+        return 3
+
+    with patch('podcast_pal.accounts.sync_context', side_effect=sync), \
+            patch('podcast_pal.accounts.metrics.report') as report:
+        results = run_accounts(accounts, incremental=True)
+
+    assert results == {'alice': 3, 'bob': None}
+    assert metrics.counters['accounts_synced'] == 1
+    report.assert_called_once()
@@ -0,0 +1 @@
+"""Auth test package initialization"""
@@ -0,0 +1,137 @@
+"""Tests for session management"""
+import json
+import time
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from podcast_pal.auth.session import (
+    SessionManager,
+    ReauthenticatingSession,
+    is_session_expired,
+    LOGIN_URL
+)
+from podcast_pal.core.exceptions import AuthenticationError
+
+def make_response(status_code=200, url='https://overcast.fm/podcasts'):
+    """Create a mock response"""
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.url = url
+    return response
+
+@pytest.fixture
+def session_path(tmp_path):
+    """Path of a temporary session file"""
+    return str(tmp_path / 'session.json')
+
+@pytest.fixture
+def credentials():
+    """Set Overcast credentials in the environment"""
+    with patch.dict('os.environ', {'EMAIL': 'user@example.com', 'PASSWORD': 'secret'}):
+        yield
+
+def login(session, url, data=None):
+    """Fake login setting an authentication cookie"""
+    session.cookies.set('o', 'token', domain='overcast.fm', path='/', expires=int(time.time()) + 3600)
+    return make_response(url=url)
+
+def test_new_session_saves_cookies(session_path, credentials):
+    """Test that logging in stores the cookie jar with its expiry"""
+    with patch.object(ReauthenticatingSession, 'post', autospec=True, side_effect=login) as mock_post:
+        SessionManager(session_path).get_session()
+
+    mock_post.assert_called_once()
+    with open(session_path) as f:
+        saved = json.load(f)
+    assert saved['cookies'][0]['name'] == 'o'
+    assert saved['expires_at'] == saved['cookies'][0]['expires']
+
+def test_saved_session_reused(session_path, credentials):
+    """Test that a second run reuses saved cookies without logging in"""
+    with patch.object(ReauthenticatingSession, 'post', autospec=True, side_effect=login):
+        SessionManager(session_path).get_session()
+
+    with patch.object(ReauthenticatingSession, 'post', autospec=True) as mock_post:
+        session = SessionManager(session_path).get_session()
+
+    mock_post.assert_not_called()
+    assert session.cookies.get('o') == 'token'
+
+def test_expired_saved_session_ignored(session_path, credentials):
+    """Test that an expired cookie jar triggers a new login"""
+    with open(session_path, 'w') as f:
+        json.dump({'cookies': [{'name': 'o', 'value': 'old', 'expires': 1}], 'expires_at': 1}, f)
+
+    with patch.object(ReauthenticatingSession, 'post', autospec=True, side_effect=login) as mock_post:
+        session = SessionManager(session_path).get_session()
+
+    mock_post.assert_called_once()
+    assert session.cookies.get('o') == 'token'
+
+def test_login_waits_for_rate_limiter(session_path, credentials):
+    """Test that logging in takes a token from the limiter and waits it out"""
+    limiter = Mock()
+    limiter.reserve.return_value = 0.5
+    with patch.object(ReauthenticatingSession, 'post', autospec=True, side_effect=login), \
+            patch('podcast_pal.auth.session.time.sleep') as mock_sleep:
+        SessionManager(session_path, limiter=limiter).get_session()
+
+    limiter.reserve.assert_called_once_with('overcast.fm')
+    mock_sleep.assert_called_once_with(0.5)
+
+def test_authentication_failure(session_path, credentials):
+    """Test that a failed login raises AuthenticationError"""
+    with patch.object(ReauthenticatingSession, 'post', return_value=make_response(403, LOGIN_URL)):
+        with pytest.raises(AuthenticationError):
+            SessionManager(session_path).get_session()
+
+def test_expired_session_reauthenticates_once_per_request():
+    """Test that a login redirect triggers one re-login and a single retry"""
+    reauthenticate = Mock()
+    session = ReauthenticatingSession(reauthenticate)
+    responses = [make_response(url=LOGIN_URL), make_response(), make_response(403), make_response(403)]
+
+    with patch.object(requests.Session, 'request', side_effect=responses) as mock_request:
+        first = session.get('https://overcast.fm/podcasts')
+        second = session.get('https://overcast.fm/podcasts')
+
+    assert reauthenticate.call_count == 2
+    assert first is responses[1]
+    assert second is responses[3]
+    assert mock_request.call_count == 4
+
+def test_concurrent_expiry_reauthenticates_once():
+    """Test that a request sent before another thread logged in again is only retried"""
+    reauthenticate = Mock()
+    session = ReauthenticatingSession(reauthenticate)
+    responses = iter([make_response(403), make_response()])
+
+    def request(*args, **kwargs):
+        response = next(responses)
+        if response.status_code == 403:
+            # Another thread logs in again while this request is in flight
+            session._generation += 1
+        return response
+
+    with patch.object(requests.Session, 'request', side_effect=request):
+        response = session.get('https://overcast.fm/podcasts')
+
+    assert response.status_code == 200
+    reauthenticate.assert_not_called()
+
+@pytest.mark.parametrize('status_code, url, expected', [
+    (200, 'https://overcast.fm/podcasts', False),
+    (401, 'https://overcast.fm/podcasts', True),
+    (403, 'https://overcast.fm/podcasts', True),
+    (200, 'https://overcast.fm/login?then=podcasts', True),
+])
+def test_is_session_expired(status_code, url, expected):
+    """Test detection of expired sessions"""
+    assert is_session_expired(make_response(status_code, url)) is expected
+
+def test_configured_credentials_override_environment(session_path):
+    """Test that credentials given to the manager are used instead of EMAIL/PASSWORD"""
+    manager = SessionManager(session_path, credentials={'email': 'alice@example.com', 'password': 'pw'})
+    with patch.dict('os.environ', {'EMAIL': 'user@example.com', 'PASSWORD': 'secret'}):
+        assert manager._get_credentials() == {'email': 'alice@example.com', 'password': 'pw'}
@@ -0,0 +1,90 @@
+"""Smoke tests for the benchmark fixtures"""
+import json
+from datetime import datetime, timezone
+import requests
+
+from benchmarks import run
+from benchmarks.memory import measure_episode_footprint
+from benchmarks.replay import replay_sync
+from benchmarks.opml_generator import generate_opml
+from benchmarks.storage import InMemoryCollection
+from benchmarks.stub_server import StubOvercastServer, EXPORT_PATH
+from podcast_pal.auth.session import LOGIN_URL
+from podcast_pal.fetchers.archive import ArchivedResponse, HttpArchive
+from podcast_pal.fetchers.opml import OVERCAST_OPML_URL, parse_opml
+from podcast_pal.fetchers.page import extract_page_metadata
+from podcast_pal.storage.mongodb import LAYOUT_EMBEDDED, update_podcasts
+
+def test_generated_opml_shape():
+    """Test that generated exports parse to the requested size"""
+    podcasts = parse_opml(generate_opml(3, 4, played_ratio=1.0))
+
+    assert len(podcasts) == 3
+    assert all(len(podcast) == 4 for podcast in podcasts)
+    assert all(episode.get('played') == '1' for podcast in podcasts for episode in podcast)
+
+def test_generated_opml_is_reproducible():
+    """Test that the same seed and reference time give the same export"""
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert generate_opml(2, 2, seed=7, now=now) == generate_opml(2, 2, seed=7, now=now)
+
+def test_stub_server_serves_export_and_pages():
+    """Test that the stub answers like Overcast"""
+    with StubOvercastServer(opml='<opml/>') as server:
+        export = requests.get(server.base_url + EXPORT_PATH)
+        page = requests.get(server.base_url + '/+3-1')
+        missing = requests.get(server.base_url + '/nope')
+
+    assert export.text == '<opml/>'
+    metadata = extract_page_metadata(page.text)
+    assert metadata.title == 'Episode 3-1'
+    assert metadata.artwork_url == 'https://artwork.example.com/3.jpg'
+    assert missing.status_code == 404
+    assert server.requests == 3
+
+def test_in_memory_collection_round_trip():
+    """Test that the stand-in supports inserting and then extending podcasts"""
+    collection = InMemoryCollection()
+    models = run.build_podcasts(parse_opml(generate_opml(2, 3, played_ratio=1.0)))
+
+    assert update_podcasts(collection, models, layout=LAYOUT_EMBEDDED) == 2
+    assert update_podcasts(collection, models, layout=LAYOUT_EMBEDDED) == 0
+    assert sum(len(doc["episodes"]) for doc in collection.documents.values()) == 6
+    assert collection.encoded_bytes > 0
+
+def test_run_writes_results(tmp_path):
+    """Test a tiny end-to-end benchmark run"""
+    output = tmp_path / 'results.json'
+
+    run.main(['--podcasts', '2', '--episodes-per-podcast', '3', '--repeat', '1',
+              '--latency', '0', '--memory-episodes', '50', '--no-mongomock', '--output', str(output)])
+
+    report = json.loads(output.read_text())
+    assert {result['name'] for result in report['results']} >= {'parse_opml', 'update_podcasts', 'process_podcasts'}
+
+def test_episode_footprint():
+    """Test that the memory benchmark reports per-episode sizes"""
+    footprint = measure_episode_footprint(200)
+
+    assert footprint['episodes'] == 200
+    assert footprint['model_bytes_per_episode'] > footprint['slotted_instance_bytes_per_episode'] > 0
+
+def test_replay_sync_runs_offline_and_deterministically():
+    """Test that a full sync replayed from an archive stores every podcast without misses"""
+    recorded_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    opml = generate_opml(3, 4, played_ratio=1.0, recent_ratio=1.0, base_url='https://overcast.fm', now=recorded_at)
+    archive = HttpArchive(recorded_at)
+    archive.record(ArchivedResponse('POST', LOGIN_URL, 200, {}, b''))
+    archive.record(ArchivedResponse('GET', OVERCAST_OPML_URL, 200, {}, opml.encode('utf-8')))
+    with StubOvercastServer() as stub:
+        for podcast in parse_opml(opml):
+            for episode in podcast:
+                url = episode.get('overcastUrl')
+                page = stub.render(url[len('https://overcast.fm'):])
+                archive.record(ArchivedResponse('GET', url, 200, {'Content-Type': 'text/html; charset=utf-8'},
+                                                page.encode('utf-8')))
+
+    first = replay_sync(archive, use_mongomock=False)
+    second = replay_sync(archive, use_mongomock=False)
+
+    assert first == second == {'updated': 3, 'misses': 0}
@@ -0,0 +1,103 @@
+"""Tests for the command line interface"""
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from xml.etree.ElementTree import Element, SubElement
+
+from podcast_pal.cli import build_parser, main
+from podcast_pal.core.exceptions import FetchError
+
+def test_cli_does_not_import_heavy_dependencies():
+    """Test that loading the CLI and checking the cache stay free of heavy imports"""
+    code = (
+        "import sys; from podcast_pal.cli import main; main(['cache-age']); "
+        "print(sorted(m for m in ('requests', 'pymongo', 'bson', 'dateutil', 'dotenv') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+@pytest.mark.parametrize("argv,incremental", [
+    (['sync'], None),
+    (['sync', '--incremental'], True),
+    (['sync', '--full'], False)
+])
+def test_sync_mode_flags(argv, incremental):
+    """Test the incremental/full switch of sync"""
+    assert build_parser().parse_args(argv).incremental is incremental
+
+def test_sync_runs_main():
+    """Test that sync checks the environment and runs one sync"""
+    with patch('podcast_pal.main.check_environment') as check, patch('podcast_pal.main.main') as run:
+        assert main(['sync', '--full']) == 0
+    check.assert_called_once()
+    run.assert_called_once_with(False, None)
+
+def test_sync_dry_run(capsys):
+    """Test that a dry run lists podcasts without syncing"""
+    podcast = Element('outline', {'title': 'Test Podcast'})
+    SubElement(podcast, 'outline', {'overcastId': 'ep1'})
+    with patch('podcast_pal.main.check_environment'), \
+            patch('podcast_pal.main.main') as run, \
+            patch('podcast_pal.main.plan_sync', return_value=[podcast]):
+        assert main(['sync', '--dry-run']) == 0
+
+    run.assert_not_called()
+    assert '1 episodes in 1 podcasts to process' in capsys.readouterr().out
+
+def test_sync_accounts(tmp_path):
+    """Test that --accounts syncs every configured account and reports failures"""
+    with patch('podcast_pal.main.check_environment') as check, \
+            patch('podcast_pal.accounts.load_accounts', return_value=['alice', 'bob']) as load, \
+            patch('podcast_pal.accounts.run_accounts', return_value={'alice': 2, 'bob': None}) as run:
+        assert main(['sync', '--accounts', 'accounts.json', '--incremental']) == 1
+
+    check.assert_not_called()
+    load.assert_called_once_with('accounts.json')
+    run.assert_called_once_with(['alice', 'bob'], True, max_workers=None, max_per_host=None)
+
+def test_cache_age(tmp_path, capsys):
+    """Test the cache age report and its exit status"""
+    cache_path = tmp_path / 'overcast.opml'
+    with patch('podcast_pal.storage.cache.CACHE_PATH', str(cache_path)):
+        assert main(['cache-age']) == 1
+        cache_path.write_text('<opml/>')
+        assert main(['cache-age']) == 0
+    assert '0h 0m' in capsys.readouterr().out
+
+def test_application_errors_exit_with_status_1():
+    """Test that expected errors are logged instead of raised"""
+    with patch('podcast_pal.main.check_environment'), \
+            patch('podcast_pal.main.main', side_effect=FetchError('down')):
+        assert main(['sync']) == 1
+
+@pytest.mark.parametrize("argv,message", [
+    (['sync', '--accounts', 'accounts.json', '--replay', 'run.gz'], '--accounts cannot be combined with --replay'),
+    (['sync', '--accounts', 'accounts.json', '--profile'], '--accounts cannot be combined with --profile'),
+    (['sync', '--record', 'run.gz', '--dry-run'], '--record cannot be combined with --dry-run'),
+    (['sync', '--replay', 'run.gz', '--profile', 'out.prof'], '--replay cannot be combined with --profile'),
+    (['sync', '--dry-run', '--profile'], '--dry-run cannot be combined with --profile'),
+    (['sync', '--replay-latency', '0.1'], '--replay-latency requires --replay')
+])
+def test_sync_rejects_conflicting_options(argv, message, capsys):
+    """Test that options a sync would ignore are reported instead of dropped"""
+    with patch('podcast_pal.main.main') as run, pytest.raises(SystemExit) as exit_info:
+        main(argv)
+
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
+    run.assert_not_called()
+
+def test_sync_concurrency_options():
+    """Test that --workers and --max-per-host reach the sync context"""
+    with patch('podcast_pal.main.check_environment'), patch('podcast_pal.main.main') as run:
+        assert main(['sync', '--full', '--workers', '16', '--max-per-host', '2']) == 0
+
+    context = run.call_args.args[1]
+    assert (context.max_workers, context.max_per_host) == (16, 2)
+
+def test_sync_rejects_zero_workers(capsys):
+    with pytest.raises(SystemExit):
+        main(['sync', '--workers', '0'])
+    assert 'must be at least 1' in capsys.readouterr().err
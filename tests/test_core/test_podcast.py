@@ -0,0 +1,48 @@
+"""Tests for the core podcast models"""
+import pytest
+from datetime import datetime
+from xml.etree.ElementTree import Element
+
+from podcast_pal.core.podcast import Episode, Podcast, EPISODE_FIELDS
+
+@pytest.fixture
+def raw_episode():
+    """Create a raw episode element"""
+    return Element('outline', {
+        'title': 'Test Episode',
+        'url': 'http://audio.url',
+        'overcastUrl': 'http://overcast.url',
+        'overcastId': 'ep123',
+        'pubDate': '2024-01-01T10:00:00+01:00',
+        'progress': '50',
+        'userUpdatedDate': '2024-01-02T10:00:00+01:00',
+        'duration': '1800'
+    })
+
+def test_from_raw_data_unescapes_summary(raw_episode):
+    """Test that the page summary is unescaped once when the episode is built"""
+    episode = Episode.from_raw_data(raw_episode, 'Tips &amp; tricks &amp;lt;3')
+
+    assert episode.summary == 'Tips & tricks &lt;3'
+    assert episode.duration == 1800
+    assert episode.last_played_at == datetime.fromisoformat('2024-01-02T10:00:00+01:00')
+
+def test_to_dict_is_shallow(raw_episode):
+    """Test that serialization shares values instead of copying them"""
+    episode = Episode.from_raw_data(raw_episode, 'Summary')
+
+    data = episode.to_dict()
+
+    assert list(data) == list(EPISODE_FIELDS)
+    assert data['published_date'] is episode.published_date
+    assert data['summary'] is episode.summary
+
+def test_models_are_slotted(raw_episode):
+    """Test that models carry no per-instance __dict__"""
+    episode = Episode.from_raw_data(raw_episode, 'Summary')
+    podcast = Podcast(title='Test', artwork_url='', episodes=[episode], created_at=datetime.now())
+
+    assert not hasattr(episode, '__dict__')
+    assert not hasattr(podcast, '__dict__')
+    with pytest.raises(AttributeError):
+        episode.unknown = 1
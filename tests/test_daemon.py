@@ -0,0 +1,84 @@
+"""Tests for watch mode"""
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from podcast_pal.auth.session import LOGIN_URL, ReauthenticatingSession
+from podcast_pal.core.exceptions import FetchError
+from podcast_pal.daemon import Watcher
+from podcast_pal.fetchers.opml import OVERCAST_OPML_URL
+from podcast_pal.fetchers.transport import TransportStats
+
+@pytest.fixture
+def mock_context():
+    """Create a mock sync context"""
+    context = Mock()
+    context.transport_stats = TransportStats(requests=3)
+    return context
+
+def test_watcher_reuses_context(mock_context):
+    """Test that every cycle runs on the same context, closed once at the end"""
+    sync = Mock(return_value=2)
+    watcher = Watcher(mock_context, interval=0.01, jitter=0, sync=sync)
+
+    watcher.run(max_cycles=3)
+
+    assert sync.call_count == 3
+    assert all(call.args == (mock_context, True) for call in sync.call_args_list)
+    assert mock_context.reset_transport_stats.call_count == 3
+    mock_context.close.assert_called_once()
+
+def test_watcher_survives_failed_cycle(mock_context):
+    """Test that a failing cycle is reported and the loop goes on"""
+    sync = Mock(side_effect=[FetchError('down'), 1])
+    watcher = Watcher(mock_context, interval=0.01, jitter=0, sync=sync)
+
+    first = watcher.run_cycle(1)
+    second = watcher.run_cycle(2)
+
+    assert first.failed and first.updated == 0
+    assert not second.failed and second.updated == 1
+    assert second.requests == 3
+
+def test_watcher_stop_ends_loop(mock_context):
+    """Test that stop, as called from a signal handler, exits before the next cycle"""
+    watcher = Watcher(mock_context, interval=3600, jitter=0, sync=Mock(return_value=0))
+    watcher._sync.side_effect = lambda context, incremental: watcher.stop() or 0
+
+    watcher.run()
+
+    assert watcher._sync.call_count == 1
+    mock_context.close.assert_called_once()
+
+def test_next_delay_jitter(mock_context):
+    """Test that the delay stays within the configured jitter"""
+    watcher = Watcher(mock_context, interval=100, jitter=0.2)
+
+    with patch('podcast_pal.daemon.random.uniform', side_effect=lambda low, high: high):
+        assert watcher.next_delay() == pytest.approx(120)
+    assert all(80 <= watcher.next_delay() <= 120 for _ in range(50))
+
+@pytest.mark.parametrize("interval,jitter", [(0, 0.1), (60, 1.5)])
+def test_watcher_rejects_invalid_schedule(mock_context, interval, jitter):
+    """Test validation of the interval and jitter"""
+    with pytest.raises(ValueError):
+        Watcher(mock_context, interval=interval, jitter=jitter)
+
+def test_watcher_reauthenticates_in_every_cycle(mock_context):
+    """Test that a session expiring again in a later cycle logs in again instead of failing"""
+    reauthenticate = Mock()
+    mock_context.session = ReauthenticatingSession(reauthenticate)
+    expired = Mock(spec=requests.Response, status_code=200, url=LOGIN_URL)
+    export = Mock(spec=requests.Response, status_code=200, url=OVERCAST_OPML_URL)
+    seen = []
+
+    def sync(context, incremental):
+        seen.append(context.session.get(OVERCAST_OPML_URL))
+        return 1
+
+    watcher = Watcher(mock_context, interval=0.01, jitter=0, sync=sync)
+    with patch.object(requests.Session, 'request', side_effect=[expired, export, expired, export]):
+        watcher.run(max_cycles=2)
+
+    assert reauthenticate.call_count == 2
+    assert seen == [export, export]
@@ -0,0 +1,89 @@
+"""Tests for diffing consecutive OPML exports"""
+from datetime import datetime
+from xml.etree.ElementTree import Element, SubElement
+
+from podcast_pal.diff import (
+    ChangeSet,
+    EpisodeState,
+    EpisodeStateRecorder,
+    apply_change_set,
+    diff_episode_states
+)
+
+def make_state(played=True, progress='100', updated='2024-01-01T10:00:00+01:00'):
+    return EpisodeState('Test Podcast', played, progress, updated)
+
+def test_recorder_captures_episode_state():
+    """Test that the recorder keys episode state by overcastId"""
+    podcast = Element('outline', {'type': 'rss', 'title': 'Test Podcast'})
+    episode = SubElement(podcast, 'outline', {
+        'overcastId': 'ep1', 'played': '1', 'progress': '42', 'userUpdatedDate': '2024-01-01T10:00:00+01:00'
+    })
+    SubElement(podcast, 'outline', {'played': '1'})
+
+    recorder = EpisodeStateRecorder()
+    for child in podcast:
+        recorder(podcast, child)
+
+    assert recorder.states == {'ep1': EpisodeState('Test Podcast', True, '42', episode.get('userUpdatedDate'))}
+    assert recorder.to_tuples() == {'ep1': ('Test Podcast', True, '42', '2024-01-01T10:00:00+01:00')}
+
+def test_recorder_restores_saved_states():
+    """Test that states saved as tuples are recorded back unchanged"""
+    recorder = EpisodeStateRecorder()
+    recorder.restore({'ep1': tuple(make_state())})
+
+    assert recorder.states == {'ep1': make_state()}
+
+def test_diff_episode_states():
+    """Test that added, newly played and progressed episodes are told apart"""
+    previous = {
+        'same': tuple(make_state()),
+        'played': tuple(make_state(played=False, progress='10')),
+        'progress': tuple(make_state(played=False, progress='10')),
+        'gone': tuple(make_state())
+    }
+    current = {
+        'same': make_state(),
+        'played': make_state(progress='10'),
+        'progress': make_state(played=False, progress='20'),
+        'new': make_state()
+    }
+
+    change_set = diff_episode_states(previous, current)
+
+    assert set(change_set.added) == {'new'}
+    assert set(change_set.newly_played) == {'played'}
+    assert set(change_set.progress_changed) == {'progress'}
+    assert change_set.changed_ids == {'new', 'played', 'progress'}
+    assert len(change_set) == 3
+
+def test_diff_identical_exports_is_empty():
+    """Test that identical exports produce an empty change set"""
+    states = {'ep1': make_state()}
+    change_set = diff_episode_states({'ep1': tuple(states['ep1'])}, states)
+
+    assert not change_set
+    assert change_set.changed_ids == set()
+
+def test_progress_updates():
+    """Test that progress updates carry the parsed activity time"""
+    change_set = ChangeSet(progress_changed={'ep1': make_state(progress='30')})
+
+    progress, last_played_at = change_set.progress_updates()['ep1']
+
+    assert progress == '30'
+    assert isinstance(last_played_at, datetime)
+
+def test_apply_change_set():
+    """Test that unchanged episodes and podcasts without changes are dropped"""
+    changed = Element('outline', {'title': 'Changed'})
+    SubElement(changed, 'outline', {'overcastId': 'ep1'})
+    SubElement(changed, 'outline', {'overcastId': 'ep2'})
+    unchanged = Element('outline', {'title': 'Unchanged'})
+    SubElement(unchanged, 'outline', {'overcastId': 'ep3'})
+
+    result = apply_change_set([changed, unchanged], ChangeSet(added={'ep1': make_state()}))
+
+    assert result == [changed]
+    assert [episode.get('overcastId') for episode in changed] == ['ep1']
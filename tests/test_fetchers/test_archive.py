@@ -0,0 +1,83 @@
+"""Tests for HTTP record and replay"""
+import pytest
+import requests
+
+from benchmarks.stub_server import StubOvercastServer, EXPORT_PATH
+from podcast_pal.core.exceptions import StorageError
+from podcast_pal.fetchers.archive import (
+    ArchivedResponse,
+    HttpArchive,
+    RecordingAdapter,
+    ReplayAdapter,
+    open_archive_adapter
+)
+
+def make_session(adapter):
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def test_record_save_load_and_replay(tmp_path):
+    """Test that recorded traffic is replayed offline with the same bodies and headers"""
+    archive = HttpArchive()
+    with StubOvercastServer(opml='<opml>café</opml>') as server:
+        session = make_session(RecordingAdapter(archive, pool_size=2))
+        export = session.get(server.base_url + EXPORT_PATH)
+        page = session.get(server.base_url + '/+3-1', stream=True)
+        page_body = b''.join(page.iter_content(1024))
+        missing = session.get(server.base_url + '/nope')
+    path = str(tmp_path / 'overcast.archive.gz')
+    archive.save(path)
+
+    replayed = HttpArchive.load(path)
+    assert len(replayed) == 3
+    assert replayed.recorded_at == archive.recorded_at
+    session = make_session(ReplayAdapter(replayed))
+    assert session.get(server.base_url + EXPORT_PATH).text == export.text
+    streamed = session.get(server.base_url + '/+3-1', stream=True)
+    assert b''.join(streamed.iter_content(1024)) == page_body
+    assert streamed.headers['Content-Type'] == page.headers['Content-Type']
+    assert session.get(server.base_url + '/nope').status_code == missing.status_code == 404
+
+def test_archive_keeps_no_cookies_or_request_bodies():
+    """Test that only whitelisted response headers are archived"""
+    archive = HttpArchive()
+    archive.record(ArchivedResponse('POST', 'https://overcast.fm/login', 200, {'Location': '/podcasts'}, b''))
+    session = make_session(ReplayAdapter(archive))
+
+    response = session.post('https://overcast.fm/login', data={'password': 'secret'}, allow_redirects=False)
+
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+
+def test_replay_serves_repeated_requests_in_order():
+    archive = HttpArchive()
+    archive.record(ArchivedResponse('GET', 'https://overcast.fm/a', 200, {}, b'first'))
+    archive.record(ArchivedResponse('GET', 'https://overcast.fm/a', 304, {}, b''))
+    session = make_session(ReplayAdapter(archive))
+
+    assert [session.get('https://overcast.fm/a').status_code for _ in range(3)] == [200, 304, 304]
+    archive.rewind()
+    assert session.get('https://overcast.fm/a').content == b'first'
+
+def test_replay_counts_misses_and_simulates_latency():
+    sleeps = []
+    adapter = ReplayAdapter(HttpArchive(), latency=0.05, sleep=sleeps.append)
+
+    assert make_session(adapter).get('https://overcast.fm/missing').status_code == 404
+    assert adapter.misses == 1
+    assert sleeps == [0.05]
+
+def test_load_rejects_unreadable_archive(tmp_path):
+    path = tmp_path / 'broken.gz'
+    path.write_bytes(b'not gzip')
+    with pytest.raises(StorageError):
+        HttpArchive.load(str(path))
+
+def test_open_archive_adapter_modes(tmp_path):
+    assert open_archive_adapter() == (None, None)
+    adapter, archive = open_archive_adapter(record=str(tmp_path / 'a.gz'))
+    assert isinstance(adapter, RecordingAdapter) and adapter.archive is archive
+    with pytest.raises(ValueError):
+        open_archive_adapter(record='a.gz', replay='b.gz')
@@ -4,27 +4,28 @@ import requests
 from unittest.mock import Mock, patch
 
 from podcast_pal.fetchers.artwork import get_artwork_url
+from tests.helpers import make_page_response
 
 @pytest.fixture
 def mock_session():
     """Create a mock session"""
     session = Mock()
-    session.get.return_value.text = '''
+    session.get.return_value = make_page_response('''
         <html>
             <img class="art fullart" src="http://artwork.url/image.jpg">
         </html>
-    '''
+    ''')
     return session
 
 def test_get_artwork_url_success(mock_session):
     """Test successful artwork URL extraction"""
     url = get_artwork_url('http://overcast.fm/episode', mock_session)
     assert url == 'http://artwork.url/image.jpg'
-    mock_session.get.assert_called_once_with('http://overcast.fm/episode')
+    mock_session.get.assert_called_once_with('http://overcast.fm/episode', stream=True)
 
 def test_get_artwork_url_not_found(mock_session):
     """Test when artwork URL is not found"""
-    mock_session.get.return_value.text = '<html>No artwork here</html>'
+    mock_session.get.return_value = make_page_response('<html>No artwork here</html>')
     url = get_artwork_url('http://overcast.fm/episode', mock_session)
     assert url == ''
 
@@ -6,10 +6,19 @@ from unittest.mock import Mock, patch
 from podcast_pal.fetchers.opml import (
     fetch_opml,
     parse_opml,
+    iter_opml,
     _handle_failed_response,
     OVERCAST_OPML_URL
 )
 from podcast_pal.core.exceptions import FetchError
+from podcast_pal.storage.cache import force_read_cache, get_conditional_headers
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path):
+    """Keep the OPML cache in a temporary directory"""
+    path = str(tmp_path / 'overcast.opml')
+    with patch('podcast_pal.storage.cache.CACHE_PATH', path):
+        yield path
 
 @pytest.fixture
 def mock_session():
@@ -17,6 +26,7 @@ def mock_session():
     session = Mock()
     response = Mock(spec=requests.Response)
     response.status_code = 200
+    response.headers = {}
     response.text = '''<?xml version="1.0" encoding="utf-8"?>
         <opml version="1.0">
             <body>
@@ -66,4 +76,85 @@ def test_parse_opml_valid():
 def test_parse_opml_invalid():
     """Test parsing invalid OPML content"""
     with pytest.raises(FetchError):
-        parse_opml("invalid xml content") 
\ No newline at end of file
+        parse_opml("invalid xml content") 
+
+EXTENDED_OPML = '''<?xml version="1.0" encoding="utf-8"?>
+    <opml version="1.0">
+        <head><title>Overcast Podcast Subscriptions</title></head>
+        <body>
+            <outline text="feeds">
+                <outline type="rss" title="Podcast 1">
+                    <outline type="podcast-episode" overcastId="1" played="1"/>
+                    <outline type="podcast-episode" overcastId="2" played="0"/>
+                </outline>
+                <outline type="rss" title="Podcast 2">
+                    <outline type="podcast-episode" overcastId="3" played="0"/>
+                </outline>
+            </outline>
+        </body>
+    </opml>'''
+
+def test_iter_opml_filters_episodes():
+    """Test streaming parse keeps only episodes accepted by the filter"""
+    podcasts = list(iter_opml(EXTENDED_OPML, episode_filter=lambda ep: ep.get('played') == '1'))
+
+    assert [podcast.attrib['title'] for podcast in podcasts] == ['Podcast 1', 'Podcast 2']
+    assert [ep.attrib['overcastId'] for ep in podcasts[0]] == ['1']
+    assert list(podcasts[1]) == []
+
+def test_iter_opml_without_filter_matches_parse_opml():
+    """Test streaming parse without a filter yields the same podcasts as parse_opml"""
+    streamed = list(iter_opml(EXTENDED_OPML))
+    parsed = parse_opml(EXTENDED_OPML)
+
+    assert [p.attrib for p in streamed] == [p.attrib for p in parsed]
+    assert [len(p) for p in streamed] == [len(p) for p in parsed]
+
+def test_iter_opml_reports_filtered_episodes():
+    """Test that the episode hook sees every episode, including filtered ones"""
+    seen = []
+    podcasts = list(iter_opml(
+        EXTENDED_OPML,
+        episode_filter=lambda ep: ep.get('played') == '1',
+        on_episode=lambda podcast, ep: seen.append((podcast.get('title'), ep.get('overcastId')))
+    ))
+
+    assert seen == [('Podcast 1', '1'), ('Podcast 1', '2'), ('Podcast 2', '3')]
+    assert sum(len(podcast) for podcast in podcasts) == 1
+
+def test_iter_opml_small_chunks():
+    """Test that podcasts split across feed chunks are parsed correctly"""
+    with patch('podcast_pal.fetchers.opml.PARSE_CHUNK_SIZE', 7):
+        podcasts = list(iter_opml(EXTENDED_OPML))
+    assert len(podcasts) == 2
+
+def test_iter_opml_invalid():
+    """Test streaming parse of invalid OPML content"""
+    with pytest.raises(FetchError):
+        list(iter_opml("<opml><body>"))
+
+
+def test_fetch_opml_stores_validators(mock_session):
+    """Test that ETag and Last-Modified are kept for the next request"""
+    mock_session.get.return_value.headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+    fetch_opml(mock_session)
+
+    assert get_conditional_headers() == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+
+def test_fetch_opml_not_modified_uses_cache(mock_session):
+    """Test that a 304 answer to a conditional request is served from cache"""
+    mock_session.get.return_value.headers = {'ETag': '"v1"'}
+    fetch_opml(mock_session)
+    cached = force_read_cache()
+
+    not_modified = Mock(spec=requests.Response)
+    not_modified.status_code = 304
+    mock_session.get.return_value = not_modified
+    response = fetch_opml(mock_session)
+
+    assert response.text == cached
+    mock_session.get.assert_called_with(OVERCAST_OPML_URL, headers={'If-None-Match': '"v1"'})
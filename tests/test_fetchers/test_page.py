@@ -0,0 +1,106 @@
+"""Tests for episode page metadata extraction"""
+import pytest
+import requests
+from unittest.mock import Mock
+
+from podcast_pal.fetchers.page import (
+    PageMetadata,
+    PageMetadataCache,
+    extract_page_metadata,
+    get_page_metadata,
+    read_page
+)
+from podcast_pal.fetchers.artwork import get_artwork_url
+from podcast_pal.fetchers.summary import get_episode_summary
+from tests.helpers import make_page_response
+
+PAGE_CONTENT = '''
+    <html>
+        <meta name="og:title" content="Test Episode">
+        <meta name="og:description" content="Test episode summary">
+        <img class="art fullart" src="http://artwork.url/image.jpg">
+    </html>
+'''
+
+@pytest.fixture
+def mock_session():
+    """Create a mock session returning a full episode page"""
+    session = Mock()
+    session.get.return_value = make_page_response(PAGE_CONTENT)
+    return session
+
+def test_extract_page_metadata():
+    """Test that all fields are extracted in one pass"""
+    metadata = extract_page_metadata(PAGE_CONTENT)
+    assert metadata == PageMetadata(
+        artwork_url='http://artwork.url/image.jpg',
+        description='Test episode summary',
+        title='Test Episode'
+    )
+
+def test_get_page_metadata_request_error(mock_session):
+    """Test that fetch failures return None"""
+    mock_session.get.side_effect = requests.RequestException()
+    assert get_page_metadata('http://overcast.fm/episode', mock_session) is None
+
+def test_page_cache_shared_between_fetchers(mock_session):
+    """Test that artwork and summary of the same page cost a single request"""
+    page_cache = PageMetadataCache()
+
+    artwork = get_artwork_url('http://overcast.fm/episode', mock_session, page_cache=page_cache)
+    summary = get_episode_summary('http://overcast.fm/episode', 'Default', mock_session, page_cache=page_cache)
+
+    assert artwork == 'http://artwork.url/image.jpg'
+    assert summary == 'Test episode summary'
+    mock_session.get.assert_called_once_with('http://overcast.fm/episode', stream=True)
+    assert (page_cache.hits, page_cache.misses) == (1, 1)
+
+def test_page_cache_memoizes_failures(mock_session):
+    """Test that a failed page is not fetched again in the same run"""
+    mock_session.get.side_effect = requests.RequestException()
+    page_cache = PageMetadataCache()
+
+    get_page_metadata('http://overcast.fm/episode', mock_session, page_cache)
+    get_page_metadata('http://overcast.fm/episode', mock_session, page_cache)
+
+    assert mock_session.get.call_count == 1
+
+def test_extract_stops_at_closing_quote():
+    """Test that captures end at the attribute's closing quote"""
+    metadata = extract_page_metadata('<img class="art fullart" src="http://a/b.jpg" alt="Art">')
+    assert metadata.artwork_url == 'http://a/b.jpg'
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_page_scanner_matches_across_chunks(chunk_size):
+    """Test that fields split over chunk boundaries are still found"""
+    response = make_page_response(PAGE_CONTENT, chunk_size=chunk_size)
+
+    scanner = read_page(response)
+
+    assert scanner.metadata() == extract_page_metadata(PAGE_CONTENT)
+
+def test_read_page_closes_early():
+    """Test that the download stops once every requested field is found"""
+    content = PAGE_CONTENT + '<p>' + 'x' * 100000 + '</p>'
+    response = make_page_response(content, chunk_size=64)
+
+    scanner = read_page(response, fields=frozenset({'title'}))
+
+    assert scanner.metadata().title == 'Test Episode'
+    assert len(scanner.content) < 200
+    response.close.assert_called_once()
+
+def test_read_page_reads_whole_page_for_missing_field():
+    """Test that a missing field leaves the other fields intact"""
+    response = make_page_response('<meta name="og:title" content="Only title">', chunk_size=5)
+
+    metadata = read_page(response).metadata()
+
+    assert metadata == PageMetadata(title='Only title')
+
+def test_get_page_metadata_error_status(mock_session):
+    """Test that error pages are not parsed"""
+    mock_session.get.return_value = make_page_response(PAGE_CONTENT, status_code=500)
+
+    assert get_page_metadata('http://overcast.fm/episode', mock_session) is None
+    mock_session.get.return_value.iter_content.assert_not_called()
@@ -4,16 +4,17 @@ import requests
 from unittest.mock import Mock, patch
 
 from podcast_pal.fetchers.summary import get_episode_summary
+from tests.helpers import make_page_response
 
 @pytest.fixture
 def mock_session():
     """Create a mock session"""
     session = Mock()
-    session.get.return_value.text = '''
+    session.get.return_value = make_page_response('''
         <html>
             <meta name="og:description" content="Test episode summary">
         </html>
-    '''
+    ''')
     return session
 
 def test_get_summary_success(mock_session):
@@ -24,11 +25,11 @@ def test_get_summary_success(mock_session):
         mock_session
     )
     assert summary == 'Test episode summary'
-    mock_session.get.assert_called_once_with('http://overcast.fm/episode')
+    mock_session.get.assert_called_once_with('http://overcast.fm/episode', stream=True)
 
 def test_get_summary_not_found(mock_session):
     """Test when summary is not found"""
-    mock_session.get.return_value.text = '<html>No summary here</html>'
+    mock_session.get.return_value = make_page_response('<html>No summary here</html>')
     summary = get_episode_summary(
         'http://overcast.fm/episode',
         'Default Title',
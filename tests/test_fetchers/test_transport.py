@@ -0,0 +1,190 @@
+"""Tests for HTTP transport helpers"""
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import Mock
+
+from podcast_pal.fetchers.transport import (
+    HostLimitedSession,
+    HostRateLimiter,
+    TokenBucket,
+    Transport,
+    limit_per_host,
+    make_pool_adapter,
+    parse_retry_after
+)
+
+def make_response(status_code, headers=None):
+    """Create a mock response"""
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = b''
+    return response
+
+@pytest.fixture
+def sleeps():
+    """Record requested sleeps instead of sleeping"""
+    return []
+
+@pytest.fixture
+def transport(sleeps):
+    """Create a transport over a mock session without real sleeping"""
+    return Transport(Mock(), max_per_host=2, rate_per_host=1000, sleep=sleeps.append)
+
+def test_host_limited_session_delegates_get():
+    """Test that requests are passed through to the wrapped session"""
+    session = Mock()
+    limited = HostLimitedSession(session, max_per_host=2)
+
+    response = limited.get('http://overcast.fm/episode', timeout=5)
+
+    assert response is session.get.return_value
+    session.get.assert_called_once_with('http://overcast.fm/episode', timeout=5)
+
+def test_host_limited_session_caps_concurrency():
+    """Test that no more than max_per_host requests run at once per host"""
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_get(url):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    session = Mock()
+    session.get.side_effect = slow_get
+    limited = HostLimitedSession(session, max_per_host=2)
+
+    threads = [threading.Thread(target=limited.get, args=('http://overcast.fm/x',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+
+def test_limit_per_host_reuses_wrapper():
+    """Test that an already limited session is not wrapped twice"""
+    limited = limit_per_host(Mock(), 2)
+    assert limit_per_host(limited, 4) is limited
+
+def test_host_limited_session_invalid_limit():
+    """Test that a non-positive limit is rejected"""
+    with pytest.raises(ValueError):
+        HostLimitedSession(Mock(), 0)
+
+def test_transport_mounts_pool():
+    """Test that a pool sized to the configured concurrency is mounted"""
+    session = Mock()
+    Transport(session, max_per_host=2, pool_size=8)
+
+    adapter = session.mount.call_args[0][1]
+    assert adapter._pool_maxsize == 8
+    assert adapter._pool_block is True
+
+def test_transport_sets_default_timeout(transport):
+    """Test that requests get a default timeout"""
+    transport.session.get.return_value = make_response(200)
+    transport.get('http://overcast.fm/episode')
+    transport.session.get.assert_called_once_with('http://overcast.fm/episode', timeout=30)
+
+def test_transport_counts_received_bytes(transport):
+    """Test that body sizes of non-streamed responses are counted"""
+    response = make_response(200)
+    response.content = b'x' * 10
+    transport.session.get.return_value = response
+
+    transport.get('http://overcast.fm/episode')
+    transport.get('http://overcast.fm/episode', stream=True)
+
+    assert transport.stats.bytes_received == 10
+
+def test_transport_honors_retry_after(transport, sleeps):
+    """Test that a 429 is retried after the server-provided delay"""
+    transport.session.get.side_effect = [make_response(429, {'Retry-After': '7'}), make_response(200)]
+
+    response = transport.get('http://overcast.fm/episode')
+
+    assert response.status_code == 200
+    assert sleeps == [7.0]
+    assert transport.stats.retries == 1
+    assert transport.stats.requests == 2
+
+def test_transport_backs_off_on_connection_error(transport, sleeps):
+    """Test exponential backoff on connection errors until retries run out"""
+    transport.session.get.side_effect = requests.ConnectionError()
+
+    with pytest.raises(requests.ConnectionError):
+        transport.get('http://overcast.fm/episode')
+
+    assert len(sleeps) == transport.max_retries
+    assert sleeps[0] < sleeps[1] < sleeps[2] <= 4
+
+def test_transport_returns_last_error_response(transport):
+    """Test that the final failing response is returned once retries run out"""
+    transport.session.get.return_value = make_response(503)
+
+    response = transport.get('http://overcast.fm/episode')
+
+    assert response.status_code == 503
+    assert transport.session.get.call_count == transport.max_retries + 1
+
+def test_transport_throttles_per_host(sleeps):
+    """Test that the token bucket delays requests beyond the rate"""
+    session = Mock()
+    session.get.return_value = make_response(200)
+    transport = Transport(session, max_per_host=2, rate_per_host=1, sleep=sleeps.append)
+
+    transport.get('http://overcast.fm/a')
+    transport.get('http://overcast.fm/b')
+    transport.get('http://other.host/a')
+
+    assert transport.stats.throttle_waits == 1
+    assert sleeps[0] == pytest.approx(1, abs=0.1)
+
+def test_token_bucket_refills():
+    """Test that tokens refill over time"""
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=1, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    now[0] = 1.0
+    assert bucket.reserve() == 0
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('12', 12.0),
+    ('-3', 0.0),
+    ('100000', 300.0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0.0),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    """Test parsing Retry-After values"""
+    assert parse_retry_after(value) == expected
+
+def test_transports_share_limiter_and_adapter(sleeps):
+    """Test that transports given one limiter and adapter share the rate and the pool"""
+    limiter = HostRateLimiter(rate_per_host=1)
+    adapter = make_pool_adapter(4)
+    first_session, second_session = Mock(), Mock()
+    first = Transport(first_session, max_per_host=2, sleep=sleeps.append, adapter=adapter, limiter=limiter)
+    second = Transport(second_session, max_per_host=2, sleep=sleeps.append, adapter=adapter, limiter=limiter)
+    first.session.get.return_value = make_response(200)
+    second.session.get.return_value = make_response(200)
+
+    first.get('http://overcast.fm/a')
+    second.get('http://overcast.fm/b')
+
+    assert second.stats.throttle_waits == 1
+    assert sleeps[0] == pytest.approx(1, abs=0.1)
+    assert first_session.mount.call_args[0][1] is adapter
+    assert second_session.mount.call_args[0][1] is adapter
@@ -0,0 +1,199 @@
+"""Tests for a whole sync run, with Overcast replayed from an archive and an in-memory collection"""
+import functools
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest.mock import patch
+
+from benchmarks.opml_generator import generate_opml
+from benchmarks.replay import ReplayContext
+from benchmarks.storage import InMemoryCollection
+from podcast_pal.auth.session import LOGIN_URL
+from podcast_pal.core.exceptions import StorageError
+from podcast_pal.daemon import Watcher
+from podcast_pal.fetchers.archive import ArchivedResponse, HttpArchive
+from podcast_pal.fetchers.opml import OVERCAST_OPML_URL, parse_opml
+from podcast_pal.main import parse_podcasts, sync_context
+from podcast_pal.diff import EpisodeStateRecorder
+from podcast_pal.metrics import metrics
+from podcast_pal.pipeline import SyncPipeline
+from podcast_pal.processor import RecentlyPlayedFilter
+from podcast_pal.storage import mongodb
+from podcast_pal.storage.cache import cache_opml, is_opml_processed, load_episode_states
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+EPISODE_PAGE = '<meta name="og:description" content="Notes for {url}"><img class="art fullart" src="{url}.jpg">'
+
+def make_archive(opml: str) -> HttpArchive:
+    """Archive answering the login, the export and the page of every episode in `opml`"""
+    archive = HttpArchive(NOW)
+    archive.record(ArchivedResponse('POST', LOGIN_URL, 200, {}, b''))
+    archive.record(ArchivedResponse('GET', OVERCAST_OPML_URL, 200, {}, opml.encode('utf-8')))
+    for podcast in parse_opml(opml):
+        for episode in podcast:
+            url = episode.get('overcastUrl')
+            archive.record(ArchivedResponse('GET', url, 200, {'Content-Type': 'text/html; charset=utf-8'},
+                                            EPISODE_PAGE.format(url=url).encode('utf-8')))
+    return archive
+
+def add_episode(opml: str, overcast_id: str, played_at: datetime) -> str:
+    """Add a played episode to the first podcast of `opml`"""
+    episode = (
+        f'                <outline type="podcast-episode" overcastId="{overcast_id}" '
+        f'pubDate="{played_at.isoformat()}" title="New episode" '
+        f'url="https://media.example.com/{overcast_id}.mp3" overcastUrl="https://overcast.fm/+{overcast_id}" '
+        f'userUpdatedDate="{played_at.isoformat()}" progress="0" played="1" duration="600"/>\n'
+    )
+    return opml.replace('            </outline>\n', episode + '            </outline>\n', 1)
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return str(tmp_path)
+
+@pytest.fixture
+def collection():
+    return InMemoryCollection()
+
+@pytest.fixture
+def opml():
+    return generate_opml(3, 2, played_ratio=1.0, recent_ratio=1.0, now=NOW)
+
+@pytest.fixture
+def stored_batches():
+    """Batches handed to `update_podcasts`, as lists of (title, overcast ids)"""
+    batches = []
+    update_podcasts = mongodb.update_podcasts
+
+    def record(collection, podcasts, *args, **kwargs):
+        batches.append([(podcast.title, [episode.overcast_id for episode in podcast.episodes])
+                        for podcast in podcasts])
+        return update_podcasts(collection, podcasts, *args, **kwargs)
+
+    with patch.object(mongodb, 'update_podcasts', side_effect=record):
+        yield batches
+
+@pytest.fixture
+def requested_urls():
+    """URLs answered from any archive"""
+    urls = []
+    next_response = HttpArchive.next_response
+
+    def record(archive, method, url):
+        urls.append(url)
+        return next_response(archive, method, url)
+
+    with patch.object(HttpArchive, 'next_response', autospec=True, side_effect=record):
+        yield urls
+
+def run(opml: str, state_dir: str, collection, incremental: bool = True) -> int:
+    """Sync `opml` as a new process would, after the cached export has expired"""
+    context = ReplayContext(make_archive(opml), 0.0, state_dir, collection)
+    if os.path.exists(context.opml_cache_path):
+        os.utime(context.opml_cache_path, (0, 0))
+    try:
+        return sync_context(context, incremental)
+    finally:
+        context.close()
+
+def page_urls(urls):
+    return [url for url in urls if '/+' in url]
+
+def test_unchanged_export_fetches_nothing(opml, state_dir, collection, stored_batches, requested_urls):
+    """A second run of the same export stops after downloading it"""
+    assert run(opml, state_dir, collection) == 3
+    requested_urls.clear()
+    stored_batches.clear()
+
+    assert run(opml, state_dir, collection) == 0
+    assert page_urls(requested_urls) == []
+    assert stored_batches == []
+
+def test_diff_narrows_processed_episodes(opml, state_dir, collection, stored_batches, requested_urls):
+    """Only the new episode is fetched and stored, and idle podcasts are skipped"""
+    run(opml, state_dir, collection)
+    requested_urls.clear()
+    stored_batches.clear()
+
+    assert run(add_episode(opml, '0-new', NOW - timedelta(seconds=30)), state_dir, collection) == 1
+    assert page_urls(requested_urls) == ['https://overcast.fm/+0-new']
+    assert stored_batches == [[('Podcast 0 & Friends', ['0-new'])]]
+
+def test_state_saved_only_after_commit(opml, state_dir, collection):
+    """A failed write leaves marks and episode states as they were, so the next run redoes the work"""
+    cache_path = os.path.join(state_dir, 'overcast.opml')
+    with patch.object(mongodb, 'update_podcasts', side_effect=StorageError('write failed')):
+        with pytest.raises(StorageError):
+            run(opml, state_dir, collection)
+
+    assert not os.path.exists(os.path.join(state_dir, 'state.json'))
+    assert load_episode_states(cache_path) is None
+    assert not is_opml_processed(opml, cache_path)
+
+    assert run(opml, state_dir, collection) == 3
+    assert os.path.exists(os.path.join(state_dir, 'state.json'))
+    assert load_episode_states(cache_path) is not None
+    assert is_opml_processed(opml, cache_path)
+
+def test_failed_run_resumes_from_journal(opml, state_dir, collection, stored_batches, requested_urls):
+    """A rerun stores only the podcasts the failed run did not, without fetching their pages again"""
+    update_podcasts = mongodb.update_podcasts.side_effect
+    calls = iter([update_podcasts, StorageError('write failed')])
+
+    def fail_second_batch(*args):
+        outcome = next(calls, None)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return update_podcasts(*args)
+
+    with patch('podcast_pal.main.SyncPipeline', functools.partial(SyncPipeline, batch_size=1, max_workers=1)):
+        with patch.object(mongodb, 'update_podcasts', side_effect=fail_second_batch):
+            with pytest.raises(StorageError):
+                run(opml, state_dir, collection, incremental=False)
+        [[(completed, completed_ids)]] = stored_batches
+        # Without the page cache only the journal can spare the completed podcast's pages
+        os.remove(os.path.join(state_dir, 'pages.sqlite'))
+        stored_batches.clear()
+        requested_urls.clear()
+
+        assert run(opml, state_dir, collection, incremental=False) == 2
+
+    stored_titles = [title for batch in stored_batches for title, _ in batch]
+    assert sorted(stored_titles) == sorted({'Podcast 0 & Friends', 'Podcast 1 & Friends',
+                                            'Podcast 2 & Friends'} - {completed})
+    assert not any(url.endswith(tuple(f"+{overcast_id}" for overcast_id in completed_ids))
+                   for url in page_urls(requested_urls))
+    assert len(collection.documents) == 3
+
+def test_watch_cycles_pick_up_a_changed_export(opml, state_dir, collection, stored_batches):
+    """Each watch cycle asks for the export again instead of reusing the fresh cached copy"""
+    changed = add_episode(opml, '0-new', NOW - timedelta(seconds=30))
+    archive = make_archive(opml)
+    # Served once the first export has been, as if it changed between the cycles
+    archive.record(ArchivedResponse('GET', OVERCAST_OPML_URL, 200, {}, changed.encode('utf-8')))
+    archive.record(ArchivedResponse('GET', 'https://overcast.fm/+0-new', 200, {},
+                                    EPISODE_PAGE.format(url='https://overcast.fm/+0-new').encode('utf-8')))
+    context = ReplayContext(archive, 0.0, state_dir, collection)
+    watcher = Watcher(context, interval=0.01, jitter=0, incremental=True)
+    try:
+        reports = [watcher.run_cycle(cycle) for cycle in (1, 2)]
+    finally:
+        context.close()
+
+    assert [report.updated for report in reports] == [3, 1]
+    assert stored_batches[-1] == [('Podcast 0 & Friends', ['0-new'])]
+
+def test_incremental_parse_reuses_snapshot(opml, state_dir):
+    """A recorder is restored from the snapshot, including episodes the filter drops"""
+    cache_path = os.path.join(state_dir, 'overcast.opml')
+    opml = add_episode(opml, '0-old', NOW - timedelta(days=365))
+    cache_opml(opml, cache_path=cache_path)
+    parsed, restored = EpisodeStateRecorder(), EpisodeStateRecorder()
+
+    first = parse_podcasts(opml, RecentlyPlayedFilter(NOW), parsed, cache_path)
+    hits = metrics.counters.get('opml_snapshot_hits', 0)
+    second = parse_podcasts(opml, RecentlyPlayedFilter(NOW), restored, cache_path)
+
+    assert metrics.counters.get('opml_snapshot_hits', 0) == hits + 1
+    assert [podcast.attrib for podcast in second] == [podcast.attrib for podcast in first]
+    assert '0-old' in restored.states
+    assert restored.states == parsed.states
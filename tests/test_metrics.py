@@ -0,0 +1,67 @@
+"""Tests for run instrumentation"""
+import json
+import pytest
+
+from podcast_pal.metrics import Metrics, profile_call
+
+@pytest.fixture
+def run_metrics():
+    """Create metrics with a few stages and counters recorded"""
+    metrics = Metrics()
+    with metrics.timer('parse'):
+        pass
+    with metrics.timer('parse'):
+        pass
+    metrics.increment('http_requests', 3)
+    metrics.increment('page_memo_hits', 3)
+    metrics.increment('page_memo_misses')
+    return metrics
+
+def test_summary(run_metrics):
+    """Test that stages accumulate and hit ratios are derived from counters"""
+    summary = run_metrics.summary()
+
+    assert set(summary['stages']) == {'parse'}
+    assert summary['counters']['http_requests'] == 3
+    assert summary['hit_ratios'] == {'page_memo': 0.75}
+    assert summary['total_seconds'] >= summary['stages']['parse']
+
+def test_timer_records_failed_stage():
+    """Test that time spent in a failing stage is still recorded"""
+    metrics = Metrics()
+    with pytest.raises(ValueError):
+        with metrics.timer('write'):
+            raise ValueError()
+    assert 'write' in metrics.summary()['stages']
+
+def test_reset(run_metrics):
+    """Test that reset starts a new run"""
+    run_metrics.reset()
+    summary = run_metrics.summary()
+    assert summary['stages'] == {} and summary['counters'] == {} and summary['hit_ratios'] == {}
+
+def test_prometheus_format(run_metrics):
+    """Test the Prometheus textfile rendering"""
+    text = run_metrics.to_prometheus()
+
+    assert 'podcast_pal_stage_seconds{stage="parse"}' in text
+    assert 'podcast_pal_http_requests 3' in text
+    assert 'podcast_pal_cache_hit_ratio{cache="page_memo"} 0.75' in text
+    assert text.endswith('\n')
+
+def test_report_writes_files(run_metrics, tmp_path):
+    """Test that report writes the JSON summary and the textfile"""
+    json_path = tmp_path / 'metrics.json'
+    prometheus_path = tmp_path / 'podcast_pal.prom'
+
+    summary = run_metrics.report(str(json_path), str(prometheus_path))
+
+    assert json.loads(json_path.read_text())['counters'] == summary['counters']
+    assert 'podcast_pal_run_seconds' in prometheus_path.read_text()
+
+def test_profile_call(tmp_path):
+    """Test that profiling returns the result and saves raw stats"""
+    output = tmp_path / 'run.prof'
+
+    assert profile_call(lambda: sum(range(10)), output=str(output)) == 45
+    assert output.exists()
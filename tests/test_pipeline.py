@@ -0,0 +1,138 @@
+"""Tests for the streaming sync pipeline"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from xml.etree.ElementTree import Element
+
+from podcast_pal.core.podcast import Podcast
+from podcast_pal.pipeline import SyncPipeline
+from podcast_pal.storage.journal import RunJournal
+
+def make_raw_podcast(title):
+    podcast = Element('outline')
+    podcast.attrib['title'] = title
+    return podcast
+
+def fake_process_podcast(raw_podcast, now, session, page_cache=None, stored_artwork=None, artwork_ttl_days=None):
+    return Podcast(title=raw_podcast.attrib['title'], artwork_url='', episodes=[], created_at=now)
+
+@pytest.fixture
+def process():
+    with patch('podcast_pal.pipeline.process_podcast', side_effect=fake_process_podcast) as process:
+        yield process
+
+def test_pipeline_stores_everything_in_batches(process):
+    """Every podcast is stored once, in batches of at most batch_size"""
+    batches = []
+    store = Mock(side_effect=lambda batch: batches.append(list(batch)) or len(batch))
+    pipeline = SyncPipeline(Mock(), store, max_workers=3, batch_size=4)
+
+    result = pipeline.run(make_raw_podcast(f"Podcast {index}") for index in range(10))
+
+    assert result.processed == 10
+    assert result.updated == 10
+    assert result.batches == len(batches) >= 3
+    assert all(len(batch) <= 4 for batch in batches)
+    stored = sorted(podcast.title for batch in batches for podcast in batch)
+    assert stored == sorted(f"Podcast {index}" for index in range(10))
+    assert result.first_write_seconds is not None
+
+def test_pipeline_flushes_partial_batch_after_timeout(process):
+    """A partial batch is written once it has waited flush_seconds"""
+    release = threading.Event()
+    first_batch_written = threading.Event()
+
+    def feed():
+        yield make_raw_podcast('Early')
+        release.wait(timeout=5)
+        yield make_raw_podcast('Late')
+
+    def store(batch):
+        first_batch_written.set()
+        release.set()
+        return len(batch)
+
+    pipeline = SyncPipeline(Mock(), store, max_workers=1, batch_size=10, flush_seconds=0.05)
+    result = pipeline.run(feed())
+
+    assert first_batch_written.is_set()
+    assert result.batches == 2
+    assert result.processed == 2
+
+def test_pipeline_bounds_queued_podcasts(process):
+    """The feeder blocks once the fetch queue is full instead of reading ahead"""
+    consumed = []
+
+    def feed():
+        for index in range(20):
+            consumed.append(index)
+            yield make_raw_podcast(f"Podcast {index}")
+
+    in_store = threading.Event()
+    resume = threading.Event()
+
+    def store(batch):
+        in_store.set()
+        resume.wait(timeout=5)
+        return len(batch)
+
+    pipeline = SyncPipeline(Mock(), store, max_workers=1, queue_depth=2, batch_size=1)
+    runner = threading.Thread(target=pipeline.run, args=(feed(),))
+    runner.start()
+    assert in_store.wait(timeout=5)
+    time.sleep(0.2)
+    # One podcast being stored, two queued for storing, one being processed,
+    # two queued for fetching and one held by the blocked feeder
+    assert len(consumed) <= 7
+    resume.set()
+    runner.join(timeout=5)
+    assert len(consumed) == 20
+
+def test_pipeline_reraises_worker_error(process):
+    """A failure while processing a podcast stops the pipeline and is re-raised"""
+    process.side_effect = RuntimeError('page fetch failed')
+    store = Mock(return_value=0)
+    pipeline = SyncPipeline(Mock(), store, max_workers=2)
+
+    with pytest.raises(RuntimeError, match='page fetch failed'):
+        pipeline.run(make_raw_podcast(f"Podcast {index}") for index in range(50))
+    store.assert_not_called()
+
+def test_pipeline_reraises_store_error(process):
+    """A failed write stops the fetch workers and is re-raised"""
+    store = Mock(side_effect=RuntimeError('write failed'))
+    pipeline = SyncPipeline(Mock(), store, max_workers=2, queue_depth=2, batch_size=1)
+
+    with pytest.raises(RuntimeError, match='write failed'):
+        pipeline.run(make_raw_podcast(f"Podcast {index}") for index in range(100))
+    assert store.call_count == 1
+    assert process.call_count < 100
+
+def test_pipeline_rejects_invalid_sizes():
+    with pytest.raises(ValueError):
+        SyncPipeline(Mock(), Mock(), batch_size=0)
+
+def test_pipeline_resumes_from_journal(process, tmp_path):
+    """Podcasts stored before a failure are skipped by the rerun"""
+    journal = RunJournal('hash:full', str(tmp_path / 'journal.sqlite'))
+    calls = []
+
+    def failing_store(batch):
+        calls.append([podcast.title for podcast in batch])
+        if len(calls) > 1:
+            raise RuntimeError('write failed')
+        return len(batch)
+
+    raw_podcasts = [make_raw_podcast(f"Podcast {index}") for index in range(4)]
+    with pytest.raises(RuntimeError):
+        SyncPipeline(Mock(), failing_store, max_workers=1, batch_size=2, journal=journal).run(raw_podcasts)
+    stored_first = calls[0]
+
+    store = Mock(side_effect=lambda batch: len(batch))
+    result = SyncPipeline(Mock(), store, max_workers=1, batch_size=2, journal=journal).run(raw_podcasts)
+
+    rerun_titles = {podcast.title for call in store.call_args_list for podcast in call.args[0]}
+    assert rerun_titles == {f"Podcast {index}" for index in range(4)} - set(stored_first)
+    assert result.processed == 2
+    journal.close()
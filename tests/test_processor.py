@@ -10,9 +10,21 @@ from podcast_pal.processor import (
     process_podcast,
     process_episode,
     should_process_episode,
-    DAYS_TO_KEEP
+    parse_activity_date,
+    RecentlyPlayedFilter,
+    select_active_podcasts,
+    get_artwork_ttl_days,
+    get_max_requests_per_host,
+    get_max_workers,
+    ARTWORK_TTL_DAYS,
+    DAYS_TO_KEEP,
+    MAX_REQUESTS_PER_HOST,
+    MAX_WORKERS
 )
-from podcast_pal.core.podcast import Podcast, Episode
+from podcast_pal.context import SyncContext
+from podcast_pal.core.exceptions import ConfigurationError
+from podcast_pal.core.podcast import Podcast, Episode, StoredArtwork
+from podcast_pal.storage.state import HighWaterMarks
 
 @pytest.fixture
 def mock_raw_episode():
@@ -107,4 +119,159 @@ def test_should_process_episode_unplayed(mock_raw_episode):
     now = datetime.now(warsaw_tz)
     mock_raw_episode.attrib['played'] = '0'
     
-    assert should_process_episode(mock_raw_episode, now) is False 
\ No newline at end of file
+    assert should_process_episode(mock_raw_episode, now) is False
+
+
+def test_process_podcasts_preserves_order(mock_raw_episode, mock_session):
+    """Test that concurrent processing returns podcasts in input order"""
+    raw_podcasts = []
+    for i in range(20):
+        podcast = Element('outline')
+        podcast.attrib['title'] = f'Podcast {i}'
+        podcast.append(mock_raw_episode)
+        raw_podcasts.append(podcast)
+
+    with patch('podcast_pal.processor.get_artwork_url', return_value='http://artwork.url'):
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcasts = process_podcasts(raw_podcasts, mock_session, max_workers=4)
+
+    assert [podcast.title for podcast in podcasts] == [f'Podcast {i}' for i in range(20)]
+
+def test_process_podcasts_sequential(mock_raw_podcast, mock_session):
+    """Test that max_workers=1 processes podcasts with the original session"""
+    with patch('podcast_pal.processor.get_artwork_url', return_value='http://artwork.url') as mock_artwork:
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcasts = process_podcasts([mock_raw_podcast], mock_session, max_workers=1)
+
+    assert len(podcasts) == 1
+    assert mock_artwork.call_args[0][1] is mock_session
+
+def test_process_podcast_idle_skips_artwork(mock_raw_podcast, mock_raw_episode, mock_session):
+    """Test that podcasts without episodes to persist do not fetch artwork"""
+    mock_raw_episode.attrib['played'] = '0'
+    now = datetime.now().astimezone()
+
+    with patch('podcast_pal.processor.get_artwork_url') as mock_artwork:
+        podcast = process_podcast(mock_raw_podcast, now, mock_session)
+
+    mock_artwork.assert_not_called()
+    assert podcast.artwork_url == ''
+    assert podcast.episodes == []
+
+def test_process_podcast_reuses_fresh_stored_artwork(mock_raw_podcast, mock_session):
+    """Test that stored artwork within the TTL is reused without fetching"""
+    now = datetime.now().astimezone()
+    stored = StoredArtwork('http://stored.url', now - timedelta(days=1))
+
+    with patch('podcast_pal.processor.get_artwork_url') as mock_artwork:
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcast = process_podcast(mock_raw_podcast, now, mock_session, stored_artwork=stored)
+
+    mock_artwork.assert_not_called()
+    assert podcast.artwork_url == 'http://stored.url'
+    assert podcast.artwork_updated_at == stored.updated_at
+
+def test_process_podcast_refreshes_stale_stored_artwork(mock_raw_podcast, mock_session):
+    """Test that stored artwork older than the TTL is fetched again"""
+    now = datetime.now().astimezone()
+    stored = StoredArtwork('http://stored.url', now - timedelta(days=ARTWORK_TTL_DAYS + 1))
+
+    with patch('podcast_pal.processor.get_artwork_url', return_value='http://artwork.url'):
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcast = process_podcast(mock_raw_podcast, now, mock_session, stored_artwork=stored)
+
+    assert podcast.artwork_url == 'http://artwork.url'
+    assert podcast.artwork_updated_at == now
+
+def test_process_podcast_stamps_legacy_stored_artwork(mock_raw_podcast, mock_session):
+    """Test that stored artwork without a fetch time is reused and stamped"""
+    now = datetime.now().astimezone()
+    stored = StoredArtwork('http://stored.url', None)
+
+    with patch('podcast_pal.processor.get_artwork_url') as mock_artwork:
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcast = process_podcast(mock_raw_podcast, now, mock_session, stored_artwork=stored)
+
+    mock_artwork.assert_not_called()
+    assert podcast.artwork_url == 'http://stored.url'
+    assert podcast.artwork_updated_at == now
+
+def test_process_podcast_artwork_ttl(mock_raw_podcast, mock_session):
+    """Test that a shorter artwork TTL refreshes artwork the default would reuse"""
+    now = datetime.now().astimezone()
+    stored = StoredArtwork('http://stored.url', now - timedelta(days=2))
+
+    with patch('podcast_pal.processor.get_artwork_url', return_value='http://artwork.url'):
+        with patch('podcast_pal.processor.get_episode_summary', return_value='Test summary'):
+            podcast = process_podcast(mock_raw_podcast, now, mock_session, stored_artwork=stored,
+                                      artwork_ttl_days=1)
+
+    assert podcast.artwork_url == 'http://artwork.url'
+
+@pytest.mark.parametrize('age', [
+    timedelta(days=DAYS_TO_KEEP, hours=23, minutes=59),
+    timedelta(days=DAYS_TO_KEEP + 1),
+    timedelta(days=DAYS_TO_KEEP + 1, seconds=1),
+    timedelta(hours=-1),
+])
+def test_recently_played_filter_cutoff(mock_raw_episode, age):
+    """Test that the precomputed cutoff matches the whole-days rule"""
+    warsaw_tz = gettz('Europe/Warsaw')
+    now = datetime.now(warsaw_tz)
+    mock_raw_episode.attrib['userUpdatedDate'] = (now - age).isoformat()
+
+    assert RecentlyPlayedFilter(now)(mock_raw_episode) is ((now - (now - age)).days <= DAYS_TO_KEEP)
+
+def test_recently_played_filter_batch(mock_raw_episode):
+    """Test filtering a batch of episodes in one pass"""
+    now = datetime.now(gettz('Europe/Warsaw'))
+    unplayed = Element('outline', dict(mock_raw_episode.attrib, played='0'))
+    old = Element('outline', dict(mock_raw_episode.attrib, userUpdatedDate=(now - timedelta(days=30)).isoformat()))
+
+    kept = RecentlyPlayedFilter(now).filter([mock_raw_episode, unplayed, old])
+
+    assert kept == [mock_raw_episode]
+
+def test_parse_activity_date_formats():
+    """Test ISO-8601 fast path, dateutil fallback and naive dates"""
+    warsaw_tz = gettz('Europe/Warsaw')
+    assert parse_activity_date('2024-01-01T10:00:00+00:00') == datetime(2024, 1, 1, 11, 0, tzinfo=warsaw_tz)
+    assert parse_activity_date('2024-01-01T10:00:00') == datetime(2024, 1, 1, 10, 0, tzinfo=warsaw_tz)
+    assert parse_activity_date('Mon, 01 Jan 2024 10:00:00 +0000') == datetime(2024, 1, 1, 11, 0, tzinfo=warsaw_tz)
+
+def test_select_active_podcasts(mock_raw_podcast, tmp_path):
+    """Test that podcasts are skipped until they have activity past their mark"""
+    marks = HighWaterMarks(str(tmp_path / 'state.json'))
+
+    assert select_active_podcasts([mock_raw_podcast], marks) == [mock_raw_podcast]
+    marks.save()
+    assert select_active_podcasts([mock_raw_podcast], marks) == []
+
+    newer = (datetime.now(gettz('Europe/Warsaw')) + timedelta(minutes=1)).isoformat()
+    mock_raw_podcast[0].attrib['userUpdatedDate'] = newer
+    assert select_active_podcasts([mock_raw_podcast], marks) == [mock_raw_podcast]
+
+def test_concurrency_from_environment():
+    """Test that SYNC_WORKERS and SYNC_REQUESTS_PER_HOST configure a context's concurrency"""
+    with patch.dict('os.environ', {'SYNC_WORKERS': '16', 'SYNC_REQUESTS_PER_HOST': '2'}):
+        context = SyncContext(Mock())
+        assert (get_max_workers(), get_max_requests_per_host()) == (16, 2)
+        assert (context.max_workers, context.max_per_host) == (16, 2)
+        assert SyncContext(Mock(), max_workers=3).max_workers == 3
+
+    with patch.dict('os.environ', {'SYNC_WORKERS': '', 'SYNC_REQUESTS_PER_HOST': ''}):
+        assert (get_max_workers(), get_max_requests_per_host()) == (MAX_WORKERS, MAX_REQUESTS_PER_HOST)
+
+def test_artwork_ttl_from_environment():
+    """Test that ARTWORK_TTL_DAYS configures a context's artwork TTL"""
+    with patch.dict('os.environ', {'ARTWORK_TTL_DAYS': '3'}):
+        assert get_artwork_ttl_days() == 3
+        assert SyncContext(Mock()).artwork_ttl_days == 3
+
+    with patch.dict('os.environ', {'ARTWORK_TTL_DAYS': ''}):
+        assert get_artwork_ttl_days() == ARTWORK_TTL_DAYS
+
+@pytest.mark.parametrize('value', ['0', '-2', 'many'])
+def test_invalid_concurrency_rejected(value):
+    with patch.dict('os.environ', {'SYNC_WORKERS': value}), pytest.raises(ConfigurationError):
+        get_max_workers()
@@ -1,9 +1,11 @@
 """Tests for cache functionality"""
+import pickle
 import pytest
 import tempfile
 import os
 from datetime import datetime, timedelta
 from unittest.mock import mock_open, patch
+from xml.etree.ElementTree import Element, SubElement
 
 from podcast_pal.storage.cache import (
     load_cached_opml, 
@@ -11,7 +13,18 @@ from podcast_pal.storage.cache import (
     is_cache_expired,
     get_cache_age,
     cache_opml,
-    CACHE_MAX_AGE_HOURS
+    is_opml_processed,
+    mark_opml_processed,
+    opml_content_hash,
+    load_opml_snapshot,
+    load_opml_snapshot_with_states,
+    save_opml_snapshot,
+    load_episode_states,
+    save_episode_states,
+    CACHE_MAX_AGE_HOURS,
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_VERSION,
+    _SNAPSHOT_HEADER
 )
 from podcast_pal.core.exceptions import StorageError
 
@@ -65,4 +78,118 @@ def test_cache_opml_failure():
     with patch('builtins.open', mock_open()) as mock_file:
         mock_file.side_effect = IOError("Failed to write")
         with pytest.raises(StorageError):
-            cache_opml("test data") 
\ No newline at end of file
+            cache_opml("test data") 
+
+def test_opml_processed_tracking(tmp_path):
+    """Test that only the exact processed export is reported as processed"""
+    with patch('podcast_pal.storage.cache.CACHE_PATH', str(tmp_path / 'overcast.opml')):
+        cache_opml("opml v1")
+        assert is_opml_processed("opml v1") is False
+
+        mark_opml_processed("opml v1")
+        assert is_opml_processed("opml v1") is True
+
+        cache_opml("opml v2")
+        assert is_opml_processed("opml v1") is True
+        assert is_opml_processed("opml v2") is False
+
+
+@pytest.fixture
+def snapshot_cache(tmp_path):
+    """Cache a raw export in a temporary directory"""
+    with patch('podcast_pal.storage.cache.CACHE_PATH', str(tmp_path / 'overcast.opml')):
+        cache_opml("opml v1")
+        yield opml_content_hash("opml v1")
+
+@pytest.fixture
+def raw_podcasts():
+    """Create parsed podcast elements"""
+    podcast = Element('outline', {'type': 'rss', 'title': 'Test Podcast'})
+    SubElement(podcast, 'outline', {'overcastId': 'ep1', 'played': '1'})
+    return [podcast]
+
+def test_snapshot_round_trip(snapshot_cache, raw_podcasts):
+    """Test that a snapshot restores the same podcast and episode attributes"""
+    cutoff = datetime.now()
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff)
+
+    loaded = load_opml_snapshot(snapshot_cache, cutoff)
+
+    assert [p.attrib for p in loaded] == [p.attrib for p in raw_podcasts]
+    assert [ep.attrib for ep in loaded[0]] == [ep.attrib for ep in raw_podcasts[0]]
+
+def test_snapshot_round_trip_with_states(snapshot_cache, raw_podcasts):
+    """Test that episode states saved with a snapshot load back with it"""
+    cutoff = datetime.now()
+    states = {'ep1': ('Test Podcast', True, '42', None), 'old': ('Test Podcast', True, None, None)}
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff, episode_states=states)
+
+    loaded, loaded_states = load_opml_snapshot_with_states(snapshot_cache, cutoff)
+
+    assert [ep.attrib for ep in loaded[0]] == [ep.attrib for ep in raw_podcasts[0]]
+    assert loaded_states == states
+
+def test_snapshot_without_states(snapshot_cache, raw_podcasts):
+    """Test that a snapshot saved without episode states cannot restore them"""
+    cutoff = datetime.now()
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff)
+
+    assert load_opml_snapshot_with_states(snapshot_cache, cutoff) is None
+    assert load_opml_snapshot(snapshot_cache, cutoff) is not None
+
+def test_snapshot_rejects_other_export(snapshot_cache, raw_podcasts):
+    """Test that a snapshot is dropped when the raw export changes"""
+    cutoff = datetime.now()
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff)
+
+    cache_opml("opml v2")
+
+    assert load_opml_snapshot(snapshot_cache, cutoff) is None
+    assert load_opml_snapshot(opml_content_hash("opml v2"), cutoff) is None
+
+def test_snapshot_rejects_later_cutoff(snapshot_cache, raw_podcasts):
+    """Test that a snapshot filtered with a later cutoff is not reused"""
+    cutoff = datetime.now()
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff)
+
+    assert load_opml_snapshot(snapshot_cache, cutoff - timedelta(days=1)) is None
+    assert load_opml_snapshot(snapshot_cache, cutoff + timedelta(hours=1)) is not None
+
+def test_snapshot_expires_with_cache(snapshot_cache, raw_podcasts):
+    """Test that a snapshot is invalid once the raw cache has expired"""
+    cutoff = datetime.now()
+    save_opml_snapshot(raw_podcasts, snapshot_cache, cutoff)
+
+    with patch('podcast_pal.storage.cache.is_cache_expired', return_value=True):
+        assert load_opml_snapshot(snapshot_cache, cutoff) is None
+
+def test_snapshot_rejects_unexpected_types(snapshot_cache, tmp_path):
+    """Test that snapshots referencing arbitrary classes are refused"""
+    with open(str(tmp_path / 'overcast.opml.snapshot'), 'wb') as f:
+        f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        pickle.dump({'sha256': snapshot_cache, 'cutoff': datetime.now()}, f)
+
+    assert load_opml_snapshot(snapshot_cache, datetime.now()) is None
+
+def test_episode_states_round_trip(tmp_path):
+    """Test that saved episode states load back unchanged"""
+    states = {'ep1': ('Test Podcast', True, '42', '2024-01-01T10:00:00+01:00')}
+    with patch('podcast_pal.storage.cache.CACHE_PATH', str(tmp_path / 'overcast.opml')):
+        assert load_episode_states() is None
+
+        save_episode_states(states)
+
+        assert load_episode_states() == states
+
+def test_cache_path_argument_keeps_caches_apart(tmp_path):
+    """Test that an explicit cache path is used instead of CACHE_PATH"""
+    default_path = str(tmp_path / 'default.opml')
+    account_path = str(tmp_path / 'account.opml')
+    with patch('podcast_pal.storage.cache.CACHE_PATH', default_path):
+        cache_opml("account export", cache_path=account_path)
+        mark_opml_processed("account export", cache_path=account_path)
+
+        assert load_cached_opml(account_path) == "account export"
+        assert is_opml_processed("account export", account_path) is True
+        assert load_cached_opml() is None
+        assert is_opml_processed("account export") is False
@@ -0,0 +1,88 @@
+"""Tests for the persistent HTTP response cache"""
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from podcast_pal.auth.session import LOGIN_URL
+from podcast_pal.storage.http_cache import ResponseCache
+from podcast_pal.fetchers.page import PageMetadataCache, get_page_metadata
+from tests.helpers import make_page_response
+
+PAGE_CONTENT = '<meta name="og:description" content="Test episode summary">'
+
+@pytest.fixture
+def response_cache(tmp_path):
+    """Create a response cache in a temporary directory"""
+    cache = ResponseCache(str(tmp_path / 'pages.sqlite'), max_entries=2)
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def mock_session():
+    """Create a mock session returning a page with validators"""
+    session = Mock()
+    session.get.return_value = make_page_response(
+        PAGE_CONTENT,
+        headers={'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    )
+    return session
+
+def test_put_and_get(response_cache):
+    """Test storing and reading back a response"""
+    response_cache.put('http://overcast.fm/a', 'body', etag='"abc"')
+    cached = response_cache.get('http://overcast.fm/a')
+    assert cached.body == 'body'
+    assert cached.conditional_headers() == {'If-None-Match': '"abc"'}
+
+def test_lru_eviction(response_cache):
+    """Test that the least recently used entry is evicted"""
+    with patch('podcast_pal.storage.http_cache.time.time', side_effect=[1, 2, 3, 4]):
+        response_cache.put('http://overcast.fm/a', 'a')
+        response_cache.put('http://overcast.fm/b', 'b')
+        response_cache.get('http://overcast.fm/a')
+        response_cache.put('http://overcast.fm/c', 'c')
+
+    assert len(response_cache) == 2
+    assert response_cache.get('http://overcast.fm/b') is None
+    assert response_cache.get('http://overcast.fm/a') is not None
+
+def test_fresh_entry_skips_request(response_cache, mock_session):
+    """Test that a fresh cached page is served without any request"""
+    response_cache.put('http://overcast.fm/a', PAGE_CONTENT)
+
+    metadata = get_page_metadata('http://overcast.fm/a', mock_session, PageMetadataCache(response_cache))
+
+    assert metadata.description == 'Test episode summary'
+    mock_session.get.assert_not_called()
+
+def test_stale_entry_revalidated(response_cache, mock_session):
+    """Test conditional revalidation of a stale entry answered with 304"""
+    response_cache.put('http://overcast.fm/a', PAGE_CONTENT, etag='"abc"')
+    response_cache.fresh_hours = 0
+    mock_session.get.return_value = make_page_response('', status_code=304)
+
+    metadata = get_page_metadata('http://overcast.fm/a', mock_session, PageMetadataCache(response_cache))
+
+    assert metadata.description == 'Test episode summary'
+    mock_session.get.assert_called_once_with('http://overcast.fm/a', stream=True, headers={'If-None-Match': '"abc"'})
+    assert response_cache.get('http://overcast.fm/a').stored_at == pytest.approx(time.time(), abs=5)
+
+def test_miss_stores_response(response_cache, mock_session):
+    """Test that a downloaded page is stored with its validators"""
+    get_page_metadata('http://overcast.fm/a', mock_session, PageMetadataCache(response_cache))
+
+    cached = response_cache.get('http://overcast.fm/a')
+    assert cached.body == PAGE_CONTENT
+    assert cached.etag == '"abc"'
+    assert cached.last_modified == 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+def test_login_page_not_cached(response_cache, mock_session):
+    """Test that a redirect to the login page keeps the stale copy instead of replacing it"""
+    response_cache.put('http://overcast.fm/a', PAGE_CONTENT)
+    response_cache.fresh_hours = 0
+    mock_session.get.return_value = make_page_response('<html>Log in</html>', url=LOGIN_URL)
+
+    metadata = get_page_metadata('http://overcast.fm/a', mock_session, PageMetadataCache(response_cache))
+
+    assert metadata.description == 'Test episode summary'
+    assert response_cache.get('http://overcast.fm/a').body == PAGE_CONTENT
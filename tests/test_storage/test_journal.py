@@ -0,0 +1,88 @@
+"""Tests for the resumable run journal"""
+import pytest
+from unittest.mock import Mock
+
+from podcast_pal.auth.session import LOGIN_URL
+from podcast_pal.core.exceptions import StorageError
+from podcast_pal.fetchers.page import PageMetadata, PageMetadataCache, get_page_metadata
+from podcast_pal.storage.journal import RunJournal
+from tests.helpers import make_page_response
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'journal.sqlite')
+
+def test_completed_podcasts_survive_reopen(journal_path):
+    """A rerun of the same run sees the podcasts already stored"""
+    journal = RunJournal('hash:full', journal_path)
+    journal.complete_podcasts(['Podcast A', 'Podcast B'])
+    journal.close()
+
+    resumed = RunJournal('hash:full', journal_path)
+    assert resumed.is_completed('Podcast A')
+    assert resumed.is_completed('Podcast B')
+    assert not resumed.is_completed('Podcast C')
+    resumed.close()
+
+def test_different_run_discards_podcasts_but_keeps_pages(journal_path):
+    """Stored podcasts belong to one run, fetched pages stay valid"""
+    journal = RunJournal('old:full', journal_path)
+    journal.complete_podcasts(['Podcast A'])
+    journal.record_page('http://overcast.url/1', {'artwork_url': 'art', 'description': 'desc', 'title': 't'})
+    journal.close()
+
+    other = RunJournal('new:full', journal_path)
+    assert not other.is_completed('Podcast A')
+    assert other.get_page('http://overcast.url/1') == {'artwork_url': 'art', 'description': 'desc', 'title': 't'}
+    other.close()
+
+def test_compact_forgets_everything(journal_path):
+    """After a fully committed run the journal starts empty"""
+    journal = RunJournal('hash:full', journal_path)
+    journal.complete_podcasts(['Podcast A'])
+    journal.record_page('http://overcast.url/1', {'description': 'desc'})
+    journal.compact()
+    assert not journal.is_completed('Podcast A')
+    journal.close()
+
+    reopened = RunJournal('hash:full', journal_path)
+    assert not reopened.is_completed('Podcast A')
+    assert reopened.get_page('http://overcast.url/1') is None
+    reopened.close()
+
+def test_unopenable_journal_raises_storage_error(tmp_path):
+    with pytest.raises(StorageError):
+        RunJournal('hash:full', str(tmp_path / 'missing' / 'journal.sqlite'))
+
+def test_page_cache_reuses_journaled_metadata(journal_path):
+    """Journaled pages are not fetched again and new ones are journaled"""
+    journal = RunJournal('hash:full', journal_path)
+    journal.record_page('http://overcast.url/1', {'artwork_url': 'art', 'description': 'desc', 'title': 't'})
+    page_cache = PageMetadataCache(journal=journal)
+
+    fetch = Mock(return_value=PageMetadata(description='fetched'))
+    assert page_cache.get_or_fetch('http://overcast.url/1', fetch) == PageMetadata('art', 'desc', 't')
+    fetch.assert_not_called()
+
+    assert page_cache.get_or_fetch('http://overcast.url/2', fetch).description == 'fetched'
+    assert journal.get_page('http://overcast.url/2')['description'] == 'fetched'
+    journal.close()
+
+def test_page_cache_does_not_journal_failures(journal_path):
+    """A failed fetch is retried by the next run"""
+    journal = RunJournal('hash:full', journal_path)
+    page_cache = PageMetadataCache(journal=journal)
+
+    assert page_cache.get_or_fetch('http://overcast.url/1', Mock(return_value=None)) is None
+    assert journal.get_page('http://overcast.url/1') is None
+    journal.close()
+
+def test_page_cache_does_not_journal_login_page(journal_path):
+    """A login page served in place of the episode is treated as a failed fetch"""
+    journal = RunJournal('hash:full', journal_path)
+    session = Mock()
+    session.get.return_value = make_page_response('<html>Log in</html>', url=LOGIN_URL)
+
+    assert get_page_metadata('http://overcast.url/1', session, PageMetadataCache(journal=journal)) is None
+    assert journal.get_page('http://overcast.url/1') is None
+    journal.close()
@@ -0,0 +1,55 @@
+"""Tests for the per-episode layout migration"""
+import pytest
+from unittest.mock import ANY, MagicMock
+
+from podcast_pal.storage.migrate import migrate_to_episode_documents
+from podcast_pal.core.exceptions import StorageError
+
+@pytest.fixture
+def podcast_doc():
+    """Create an embedded-layout podcast document"""
+    return {
+        "_id": "1",
+        "podcast_title": "Test Podcast",
+        "source": "overcast",
+        "episodes": [{"overcast_id": "ep1", "title": "One"}, {"overcast_id": "ep2", "title": "Two"}]
+    }
+
+@pytest.fixture
+def mock_collection(podcast_doc):
+    """Create a podcast collection returning one batch, then nothing"""
+    collection = MagicMock()
+    collection.name = "history"
+    collection.find.return_value.limit.side_effect = [[podcast_doc], []]
+    return collection
+
+def test_migrate_copies_then_pulls_episodes(mock_collection):
+    """Test that episodes are upserted before being pulled from their podcast"""
+    episodes_collection = mock_collection.database.get_collection.return_value
+
+    migrated = migrate_to_episode_documents(mock_collection, batch_size=10)
+
+    assert migrated == 2
+    mock_collection.database.get_collection.assert_called_once_with("history_episodes", codec_options=ANY)
+    operations = episodes_collection.bulk_write.call_args[0][0]
+    assert [op._filter for op in operations] == [{"overcast_id": "ep1"}, {"overcast_id": "ep2"}]
+    assert operations[0]._doc["$setOnInsert"]["podcast_title"] == "Test Podcast"
+    pull = mock_collection.update_one.call_args[0][1]
+    assert pull == {"$pull": {"episodes": {"overcast_id": {"$in": ["ep1", "ep2"]}}}}
+    mock_collection.update_many.assert_called_once()
+
+def test_migrate_slices_episodes(mock_collection):
+    """Test that each podcast is read in slices of batch_size episodes"""
+    migrate_to_episode_documents(mock_collection, batch_size=5)
+
+    projection = mock_collection.find.call_args[0][1]
+    assert projection["episodes"] == {"$slice": 5}
+    mock_collection.find.return_value.limit.assert_called_with(5)
+
+def test_migrate_error(mock_collection):
+    """Test that database errors are reported as StorageError"""
+    mock_collection.database.get_collection.return_value.bulk_write.side_effect = Exception("Database error")
+
+    with pytest.raises(StorageError) as exc_info:
+        migrate_to_episode_documents(mock_collection)
+    assert "Migration failed" in str(exc_info.value)
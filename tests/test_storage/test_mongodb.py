@@ -1,17 +1,26 @@
 """Tests for MongoDB storage functionality"""
 import pytest
-from unittest.mock import Mock, patch, ANY
+from unittest.mock import MagicMock, Mock, patch, ANY
+from dataclasses import replace
 from datetime import datetime
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import OperationFailure
 
 from podcast_pal.storage.mongodb import (
     get_mongodb_collection,
+    get_stored_artwork,
+    ensure_indexes,
     update_podcast,
+    update_podcasts,
+    update_episode_progress,
+    get_storage_layout,
+    LAYOUT_EPISODES,
     _get_mongodb_config,
     _update_existing_podcast,
     _insert_new_podcast
 )
 from podcast_pal.core.exceptions import StorageError
-from podcast_pal.core.podcast import Podcast, Episode
+from podcast_pal.core.podcast import Podcast, Episode, StoredArtwork
 
 @pytest.fixture
 def mock_episode():
@@ -71,9 +80,10 @@ def test_get_mongodb_collection():
             collection = get_mongodb_collection()
             
             assert collection == mock_collection
-            mock_client.assert_called_once_with('mongodb://localhost')
+            mock_client.assert_called_once_with('mongodb://localhost', event_listeners=ANY)
             mock_client_instance.__getitem__.assert_called_once_with('test_db')
             mock_db.get_collection.assert_called_once_with('test_collection', codec_options=ANY)
+            mock_collection.create_indexes.assert_called_once()
 
 def test_get_mongodb_config_missing_vars():
     """Test handling of missing environment variables"""
@@ -179,4 +189,217 @@ def test_insert_new_podcast(mock_collection, mock_podcast):
     episode = called_arg["episodes"][0]
     assert episode["title"] == mock_podcast.episodes[0].title
     assert episode["audio_url"] == mock_podcast.episodes[0].audio_url
-    assert episode["overcast_id"] == mock_podcast.episodes[0].overcast_id
\ No newline at end of file
+    assert episode["overcast_id"] == mock_podcast.episodes[0].overcast_id
+
+def test_update_existing_podcast_sets_artwork(mock_collection, mock_podcast):
+    """Test that freshly resolved artwork is written to an existing podcast"""
+    mock_podcast.artwork_updated_at = datetime.now()
+    existing_doc = {"_id": "123", "episodes": []}
+
+    _update_existing_podcast(mock_collection, existing_doc, mock_podcast)
+
+    fields = mock_collection.update_one.call_args[0][1]["$set"]
+    assert fields["artwork_url"] == mock_podcast.artwork_url
+    assert fields["artwork_updated_at"] == mock_podcast.artwork_updated_at
+
+def test_update_existing_podcast_keeps_artwork_when_unresolved(mock_collection, mock_podcast):
+    """Test that an empty artwork URL does not overwrite stored artwork"""
+    mock_podcast.artwork_url = ''
+    existing_doc = {"_id": "123", "episodes": []}
+
+    _update_existing_podcast(mock_collection, existing_doc, mock_podcast)
+
+    fields = mock_collection.update_one.call_args[0][1]["$set"]
+    assert "artwork_url" not in fields
+
+def test_get_stored_artwork(mock_collection):
+    """Test loading stored artwork keyed by podcast title"""
+    updated_at = datetime.now()
+    mock_collection.find.return_value = [
+        {"podcast_title": "A", "artwork_url": "http://a.url", "artwork_updated_at": updated_at},
+        {"podcast_title": "B", "artwork_url": None}
+    ]
+
+    artwork = get_stored_artwork(mock_collection)
+
+    assert artwork == {
+        "A": StoredArtwork("http://a.url", updated_at),
+        "B": StoredArtwork("", None)
+    }
+    assert mock_collection.find.call_args[0][0] == {"source": "overcast"}
+
+
+def test_update_podcasts_bulk(mock_collection, mock_podcast, mock_episode):
+    """Test that new and existing podcasts are written in one bulk request"""
+    existing_podcast = replace(mock_podcast, title="Existing Podcast")
+    unchanged_podcast = replace(mock_podcast, title="Unchanged Podcast")
+    mock_collection.find.return_value = [
+        {"_id": "1", "podcast_title": "Existing Podcast", "source": "overcast", "episodes": []},
+        {"_id": "2", "podcast_title": "Unchanged Podcast", "source": "overcast",
+         "episodes": [{"overcast_id": mock_episode.overcast_id}]}
+    ]
+
+    result = update_podcasts(mock_collection, [mock_podcast, existing_podcast, unchanged_podcast])
+
+    assert result == 2
+    mock_collection.find.assert_called_once()
+    mock_collection.find_one.assert_not_called()
+    operations = mock_collection.bulk_write.call_args[0][0]
+    assert mock_collection.bulk_write.call_args[1] == {"ordered": False}
+    assert [type(op) for op in operations] == [InsertOne, UpdateOne]
+
+def test_update_podcasts_nothing_to_write(mock_collection, mock_podcast, mock_episode):
+    """Test that no bulk request is sent when every episode is stored"""
+    mock_collection.find.return_value = [
+        {"_id": "1", "podcast_title": mock_podcast.title, "source": "overcast",
+         "episodes": [{"overcast_id": mock_episode.overcast_id}]}
+    ]
+
+    assert update_podcasts(mock_collection, [mock_podcast]) == 0
+    mock_collection.bulk_write.assert_not_called()
+
+def test_update_podcasts_refreshed_artwork_only(mock_collection, mock_podcast, mock_episode):
+    """Test that refreshed artwork is written even when every episode is stored"""
+    mock_podcast.artwork_updated_at = datetime.now()
+    mock_collection.find.return_value = [
+        {"_id": "1", "podcast_title": mock_podcast.title, "source": "overcast",
+         "episodes": [{"overcast_id": mock_episode.overcast_id}]}
+    ]
+
+    assert update_podcasts(mock_collection, [mock_podcast]) == 0
+    [operation] = mock_collection.bulk_write.call_args[0][0]
+    assert operation._filter == {"_id": "1"}
+    assert operation._doc == {"$set": {"artwork_url": mock_podcast.artwork_url,
+                                       "artwork_updated_at": mock_podcast.artwork_updated_at}}
+
+def test_update_podcasts_merges_duplicates(mock_collection, mock_podcast, mock_episode):
+    """Test that podcasts sharing a title produce a single insert"""
+    other_episode = replace(mock_episode, overcast_id="ep456")
+    duplicate = replace(mock_podcast, episodes=[mock_episode, other_episode])
+    mock_collection.find.return_value = []
+
+    assert update_podcasts(mock_collection, [mock_podcast, duplicate]) == 1
+    operations = mock_collection.bulk_write.call_args[0][0]
+    assert len(operations) == 1
+    assert [ep["overcast_id"] for ep in operations[0]._doc["episodes"]] == ["ep123", "ep456"]
+
+def test_update_podcasts_error(mock_collection, mock_podcast):
+    """Test handling of MongoDB errors during bulk writes"""
+    mock_collection.find.return_value = []
+    mock_collection.bulk_write.side_effect = Exception("Database error")
+
+    with pytest.raises(StorageError) as exc_info:
+        update_podcasts(mock_collection, [mock_podcast])
+    assert "Failed to update podcasts" in str(exc_info.value)
+
+
+def test_ensure_indexes(mock_collection):
+    """Test that the unique podcast key and episode ID indexes are created"""
+    ensure_indexes(mock_collection)
+
+    models = mock_collection.create_indexes.call_args[0][0]
+    documents = [model.document for model in models]
+    assert documents[0]["key"] == {"source": 1, "podcast_title": 1}
+    assert documents[0]["unique"] is True
+    assert documents[1]["key"] == {"episodes.overcast_id": 1}
+
+def test_ensure_indexes_failure_is_logged(mock_collection):
+    """Test that an index build failure does not abort the run"""
+    mock_collection.create_indexes.side_effect = OperationFailure("duplicate key")
+    ensure_indexes(mock_collection)
+
+def test_update_podcast_projects_episode_ids(mock_collection, mock_podcast):
+    """Test that only episode IDs are read for an existing podcast"""
+    update_podcast(mock_collection, mock_podcast)
+
+    assert mock_collection.find_one.call_args[0][1] == {"episodes.overcast_id": 1}
+
+
+@pytest.fixture
+def mock_episodes_collection(mock_collection):
+    """Per-episode collection paired with the mock podcast collection"""
+    mock_collection.name = "history"
+    return mock_collection.database.get_collection.return_value
+
+def test_update_podcasts_episode_layout(mock_collection, mock_episodes_collection, mock_podcast):
+    """Test that episodes are upserted by overcast_id without reading existing IDs"""
+    mock_episodes_collection.bulk_write.return_value.upserted_ids = {0: "new"}
+    mock_collection.bulk_write.return_value.upserted_ids = {}
+
+    result = update_podcasts(mock_collection, [mock_podcast], layout=LAYOUT_EPISODES)
+
+    assert result == 1
+    mock_collection.find.assert_not_called()
+    episode_op = mock_episodes_collection.bulk_write.call_args[0][0][0]
+    assert episode_op._filter == {"overcast_id": "ep123"}
+    assert episode_op._upsert is True
+    assert episode_op._doc["$setOnInsert"]["podcast_title"] == mock_podcast.title
+    podcast_op = mock_collection.bulk_write.call_args[0][0][0]
+    assert podcast_op._filter == {"podcast_title": mock_podcast.title, "source": "overcast"}
+    assert "episodes" not in podcast_op._doc["$setOnInsert"]
+    assert podcast_op._doc["$set"]["artwork_url"] == mock_podcast.artwork_url
+
+def test_update_podcasts_episode_layout_no_new_episodes(mock_collection, mock_episodes_collection, mock_podcast):
+    """Test that already stored episodes only refresh an existing podcast's artwork"""
+    mock_episodes_collection.bulk_write.return_value.upserted_ids = {}
+    mock_collection.bulk_write.return_value.upserted_ids = {}
+
+    assert update_podcast(mock_collection, mock_podcast, layout=LAYOUT_EPISODES) is False
+    podcast_op = mock_collection.bulk_write.call_args[0][0][0]
+    assert set(podcast_op._doc["$set"]) == {"artwork_url", "artwork_updated_at"}
+
+def test_update_podcast_layout_from_environment(mock_collection, mock_episodes_collection, mock_podcast):
+    """Test that MONGODB_LAYOUT selects the per-episode layout"""
+    mock_episodes_collection.bulk_write.return_value.upserted_ids = {}
+    mock_collection.bulk_write.return_value.upserted_ids = {0: "new"}
+
+    with patch.dict('os.environ', {'MONGODB_LAYOUT': 'episodes'}):
+        assert update_podcast(mock_collection, mock_podcast) is True
+    mock_collection.find_one.assert_not_called()
+
+def test_get_storage_layout_invalid():
+    """Test that an unknown layout is rejected"""
+    with patch.dict('os.environ', {'MONGODB_LAYOUT': 'flat'}):
+        with pytest.raises(StorageError):
+            get_storage_layout()
+
+def test_update_episode_progress(mock_collection):
+    """Test that progress changes update embedded episodes in place"""
+    played_at = datetime(2024, 1, 1, 10, 0)
+    mock_collection.bulk_write.return_value.modified_count = 1
+
+    result = update_episode_progress(mock_collection, {"ep123": ("80", played_at)}, layout="embedded")
+
+    assert result == 1
+    operation = mock_collection.bulk_write.call_args[0][0][0]
+    assert operation._filter == {"episodes.overcast_id": "ep123"}
+    assert operation._doc == {"$set": {"episodes.$.play_progress": "80", "episodes.$.last_played_at": played_at}}
+
+def test_update_episode_progress_episode_layout(mock_collection, mock_episodes_collection):
+    """Test that progress changes update episode documents in the per-episode layout"""
+    mock_episodes_collection.bulk_write.return_value.modified_count = 1
+
+    update_episode_progress(mock_collection, {"ep123": ("80", None)}, layout=LAYOUT_EPISODES)
+
+    mock_collection.bulk_write.assert_not_called()
+    operation = mock_episodes_collection.bulk_write.call_args[0][0][0]
+    assert operation._filter == {"overcast_id": "ep123"}
+    assert operation._doc == {"$set": {"play_progress": "80"}}
+
+def test_update_episode_progress_nothing_to_do(mock_collection):
+    """Test that an empty update skips MongoDB entirely"""
+    assert update_episode_progress(mock_collection, {}) == 0
+    mock_collection.bulk_write.assert_not_called()
+
+def test_get_mongodb_collection_on_shared_client():
+    """Test that a given client and collection name replace PODCAST_DB and MONGODB_COLLECTION"""
+    client = MagicMock()
+    with patch.dict('os.environ', {'MONGODB_DATABASE': 'test_db'}, clear=True):
+        with patch('podcast_pal.storage.mongodb.MongoClient') as mock_client:
+            collection = get_mongodb_collection(create_indexes=False, client=client,
+                                                collection_name='alice_history')
+
+    mock_client.assert_not_called()
+    client.__getitem__.assert_called_once_with('test_db')
+    client['test_db'].get_collection.assert_called_once_with('alice_history', codec_options=ANY)
+    assert collection is client['test_db'].get_collection.return_value
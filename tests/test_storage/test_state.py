@@ -0,0 +1,44 @@
+"""Tests for persistent sync state"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from podcast_pal.storage.state import HighWaterMarks
+
+@pytest.fixture
+def state_path(tmp_path):
+    """Path of a temporary state file"""
+    return str(tmp_path / 'state.json')
+
+def test_unknown_podcast_has_new_activity(state_path):
+    """Test that podcasts without a mark are always processed"""
+    marks = HighWaterMarks(state_path)
+    assert marks.has_new_activity('Podcast', None) is True
+
+def test_marks_only_persist_after_save(state_path):
+    """Test that recorded marks are staged until save is called"""
+    activity = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    marks = HighWaterMarks(state_path)
+    marks.record('Podcast', activity)
+
+    assert HighWaterMarks(state_path).has_new_activity('Podcast', activity) is True
+
+    marks.save()
+    reloaded = HighWaterMarks(state_path)
+    assert reloaded.has_new_activity('Podcast', activity) is False
+    assert reloaded.has_new_activity('Podcast', activity + timedelta(seconds=1)) is True
+
+def test_idle_podcast_mark(state_path):
+    """Test that a podcast saved without activity is skipped until it has some"""
+    marks = HighWaterMarks(state_path)
+    marks.record('Podcast', None)
+    marks.save()
+
+    reloaded = HighWaterMarks(state_path)
+    assert reloaded.has_new_activity('Podcast', None) is False
+    assert reloaded.has_new_activity('Podcast', datetime(2024, 1, 1, tzinfo=timezone.utc)) is True
+
+def test_unreadable_state_is_ignored(state_path):
+    """Test that a corrupt state file starts a full sync"""
+    with open(state_path, 'w') as f:
+        f.write('not json')
+    assert len(HighWaterMarks(state_path)) == 0